@@ -1,10 +1,14 @@
+from django import forms
 from django.contrib import admin
 from django.utils.html import format_html
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Count
 from django.utils import timezone
 
+from apps.konsultasi import metrics, periods
+from apps.konsultasi.services import assignment, changefeed
 from apps.konsultasi.models import (
-    TipeKunjungan, KategoriLayanan,
+    Kantor, TipeKunjungan, KategoriLayanan,
     JenisLayanan, MediaKonsultasi,
     SumberJawaban, Tamu, Petugas,
     Kunjungan
@@ -13,6 +17,13 @@ from apps.konsultasi.models import (
 
 # ===== MASTER DATA ADMIN =====
 
+@admin.register(Kantor)
+class KantorAdmin(admin.ModelAdmin):
+    list_display = ("id_kantor", "kode", "nama_kantor", "is_active")
+    list_filter = ("is_active",)
+    search_fields = ("kode", "nama_kantor")
+
+
 @admin.register(TipeKunjungan)
 class TipeKunjunganAdmin(admin.ModelAdmin):
     list_display = ("id_tipe", "nama_tipe")
@@ -26,9 +37,15 @@ class KategoriLayananAdmin(admin.ModelAdmin):
     search_fields = ("nama_kategori",)
     ordering = ("id_kategori",)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            total_jenis=Count("jenis_layanan")
+        )
+
     def jumlah_jenis(self, obj):
-        return obj.jenis_layanan.count()
+        return obj.total_jenis
     jumlah_jenis.short_description = "Jumlah Jenis Layanan"
+    jumlah_jenis.admin_order_field = "total_jenis"
 
 
 @admin.register(JenisLayanan)
@@ -39,6 +56,11 @@ class JenisLayananAdmin(admin.ModelAdmin):
     ordering = ("id_kategori", "id_jenis")
     autocomplete_fields = ["id_kategori"]
 
+    def get_queryset(self, request):
+        # __str__ memakai nama kategori: tanpa ini satu query per baris,
+        # termasuk hasil autocomplete id_jenis di form Kunjungan
+        return super().get_queryset(request).select_related("id_kategori")
+
 
 @admin.register(MediaKonsultasi)
 class MediaKonsultasiAdmin(admin.ModelAdmin):
@@ -72,27 +94,33 @@ class TamuAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Annotate jumlah kunjungan sekali (hindari N+1 per baris)"""
+        return super().get_queryset(request).with_kunjungan_count()
+
     def jumlah_kunjungan(self, obj):
-        count = obj.kunjungan.count()
+        count = obj.total_kunjungan
         return format_html(
             '<span style="font-weight: bold; color: {};">{}</span>',
             'green' if count > 0 else 'gray',
             count
         )
     jumlah_kunjungan.short_description = "Total Kunjungan"
+    jumlah_kunjungan.admin_order_field = "total_kunjungan"
 
 
 @admin.register(Petugas)
 class PetugasAdmin(admin.ModelAdmin):
     list_display = ("id_petugas", "nama_petugas", "username", "role", "status_aktif", "total_layanan")
-    list_filter = ("role", "is_active")
+    list_filter = ("id_kantor", "role", "is_active")
     search_fields = ("nama_petugas", "username")
     list_per_page = 50
     ordering = ("-is_active", "nama_petugas")
+    filter_horizontal = ("spesialisasi",)
 
     fieldsets = (
         ("Informasi Petugas", {
-            "fields": ("nama_petugas", "username", "role")
+            "fields": ("nama_petugas", "username", "role", "id_kantor", "spesialisasi")
         }),
         ("Status & Tanda Tangan", {
             "fields": ("is_active", "ttd_petugas")
@@ -109,13 +137,18 @@ class PetugasAdmin(admin.ModelAdmin):
         )
     status_aktif.short_description = "Status"
 
+    def get_queryset(self, request):
+        """Annotate statistik sekali (hindari N+1 per baris)"""
+        return super().get_queryset(request).with_stats()
+
     def total_layanan(self, obj):
-        count = obj.kunjungan.filter(status_selesai=True).count()
+        count = obj.layanan_selesai
         return format_html(
             '<span style="font-weight: bold;">{}</span>',
             count
         )
     total_layanan.short_description = "Total Layanan Selesai"
+    total_layanan.admin_order_field = "layanan_selesai"
 
 
 # ===== KUNJUNGAN ADMIN =====
@@ -142,8 +175,44 @@ class KonsultasiFilter(admin.SimpleListFilter):
         return queryset
 
 
+class KunjunganAdminForm(forms.ModelForm):
+    """
+    Form admin dengan field pertanyaan/jawaban
+
+    Keduanya disimpan di tabel kunjungan_konten (property di Kunjungan),
+    jadi di-set ke instance sebelum Kunjungan.clean() dijalankan.
+    """
+    pertanyaan = forms.CharField(
+        widget=forms.Textarea, required=False,
+        help_text="Wajib untuk kategori konsultasi",
+    )
+    jawaban = forms.CharField(
+        widget=forms.Textarea, required=False,
+        help_text="Diisi petugas untuk konsultasi",
+    )
+
+    class Meta:
+        model = Kunjungan
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            for name in ("pertanyaan", "jawaban"):
+                if name in self.fields:
+                    self.fields[name].initial = getattr(self.instance, name)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in ("pertanyaan", "jawaban"):
+            if name in self.fields and name in cleaned_data:
+                setattr(self.instance, name, cleaned_data[name])
+        return cleaned_data
+
+
 @admin.register(Kunjungan)
 class KunjunganAdmin(admin.ModelAdmin):
+    form = KunjunganAdminForm
     list_display = (
         "nomor_kunjungan",
         "tanggal_kunjungan",
@@ -156,6 +225,7 @@ class KunjunganAdmin(admin.ModelAdmin):
     )
 
     list_filter = (
+        "id_kantor",
         "status_selesai",
         "id_tipe",
         "id_kategori",
@@ -183,10 +253,14 @@ class KunjunganAdmin(admin.ModelAdmin):
         """
         Dynamic readonly fields:
         - Nomor kunjungan: selalu readonly (auto-generated)
+        - Kantor: readonly setelah tersimpan (nomor dari sequence kantor)
         - Tanggal kunjungan: readonly jika sudah selesai
         - Waktu selesai: selalu readonly (auto-set)
         """
         ro = list(self.readonly_fields)
+
+        if obj and obj.pk:
+            ro.append("id_kantor")
         
         # Jika kunjungan sudah selesai, lock tanggal
         if obj and obj.status_selesai:
@@ -216,6 +290,7 @@ class KunjunganAdmin(admin.ModelAdmin):
         fieldsets = [
             ("Informasi Kunjungan", {
                 "fields": (
+                    "id_kantor",
                     "nomor_kunjungan",
                     "tanggal_kunjungan",
                     "id_tipe",
@@ -361,6 +436,7 @@ class KunjunganAdmin(admin.ModelAdmin):
     actions = ['tandai_selesai', 'tandai_menunggu', 'export_laporan']
 
     @admin.action(description='Tandai sebagai SELESAI')
+    @transaction.atomic
     def tandai_selesai(self, request, queryset):
         """Bulk action untuk menyelesaikan kunjungan non-konsultasi"""
         # Hanya untuk non-konsultasi yang belum selesai
@@ -369,11 +445,18 @@ class KunjunganAdmin(admin.ModelAdmin):
         ).exclude(
             id_kategori__nama_kategori__icontains='konsultasi'
         )
+        # Beban petugas di papan penugasan turun setelah commit
+        self._adjust_load_on_commit(non_konsultasi, assignment.release)
         
-        updated = non_konsultasi.update(
+        now = timezone.now()
+        updated = changefeed.update_queryset(
+            non_konsultasi,
+            "complete",
             status_selesai=True,
-            waktu_selesai=timezone.now()
+            waktu_selesai=now,
+            updated_at=now
         )
+        transaction.on_commit(lambda: metrics.SELESAI.inc(updated, jalur="bulk_admin"))
         
         self.message_user(
             request,
@@ -381,11 +464,17 @@ class KunjunganAdmin(admin.ModelAdmin):
         )
 
     @admin.action(description='Tandai sebagai MENUNGGU')
+    @transaction.atomic
     def tandai_menunggu(self, request, queryset):
         """Bulk action untuk reset status"""
-        updated = queryset.update(
+        # Yang dibuka lagi menambah beban petugasnya
+        self._adjust_load_on_commit(queryset.filter(status_selesai=True), assignment.reopen)
+        updated = changefeed.update_queryset(
+            queryset,
+            "reset",
             status_selesai=False,
-            waktu_selesai=None
+            waktu_selesai=None,
+            updated_at=timezone.now()
         )
         
         self.message_user(
@@ -393,36 +482,30 @@ class KunjunganAdmin(admin.ModelAdmin):
             f"{updated} kunjungan berhasil direset ke status menunggu."
         )
 
+    def _adjust_load_on_commit(self, queryset, adjust):
+        """
+        assignment.release / reopen per kunjungan hari ini yang punya petugas
+        (sama seperti KunjunganService.bulk_complete_non_konsultasi)
+        """
+        if not assignment.get_config()["ENABLED"]:
+            return
+        today = periods.local_today()
+        for id_petugas in queryset.filter(tanggal_kunjungan=today).assigned().values_list("id_petugas", flat=True):
+            transaction.on_commit(lambda petugas=id_petugas: adjust(petugas, today))
+
     @admin.action(description='Export Laporan (CSV)')
     def export_laporan(self, request, queryset):
-        """Export data kunjungan ke CSV"""
-        import csv
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
+        """
+        Export data kunjungan ke CSV (streaming: dibaca per chunk lewat
+        server-side cursor, tidak ditampung utuh di memori)
+        """
+        from django.http import StreamingHttpResponse
+        from apps.konsultasi.services import KunjunganReports
+
+        response = StreamingHttpResponse(
+            KunjunganReports().stream_csv(queryset), content_type='text/csv'
+        )
         response['Content-Disposition'] = 'attachment; filename="laporan_kunjungan.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'Nomor', 'Tanggal', 'Tamu', 'Instansi', 
-            'Tipe', 'Kategori', 'Jenis', 'Status',
-            'Petugas', 'Waktu Selesai'
-        ])
-        
-        for obj in queryset:
-            writer.writerow([
-                obj.nomor_kunjungan,
-                obj.tanggal_kunjungan,
-                obj.id_tamu.nama,
-                obj.id_tamu.instansi_perusahaan,
-                obj.id_tipe.nama_tipe,
-                obj.id_kategori.nama_kategori,
-                obj.id_jenis.nama_jenis,
-                'Selesai' if obj.status_selesai else 'Menunggu',
-                obj.id_petugas.nama_petugas if obj.id_petugas else '-',
-                obj.waktu_selesai.strftime('%Y-%m-%d %H:%M:%S') if obj.waktu_selesai else '-',
-            ])
-        
         return response
 
     # ===== QUERYSET OPTIMIZATION =====
@@ -5,3 +5,6 @@ class KonsultasiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.konsultasi'
     verbose_name = 'Buku Tamu Konsultasi'
+
+    def ready(self):
+        from apps.konsultasi import signals  # noqa: F401
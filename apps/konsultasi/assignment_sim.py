@@ -0,0 +1,270 @@
+"""
+Simulasi antrian penugasan petugas (discrete-event, tanpa database)
+
+Satu hari layanan di satu kantor: kedatangan Poisson dengan jam sibuk,
+lama layanan eksponensial per jenis, sebagian petugas spesialis. Tiap
+kebijakan dijalankan dengan urutan kedatangan & lama layanan yang sama:
+
+    manual        - kunjungan masuk unassigned(); petugas mengambil yang
+                    terlama saat selesai melayani, atau saat mengecek
+                    daftar tiap poll_minutes ketika menganggur
+    round_robin   - ditugaskan bergiliran saat registrasi, tanpa melihat beban
+    least_loaded  - LoadBoard dari services/assignment.py (yang dipakai
+                    registrasi), beban turun saat layanan selesai
+
+Diukur: waktu tunggu (datang -> mulai dilayani) p50 / p95 / maks, utilisasi
+petugas, dan kunjungan yang tidak punya petugas yang cocok.
+
+Dipakai command `simulate_assignment`.
+"""
+
+import heapq
+import itertools
+import random
+import statistics
+import time
+from collections import deque
+
+from apps.konsultasi.loadtest import percentile
+from apps.konsultasi.services.assignment import LoadBoard
+
+
+POLICIES = ("manual", "round_robin", "least_loaded")
+
+# Pengali laju kedatangan per jam layanan (08.00-16.00): ramai pagi & setelah istirahat
+HOURLY_PROFILE = (0.6, 1.5, 1.4, 1.0, 0.5, 1.3, 1.0, 0.7)
+
+# id_jenis -> (bobot kedatangan, rata-rata lama layanan menit)
+DEFAULT_JENIS = {
+    1: (0.35, 12.0),   # konsultasi SPSE
+    2: (0.20, 15.0),   # konsultasi katalog
+    3: (0.30, 5.0),    # pendaftaran / verifikasi
+    4: (0.15, 3.0),    # informasi
+}
+
+KANTOR = 1
+
+
+def generate_visits(rnd, arrivals_per_hour, jenis=None, profile=HOURLY_PROFILE):
+    """Kedatangan satu hari: list (menit datang, id_jenis, lama layanan menit)"""
+    jenis = jenis or DEFAULT_JENIS
+    ids = list(jenis)
+    weights = [jenis[pk][0] for pk in ids]
+    visits = []
+    for hour, factor in enumerate(profile):
+        rate = arrivals_per_hour * factor / 60.0
+        if rate <= 0:
+            continue
+        minute = hour * 60 + rnd.expovariate(rate)
+        while minute < (hour + 1) * 60:
+            id_jenis = rnd.choices(ids, weights)[0]
+            visits.append((minute, id_jenis, rnd.expovariate(1.0 / jenis[id_jenis][1])))
+            minute += rnd.expovariate(rate)
+    return visits
+
+
+def staff_roster(staff, specialist_ratio=0.5, jenis=None):
+    """
+    Petugas 1..staff; sebagian pertama spesialis satu jenis (bergiliran),
+    sisanya umum. Minimal satu petugas umum supaya semua jenis terlayani.
+
+    Returns:
+        dict: {id_petugas: tuple id_jenis (kosong = umum)}
+    """
+    ids = list(jenis or DEFAULT_JENIS)
+    specialists = min(int(staff * specialist_ratio), staff - 1)
+    return {
+        petugas: (ids[index % len(ids)],) if index < specialists else ()
+        for index, petugas in enumerate(range(1, staff + 1))
+    }
+
+
+class QueueSimulation:
+    """
+    Satu hari layanan untuk satu kebijakan
+
+    Usage:
+        visits = generate_visits(random.Random(1), arrivals_per_hour=15)
+        result = QueueSimulation(staff_roster(4), "least_loaded").run(visits)
+    """
+
+    def __init__(self, roster, policy="least_loaded", poll_minutes=10.0, seed=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Kebijakan tidak dikenal: {policy}")
+        self.roster = roster
+        self.policy = policy
+        self.poll_minutes = poll_minutes
+        self.random = random.Random(seed)
+
+    def eligible(self, petugas, id_jenis):
+        return not self.roster[petugas] or id_jenis in self.roster[petugas]
+
+    def run(self, visits):
+        self.events = []
+        self.counter = itertools.count()
+        self.queues = {petugas: deque() for petugas in self.roster}
+        self.busy = dict.fromkeys(self.roster, False)
+        self.shared = []
+        self.waits = []
+        self.service_minutes = 0.0
+        self.unassigned = 0
+        self.last_finish = 0.0
+        self.board = LoadBoard()
+        for petugas, jenis in self.roster.items():
+            self.board.add(petugas, KANTOR, jenis)
+        self.rotation = itertools.cycle(sorted(self.roster))
+
+        for visit in visits:
+            self._schedule(visit[0], "arrival", visit)
+        if self.policy == "manual":
+            for petugas in self.roster:
+                self._schedule(self.random.uniform(0, self.poll_minutes), "poll", petugas)
+
+        close = len(HOURLY_PROFILE) * 60
+        while self.events:
+            now, _, kind, payload = heapq.heappop(self.events)
+            if kind == "arrival":
+                self._arrival(now, payload)
+            elif kind == "finish":
+                self._finish(now, payload)
+            elif kind == "poll":
+                if not self.busy[payload]:
+                    self._take_shared(now, payload)
+                # Tetap mengecek selama masih ada yang menunggu
+                if now < close or self.shared:
+                    self._schedule(now + self.poll_minutes, "poll", payload)
+
+        return self.summary(len(visits))
+
+    # ===== EVENT =====
+
+    def _schedule(self, minute, kind, payload):
+        heapq.heappush(self.events, (minute, next(self.counter), kind, payload))
+
+    def _arrival(self, now, visit):
+        _, id_jenis, _ = visit
+        if self.policy == "manual":
+            self.shared.append(visit)
+            return
+
+        if self.policy == "least_loaded":
+            petugas = self.board.pick(KANTOR, id_jenis)
+        else:
+            petugas = next(
+                (p for p in itertools.islice(self.rotation, len(self.roster)) if self.eligible(p, id_jenis)),
+                None,
+            )
+        if petugas is None:
+            self.unassigned += 1
+            return
+        self.queues[petugas].append(visit)
+        if not self.busy[petugas]:
+            self._start(now, petugas, self.queues[petugas].popleft())
+
+    def _finish(self, now, petugas):
+        self.busy[petugas] = False
+        self.last_finish = max(self.last_finish, now)
+        if self.policy == "least_loaded":
+            self.board.release(petugas)
+        if self.policy == "manual":
+            self._take_shared(now, petugas)
+        elif self.queues[petugas]:
+            self._start(now, petugas, self.queues[petugas].popleft())
+
+    def _take_shared(self, now, petugas):
+        for index, visit in enumerate(self.shared):
+            if self.eligible(petugas, visit[1]):
+                del self.shared[index]
+                self._start(now, petugas, visit)
+                return
+
+    def _start(self, now, petugas, visit):
+        arrival, _, duration = visit
+        self.busy[petugas] = True
+        self.waits.append(now - arrival)
+        self.service_minutes += duration
+        self._schedule(now + duration, "finish", petugas)
+
+    # ===== HASIL =====
+
+    def summary(self, total):
+        unassigned = self.unassigned + len(self.shared)
+        span = max(len(HOURLY_PROFILE) * 60, self.last_finish)
+        return {
+            "policy": self.policy,
+            "staff": len(self.roster),
+            "visits": total,
+            "served": len(self.waits),
+            "unassigned": unassigned,
+            "waits": self.waits,
+            "service_minutes": self.service_minutes,
+            "span_minutes": span,
+        }
+
+
+def run_scenarios(staff_levels, policies=POLICIES, days=20, arrivals_per_hour=15, specialist_ratio=0.5,
+                  poll_minutes=10.0, seed=None):
+    """
+    Semua kombinasi jumlah petugas x kebijakan, `days` hari per kombinasi
+    (hari ke-i memakai kedatangan yang sama untuk semua kombinasi)
+
+    Returns:
+        list[dict]: satu baris per (staff, policy), waktu dalam menit
+    """
+    base = random.Random(seed)
+    day_seeds = [base.randrange(2**32) for _ in range(days)]
+    day_visits = [generate_visits(random.Random(day_seed), arrivals_per_hour) for day_seed in day_seeds]
+
+    rows = []
+    for staff in staff_levels:
+        roster = staff_roster(staff, specialist_ratio)
+        for policy in policies:
+            waits, served, unassigned, busy, capacity = [], 0, 0, 0.0, 0.0
+            for day_seed, visits in zip(day_seeds, day_visits):
+                result = QueueSimulation(roster, policy, poll_minutes, seed=day_seed).run(visits)
+                waits.extend(result["waits"])
+                served += result["served"]
+                unassigned += result["unassigned"]
+                busy += result["service_minutes"]
+                capacity += staff * result["span_minutes"]
+            rows.append({
+                "staff": staff,
+                "policy": policy,
+                "visits_per_day": round(sum(len(v) for v in day_visits) / days, 1),
+                "served": served,
+                "unassigned": unassigned,
+                "wait_min": {
+                    "mean": round(statistics.mean(waits), 1) if waits else 0.0,
+                    "p50": round(percentile(waits, 50), 1),
+                    "p95": round(percentile(waits, 95), 1),
+                    "max": round(max(waits, default=0), 1),
+                },
+                "utilization": round(busy / capacity, 3) if capacity else 0.0,
+            })
+    return rows
+
+
+def pick_benchmark(sizes=(10, 100, 1_000, 10_000), picks=20_000, seed=None):
+    """
+    Biaya LoadBoard.pick + release per operasi untuk n petugas (harus naik
+    logaritmik, bukan linear)
+
+    Returns:
+        list[dict]: {"petugas", "us_per_pick"}
+    """
+    rnd = random.Random(seed)
+    jenis = list(DEFAULT_JENIS)
+    rows = []
+    for size in sizes:
+        board = LoadBoard()
+        for petugas, spesialis in staff_roster(size, 0.5).items():
+            board.add(petugas, KANTOR, spesialis, load=rnd.randint(0, 5))
+        open_visits = deque()
+        started = time.perf_counter()
+        for _ in range(picks):
+            open_visits.append(board.pick(KANTOR, rnd.choice(jenis)))
+            if len(open_visits) > size * 3:
+                board.release(open_visits.popleft())
+        elapsed = time.perf_counter() - started
+        rows.append({"petugas": size, "us_per_pick": round(elapsed * 1e6 / picks, 2)})
+    return rows
@@ -0,0 +1,347 @@
+"""
+Audit trail terstruktur (diff per field) untuk Kunjungan, Tamu, Petugas
+dan master data
+
+Berbeda dengan admin.LogEntry (hanya edit lewat admin, pesan teks bebas),
+setiap jalur tulis tercatat sebagai {field: [lama, baru]}:
+
+- save() / delete()      -> signal pre_save/post_save/post_delete
+                            (nilai lama dibaca dari database di pre_save,
+                            hanya untuk update; instance yang sekadar
+                            dimuat tidak di-snapshot)
+- queryset.update()      -> changefeed.update_queryset (admin action,
+                            bulk_complete_non_konsultasi) dan merge tamu
+                            memanggil record_update / record_changes
+
+Entry selalu ditulis di transaksi yang sama dengan perubahannya
+(rollback = entry ikut hilang, commit = entry pasti ada):
+
+- di dalam batch() - request yang mengubah data (AuditMiddleware) dan
+  jalur massal - entry dikumpulkan lalu ditulis satu bulk insert sebelum
+  transaksinya commit; entry dari savepoint yang di-rollback dibuang
+- di luar batch() (command, shell) entry langsung ditulis
+
+scope() - dipasang AuditMiddleware per request dan dipakai command -
+menentukan aktor (user login -> Petugas, dicari sekali per scope).
+
+Konfigurasi lewat settings.KONSULTASI_AUDIT:
+    ENABLED        - aktif/nonaktif (default: True)
+    EXCLUDE_FIELDS - field yang tidak dicatat (turunan / watermark)
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "EXCLUDE_FIELDS": ("updated_at", "email_normalized", "no_hp_normalized"),
+}
+
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_DELETE = "delete"
+
+# Nilai field yang tidak ikut dimuat (.only()/.defer())
+_MISSING = object()
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_AUDIT", {}))
+    return config
+
+
+class _State(threading.local):
+    def __init__(self):
+        self.depth = 0
+        self.pending = []
+        self.user = None
+        self.actors = {}
+
+
+_state = _State()
+_fields_cache = {}
+
+
+def audited_fields(model):
+    """[(nama field, attname)] field konkret yang dicatat"""
+    fields = _fields_cache.get(model)
+    if fields is None:
+        exclude = set(get_config()["EXCLUDE_FIELDS"])
+        fields = _fields_cache[model] = [
+            (field.name, field.attname)
+            for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in exclude
+        ]
+    return fields
+
+
+def audit_target(instance):
+    """
+    (model_label, object_pk) yang dicatat; konten pertanyaan/jawaban
+    dicatat sebagai bagian dari kunjungannya
+    """
+    meta = instance._meta
+    if meta.model_name == "kunjungankonten":
+        return "konsultasi.kunjungan", instance.kunjungan_id
+    return meta.label_lower, instance.pk
+
+
+# ===== SNAPSHOT & DIFF =====
+
+def snapshot(instance):
+    """
+    Simpan nilai field instance di memori sebagai nilai lama
+
+    Untuk jalur bulk_update: panggil sebelum instance diubah, lalu
+    record_many(..., ACTION_UPDATE).
+    """
+    values = instance.__dict__
+    instance._audit_initial = {
+        attname: values.get(attname, _MISSING) for _, attname in audited_fields(type(instance))
+    }
+
+
+def load_initial(instance, using=None, update_fields=None):
+    """
+    Nilai lama dari database sebelum save() update (signal pre_save)
+
+    Satu query per update, hanya kolom yang dicatat (dan hanya
+    update_fields jika diisi).
+    """
+    if not get_config()["ENABLED"] or instance._state.adding or instance.pk is None:
+        return
+    if hasattr(instance, "_audit_initial"):
+        # Sudah di-snapshot pemanggil (snapshot()): tanpa query lagi
+        return
+    attnames = [
+        attname for name, attname in audited_fields(type(instance))
+        if update_fields is None or name in update_fields or attname in update_fields
+    ]
+    row = None
+    if attnames:
+        row = type(instance)._base_manager.using(using).filter(pk=instance.pk).values(*attnames).first()
+    instance._audit_initial = row or {}
+
+
+def diff(instance, action):
+    """
+    Returns:
+        dict: {field: [lama, baru]} - create: semua field terisi,
+        delete: nilai terakhir, update: hanya yang berubah
+    """
+    initial = getattr(instance, "_audit_initial", {})
+    values = instance.__dict__
+    changes = {}
+    for name, attname in audited_fields(type(instance)):
+        new = values.get(attname, _MISSING)
+        if action == ACTION_CREATE:
+            if new is not _MISSING and new not in (None, ""):
+                changes[name] = [None, new]
+        elif action == ACTION_DELETE:
+            if new is not _MISSING and new not in (None, ""):
+                changes[name] = [new, None]
+        else:
+            old = initial.get(attname, _MISSING)
+            if old is not _MISSING and new is not _MISSING and old != new:
+                changes[name] = [old, new]
+    return changes
+
+
+# ===== CATAT =====
+
+def _entry(model_label, object_pk, action, changes, petugas=None):
+    from apps.konsultasi.models import AuditLog
+
+    return AuditLog(
+        model_label=model_label,
+        object_pk=object_pk,
+        action=action,
+        changes=changes,
+        id_petugas=petugas,
+        username=_current_username(),
+    )
+
+
+def _current_username():
+    # request.user lazy: session baru dibaca saat ada yang dicatat
+    user = _state.user
+    if user is None or not user.is_authenticated:
+        return ""
+    return user.get_username()
+
+
+def record(instance, action, using=None):
+    """Catat satu instance (dipanggil signal post_save / post_delete)"""
+    record_many([instance], action, using)
+
+
+def record_many(instances, action, using=None):
+    """Catat beberapa instance sekaligus (mis. setelah bulk_update)"""
+    if not get_config()["ENABLED"]:
+        return
+    entries = []
+    for instance in instances:
+        changes = diff(instance, action)
+        instance.__dict__.pop("_audit_initial", None)
+        model_label, object_pk = audit_target(instance)
+        if object_pk is None or (not changes and action == ACTION_UPDATE):
+            continue
+        entries.append(_entry(
+            model_label, object_pk, action, changes, getattr(instance, "id_petugas_id", None),
+        ))
+    if entries:
+        _add(entries, using)
+
+
+def record_changes(model, rows, action=ACTION_UPDATE, using=None):
+    """
+    Catat perubahan jalur queryset.update() / bulk_update
+
+    Args:
+        rows: iterable (pk, {field: [lama, baru]}, id_petugas | None)
+    """
+    if not get_config()["ENABLED"]:
+        return
+    label = model._meta.label_lower
+    entries = [_entry(label, pk, action, changes, petugas) for pk, changes, petugas in rows if changes]
+    if entries:
+        _add(entries, using)
+
+
+def record_update(model, old_rows, values, new_rows=None, using=None):
+    """
+    Diff untuk queryset.update(**values)
+
+    Args:
+        old_rows: dict hasil .values("pk", <attname field yang di-update>)
+                  sebelum update
+        values:   argumen update(); instance model dipakai pk-nya
+        new_rows: {pk: row} setelah update, wajib jika values berisi
+                  expression (F, Case, ...)
+    """
+    exclude = set(get_config()["EXCLUDE_FIELDS"])
+    fields = [
+        field for field in (model._meta.get_field(name) for name in values)
+        if field.name not in exclude
+    ]
+    rows = []
+    for old in old_rows:
+        pk = old["pk"]
+        if new_rows is not None:
+            new = {field.attname: new_rows[pk][field.attname] for field in fields}
+        else:
+            new = {field.attname: getattr(values[field.name], "pk", values[field.name]) for field in fields}
+        changes = {
+            field.name: [old[field.attname], new[field.attname]]
+            for field in fields if old[field.attname] != new[field.attname]
+        }
+        rows.append((pk, changes, new.get("id_petugas_id", old.get("id_petugas_id"))))
+    record_changes(model, rows, using=using)
+
+
+class _Pending:
+    """
+    Entry yang ditahan batch(), didaftarkan sebagai callback on_commit
+    kosong: Django membuang callback dari savepoint yang di-rollback, jadi
+    saat flush hanya entry yang callback-nya masih ada yang ditulis
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def __call__(self):
+        pass
+
+
+def _add(entries, using=None):
+    """Tulis sekarang (transaksi pemanggil) atau tahan sampai akhir batch()"""
+    if _state.depth:
+        pending = _Pending(entries)
+        transaction.on_commit(pending, using=using)
+        _state.pending.append(pending)
+    else:
+        _write(entries, using)
+
+
+# ===== TULIS =====
+
+def _actor(username, using=None):
+    """Petugas dengan username user login (di-cache per scope)"""
+    from apps.konsultasi.models import Petugas
+
+    if username not in _state.actors:
+        _state.actors[username] = (
+            Petugas.objects.using(using).filter(username=username).values_list("pk", flat=True).first()
+        )
+    return _state.actors[username]
+
+
+def _write(entries, using=None):
+    from apps.konsultasi.models import AuditLog
+
+    if not entries:
+        return
+
+    for entry in entries:
+        # Aktor request (user login) -> Petugas dengan username yang sama
+        actor = _actor(entry.username, using) if entry.username else None
+        if actor is not None:
+            entry.id_petugas = actor
+    AuditLog.objects.using(using).bulk_create(entries, batch_size=500)
+
+
+@contextmanager
+def batch(using=None):
+    """
+    Satu transaksi; entry di dalamnya ditulis sekali bulk insert sebelum
+    commit (rollback / exception = entry dibuang, termasuk entry dari
+    savepoint yang di-rollback di dalam batch)
+
+    Usage:
+        with audit.batch():
+            Tamu.objects.filter(pk__in=duplicates).delete()
+    """
+    with transaction.atomic(using=using):
+        _state.depth += 1
+        try:
+            yield
+        except BaseException:
+            if _state.depth == 1:
+                _state.pending = []
+            raise
+        finally:
+            _state.depth -= 1
+        if not _state.depth:
+            pending, _state.pending = _state.pending, []
+            if pending:
+                _write(_surviving(pending, using), using)
+
+
+def _surviving(pending, using=None):
+    """Entry yang callback on_commit-nya tidak ikut dibuang rollback savepoint"""
+    alive = {id(func) for _, func, _ in connections[using or DEFAULT_DB_ALIAS].run_on_commit}
+    return [entry for item in pending if id(item) in alive for entry in item.entries]
+
+
+@contextmanager
+def scope(user=None):
+    """
+    Aktor entry audit (per request / per command)
+
+    Usage:
+        with audit.scope(user=request.user):
+            ...
+    """
+    outer_user, outer_actors = _state.user, _state.actors
+    if user is not None:
+        _state.user = user
+        _state.actors = {}
+    try:
+        yield
+    finally:
+        _state.user, _state.actors = outer_user, outer_actors
@@ -0,0 +1,520 @@
+"""
+Benchmark suite untuk managers, services, registrasi, export & admin
+
+Setiap benchmark didaftarkan dengan decorator @benchmark("grup.nama")
+dan dijalankan oleh command `benchmark_konsultasi`. Hasil berupa JSON
+supaya bisa dibandingkan antar commit (--compare).
+
+Benchmark yang menulis data dijalankan di dalam transaksi yang
+di-rollback, jadi database tidak berubah.
+"""
+
+import statistics
+import subprocess
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+REGISTRY = {}
+
+
+def benchmark(name, repeat=None):
+    """
+    Daftarkan fungsi benchmark
+
+    Usage:
+        @benchmark("managers.today")
+        def bench_today(ctx):
+            list(Kunjungan.objects.today()[:50])
+    """
+    def decorator(func):
+        REGISTRY[name] = {"func": func, "repeat": repeat}
+        return func
+    return decorator
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    """execute_wrapper penghitung query (tanpa batas log seperti connection.queries)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class BenchmarkContext:
+    """Data bersama antar benchmark (dihitung sekali sebelum run)"""
+
+    def __init__(self):
+        from apps.konsultasi.models import Kunjungan, Petugas, KategoriLayanan
+
+        latest = Kunjungan.objects.order_by("-tanggal_kunjungan").values_list(
+            "tanggal_kunjungan", flat=True
+        ).first()
+        self.latest_date = latest or timezone.localdate()
+        self.petugas_id = Petugas.objects.values_list("id_petugas", flat=True).first()
+        self.kategori_id = KategoriLayanan.objects.values_list("id_kategori", flat=True).first()
+        self.sample = Kunjungan.objects.values(
+            "id_tamu_id", "id_tipe_id", "id_kategori_id", "id_jenis_id"
+        ).filter(id_kategori__nama_kategori__icontains="pendaftaran").first()
+
+
+class BenchmarkRunner:
+    """
+    Jalankan benchmark dan kumpulkan hasil dalam bentuk dict/JSON
+
+    Usage:
+        runner = BenchmarkRunner(repeat=5)
+        result = runner.run(only=["managers."])
+    """
+
+    def __init__(self, repeat=5, warmup=1):
+        self.repeat = repeat
+        self.warmup = warmup
+
+    def run(self, only=None):
+        ctx = BenchmarkContext()
+        results = {}
+
+        for name in sorted(REGISTRY):
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = self.run_one(name, ctx)
+
+        return {"meta": self.meta(), "results": results}
+
+    def run_one(self, name, ctx):
+        entry = REGISTRY[name]
+        repeat = entry["repeat"] or self.repeat
+        timings = []
+        queries = 0
+
+        for i in range(self.warmup + repeat):
+            counter = _QueryCounter()
+            try:
+                with transaction.atomic(), connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    extra = entry["func"](ctx)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    raise _Rollback
+            except _Rollback:
+                pass
+            if i >= self.warmup:
+                timings.append(elapsed)
+                queries = counter.count
+
+        result = {
+            "min_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": queries,
+            "repeat": repeat,
+        }
+        if isinstance(extra, dict):
+            result.update(extra)
+        return result
+
+    def meta(self):
+        from apps.konsultasi.models import Kunjungan, Tamu, Petugas
+
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ""
+
+        return {
+            "commit": commit,
+            "timestamp": timezone.now().isoformat(),
+            "vendor": connection.vendor,
+            "rows": {
+                "kunjungan": Kunjungan.objects.count(),
+                "tamu": Tamu.objects.count(),
+                "petugas": Petugas.objects.count(),
+            },
+        }
+
+
+def compare(current, baseline):
+    """
+    Bandingkan dua hasil benchmark (median_ms)
+
+    Returns:
+        list: (nama, baseline_ms, current_ms, rasio)
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 0
+        rows.append((name, before["median_ms"], result["median_ms"], round(ratio, 2)))
+    return rows
+
+
+# ===== MANAGERS =====
+
+def _page_and_count(queryset):
+    """Pola umum list view: satu halaman + total"""
+    list(queryset[:50])
+    queryset.count()
+
+
+@benchmark("managers.pending")
+def bench_pending(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.pending())
+
+
+@benchmark("managers.completed")
+def bench_completed(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.completed())
+
+
+@benchmark("managers.today")
+def bench_today(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.today())
+
+
+@benchmark("managers.this_week")
+def bench_this_week(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.this_week())
+
+
+@benchmark("managers.this_month")
+def bench_this_month(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.this_month())
+
+
+@benchmark("managers.by_month")
+def bench_by_month(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.by_month(ctx.latest_date.year, ctx.latest_date.month))
+
+
+# Filter lama (__year/__month -> fungsi extract di kolom) sebagai pembanding
+# range [start, end) dari periods.py
+
+@benchmark("managers.by_month_extract")
+def bench_by_month_extract(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.filter(
+        tanggal_kunjungan__year=ctx.latest_date.year,
+        tanggal_kunjungan__month=ctx.latest_date.month,
+    ))
+
+
+@benchmark("managers.this_month_extract")
+def bench_this_month_extract(ctx):
+    from apps.konsultasi.models import Kunjungan
+    now = timezone.now()
+    _page_and_count(Kunjungan.objects.filter(
+        tanggal_kunjungan__year=now.year,
+        tanggal_kunjungan__month=now.month,
+    ))
+
+
+@benchmark("managers.by_date_range")
+def bench_by_date_range(ctx):
+    from apps.konsultasi.models import Kunjungan
+    start = date(ctx.latest_date.year, 1, 1)
+    _page_and_count(Kunjungan.objects.by_date_range(start, ctx.latest_date))
+
+
+@benchmark("managers.konsultasi")
+def bench_konsultasi(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.konsultasi())
+
+
+@benchmark("managers.pendaftaran")
+def bench_pendaftaran(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.pendaftaran())
+
+
+@benchmark("managers.informasi")
+def bench_informasi(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.informasi())
+
+
+@benchmark("managers.offline")
+def bench_offline(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.offline())
+
+
+@benchmark("managers.online")
+def bench_online(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.online())
+
+
+@benchmark("managers.by_kategori")
+def bench_by_kategori(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.by_kategori(ctx.kategori_id))
+
+
+@benchmark("managers.by_petugas")
+def bench_by_petugas(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.by_petugas(ctx.petugas_id))
+
+
+@benchmark("managers.unassigned")
+def bench_unassigned(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.unassigned())
+
+
+@benchmark("managers.search")
+def bench_search(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.search("budi"))
+
+
+@benchmark("managers.for_list_display")
+def bench_for_list_display(ctx):
+    from apps.konsultasi.models import Kunjungan
+    _page_and_count(Kunjungan.objects.for_list_display())
+
+
+@benchmark("managers.tamu_with_kunjungan_count")
+def bench_tamu_with_count(ctx):
+    from apps.konsultasi.models import Tamu
+    list(Tamu.objects.with_kunjungan_count().order_by("-id_tamu")[:50])
+
+
+@benchmark("managers.petugas_with_stats")
+def bench_petugas_with_stats(ctx):
+    from apps.konsultasi.models import Petugas
+    list(Petugas.objects.active().with_stats())
+
+
+# ===== SERVICES =====
+
+@benchmark("services.dashboard_stats")
+def bench_dashboard_stats(ctx):
+    from apps.konsultasi.services import KunjunganStatistics
+    KunjunganStatistics().get_dashboard_stats()
+
+
+@benchmark("services.konsultasi_stats")
+def bench_konsultasi_stats(ctx):
+    from apps.konsultasi.services import KunjunganStatistics
+    KunjunganStatistics().get_konsultasi_stats()
+
+
+@benchmark("services.petugas_workload")
+def bench_petugas_workload(ctx):
+    from apps.konsultasi.services import KunjunganStatistics
+    KunjunganStatistics().get_petugas_workload()
+
+
+@benchmark("services.daily_report")
+def bench_daily_report(ctx):
+    from apps.konsultasi.services import KunjunganReports
+    KunjunganReports().daily_report(ctx.latest_date)
+
+
+@benchmark("services.monthly_report")
+def bench_monthly_report(ctx):
+    from apps.konsultasi.services import KunjunganReports
+    KunjunganReports().monthly_report(ctx.latest_date.year, ctx.latest_date.month)
+
+
+# ===== REGISTRASI =====
+
+REGISTRATION_BATCH = 200
+
+
+@benchmark("registration.save_throughput", repeat=3)
+def bench_registration(ctx):
+    """Registrasi lewat Kunjungan.save() (nomor + validasi), di-rollback"""
+    from apps.konsultasi.models import Kunjungan
+
+    if not ctx.sample:
+        return {"skipped": True}
+
+    started = time.perf_counter()
+    for _ in range(REGISTRATION_BATCH):
+        Kunjungan(tanggal_kunjungan=ctx.latest_date, **ctx.sample).save()
+    elapsed = time.perf_counter() - started
+    return {"per_second": round(REGISTRATION_BATCH / elapsed, 1)}
+
+
+@benchmark("registration.reserve_nomor")
+def bench_reserve_nomor(ctx):
+    """Query penomoran saja (nomor terakhir di bulan berjalan)"""
+    from apps.konsultasi.models import Kunjungan
+    for _ in range(REGISTRATION_BATCH):
+        Kunjungan.reserve_nomor(ctx.latest_date)
+
+
+@benchmark("registration.assignment_pick")
+def bench_assignment_pick(ctx):
+    """Bangun papan beban petugas (3 query) lalu pick + release tanpa query"""
+    from apps.konsultasi.services.assignment import build_board
+
+    started = time.perf_counter()
+    board = build_board(ctx.latest_date)
+    built = time.perf_counter() - started
+    for _ in range(REGISTRATION_BATCH):
+        petugas = board.pick(1, jenis=3)
+        if petugas is not None:
+            board.release(petugas)
+    return {"petugas": len(board), "build_ms": round(built * 1000, 2)}
+
+
+@benchmark("registration.lookup_returning")
+def bench_lookup_returning(ctx):
+    """Lookup tamu lama per no HP / email tanpa cache (point query di index)"""
+    from apps.konsultasi.managers import returning_cache
+    from apps.konsultasi.models import Tamu
+
+    contacts = [
+        email or no_hp
+        for email, no_hp in Tamu.objects.exclude(no_hp="").order_by("-id_tamu")
+        .values_list("email", "no_hp")[:REGISTRATION_BATCH]
+    ]
+    started = time.perf_counter()
+    for contact in contacts:
+        returning_cache.clear()
+        Tamu.objects.lookup_returning(contact)
+    elapsed = time.perf_counter() - started
+    return {"lookups": len(contacts), "ms_each": round(elapsed * 1000 / max(len(contacts), 1), 3)}
+
+
+# ===== PERTANYAAN SERUPA =====
+
+ANSWER_QUERIES = [
+    "lupa password akun spse",
+    "dokumen penawaran tidak bisa diunggah",
+    "cara menambah produk katalog elektronik",
+    "akun penyedia terblokir",
+]
+
+
+def _answer_index(ctx):
+    """Index BM25 di memori (dibangun sekali, tanpa menyentuh file index)"""
+    from apps.konsultasi.services.answers import AnswerIndex, index_queryset
+
+    if getattr(ctx, "answer_index", None) is None:
+        index = AnswerIndex(settings.BASE_DIR / "var" / "answer_index_benchmark")
+        for row in index_queryset().iterator(chunk_size=2000):
+            index.add(*row)
+        ctx.answer_index = index
+    return ctx.answer_index
+
+
+@benchmark("answers.search")
+def bench_answer_search(ctx):
+    """Skor BM25 + top-10 untuk beberapa pertanyaan (tanpa query DB)"""
+    index = _answer_index(ctx)
+    for text in ANSWER_QUERIES:
+        index.search(text, k=10)
+    return {"docs": len(index), "terms": len(index.postings)}
+
+
+@benchmark("answers.search_filtered")
+def bench_answer_search_filtered(ctx):
+    index = _answer_index(ctx)
+    for text in ANSWER_QUERIES:
+        index.search(text, k=10, id_jenis=3, id_sumber=2)
+
+
+# ===== EXPORT =====
+
+@benchmark("export.csv_data_month")
+def bench_export_csv_data(ctx):
+    from apps.konsultasi.models import Kunjungan
+    from apps.konsultasi.services import KunjunganReports
+
+    queryset = Kunjungan.objects.by_month(ctx.latest_date.year, ctx.latest_date.month)
+    rows = KunjunganReports().export_to_csv_data(queryset)
+    return {"rows": len(rows)}
+
+
+@benchmark("export.csv_stream_month")
+def bench_export_csv_stream(ctx):
+    """Export bulan terakhir lewat stream_csv (iterator per chunk, server-side cursor di PostgreSQL)"""
+    from apps.konsultasi.models import Kunjungan
+    from apps.konsultasi.services import KunjunganReports
+
+    queryset = Kunjungan.objects.by_month(ctx.latest_date.year, ctx.latest_date.month)
+    size = sum(len(line) for line in KunjunganReports().stream_csv(queryset))
+    return {"bytes": size}
+
+
+@benchmark("export.admin_csv_month")
+def bench_export_admin(ctx):
+    from django.contrib import admin
+    from django.test import RequestFactory
+    from apps.konsultasi.models import Kunjungan
+
+    model_admin = admin.site._registry[Kunjungan]
+    request = RequestFactory().get("/admin/konsultasi/kunjungan/")
+    queryset = model_admin.get_queryset(request).by_month(
+        ctx.latest_date.year, ctx.latest_date.month
+    )
+    response = model_admin.export_laporan(request, queryset)
+    return {"bytes": sum(len(chunk) for chunk in response.streaming_content)}
+
+
+# ===== ADMIN =====
+
+def _admin_client():
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    user = get_user_model().objects.create_superuser(
+        "benchmark", "benchmark@example.com", "benchmark"
+    )
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+@benchmark("admin.kunjungan_changelist")
+def bench_admin_changelist(ctx):
+    client = _admin_client()
+    started = time.perf_counter()
+    response = client.get("/admin/konsultasi/kunjungan/", HTTP_HOST="localhost")
+    return {
+        "status": response.status_code,
+        "render_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@benchmark("admin.kunjungan_changelist_pending")
+def bench_admin_changelist_pending(ctx):
+    client = _admin_client()
+    response = client.get(
+        "/admin/konsultasi/kunjungan/?status_selesai__exact=0", HTTP_HOST="localhost"
+    )
+    return {"status": response.status_code}
+
+
+@benchmark("admin.tamu_changelist")
+def bench_admin_tamu_changelist(ctx):
+    client = _admin_client()
+    response = client.get("/admin/konsultasi/tamu/", HTTP_HOST="localhost")
+    return {"status": response.status_code}
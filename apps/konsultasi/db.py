@@ -0,0 +1,148 @@
+"""
+Kelas beban kerja database (PostgreSQL): batas waktu query per pekerjaan
+
+Request web memakai statement_timeout sesi (DB_STATEMENT_TIMEOUT_MS,
+config/database.py) supaya satu query lambat tidak menahan worker &
+koneksi pool. Pekerjaan yang memang panjang menaikkan batasnya hanya
+untuk satu transaksi:
+
+    with db.workload("export"):
+        for row in queryset.iterator(chunk_size=2000):
+            ...
+
+- PostgreSQL: transaction.atomic() + SET LOCAL statement_timeout. Di dalam
+  transaksi iterator() memakai server-side cursor biasa (tanpa WITH HOLD
+  yang mematerialisasi seluruh hasil saat autocommit), dan timeout berlaku
+  per FETCH chunk, bukan untuk seluruh export.
+- Vendor lain: tidak melakukan apa-apa (SQLite tidak punya statement
+  timeout; transaksi baca panjang malah menahan penulis).
+
+Konfigurasi lewat settings.KONSULTASI_DB:
+    STATEMENT_TIMEOUT_MS - {workload: ms}; 0 = tanpa batas
+"""
+
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import BigIntegerField, Func
+
+
+DEFAULTS = {
+    "STATEMENT_TIMEOUT_MS": {
+        "report": 60_000,
+        "export": 120_000,
+        "maintenance": 0,
+    },
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_DB", {}))
+    return config
+
+
+def statement_timeout(name):
+    """Batas waktu workload dalam ms (ValueError jika nama tidak dikenal)"""
+    timeouts = get_config()["STATEMENT_TIMEOUT_MS"]
+    if name not in timeouts:
+        raise ValueError(f"Workload tidak dikenal: {name}")
+    return int(timeouts[name])
+
+
+@contextmanager
+def workload(name, using=DEFAULT_DB_ALIAS):
+    """
+    Jalankan blok sebagai workload `name` (report / export / maintenance)
+
+    Usage:
+        with db.workload("report"):
+            data = KunjunganReports().monthly_report(2025, 12)
+    """
+    timeout = statement_timeout(name)
+    conn = connections[using]
+    if conn.vendor != "postgresql":
+        yield
+        return
+
+    with transaction.atomic(using=using):
+        with conn.cursor() as cursor:
+            # SET LOCAL tidak menerima parameter bind
+            cursor.execute(f"SET LOCAL statement_timeout = {timeout}")
+        yield
+
+
+class CurrentTransactionId(Func):
+    """
+    ID transaksi top-level (pg_current_xact_id) sebagai bigint, untuk
+    db_default; NULL di database lain
+
+    Urutan commit change feed (services/changefeed.py) dibandingkan dengan
+    transaction_horizon().
+    """
+    template = "NULL"
+    output_field = BigIntegerField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return "pg_current_xact_id()::text::bigint", []
+
+
+@contextmanager
+def read_snapshot(using=DEFAULT_DB_ALIAS):
+    """
+    Semua query di dalam blok membaca snapshot database yang sama
+    (backup multi-tabel: FK antar tabel tetap konsisten)
+
+    - PostgreSQL: transaksi REPEATABLE READ, READ ONLY (hanya jika blok ini
+      transaksi terluar; di dalam atomic() lain snapshot mengikuti transaksi
+      pemanggil)
+    - SQLite: satu transaksi; penulis menunggu sampai blok selesai
+
+    Usage:
+        with db.read_snapshot(), db.workload("maintenance"):
+            for label in BACKUP_MODELS:
+                ...
+    """
+    conn = connections[using]
+    outermost = not conn.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and conn.vendor == "postgresql":
+            with conn.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        yield
+
+
+def transaction_horizon(using=DEFAULT_DB_ALIAS):
+    """
+    ID transaksi tertua yang masih berjalan (pg_snapshot_xmin): semua
+    transaksi dengan ID lebih kecil sudah commit atau rollback
+
+    Returns:
+        int | None: None jika bukan PostgreSQL (SQLite: satu writer,
+        urutan id = urutan commit)
+    """
+    conn = connections[using]
+    if conn.vendor != "postgresql":
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def describe(using=DEFAULT_DB_ALIAS):
+    """Ringkasan konfigurasi koneksi efektif (command db_profile)"""
+    conn = connections[using]
+    options = conn.settings_dict.get("OPTIONS", {})
+    return {
+        "alias": using,
+        "vendor": conn.vendor,
+        "pool": options.get("pool") or None,
+        "conn_max_age": conn.settings_dict.get("CONN_MAX_AGE"),
+        "conn_health_checks": conn.settings_dict.get("CONN_HEALTH_CHECKS"),
+        "server_side_cursors": (
+            conn.vendor == "postgresql" and not conn.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS")
+        ),
+        "session_options": options.get("options", ""),
+        "statement_timeout_ms": get_config()["STATEMENT_TIMEOUT_MS"],
+    }
@@ -0,0 +1,306 @@
+"""
+Klien kiosk offline (referensi protokol & simulasi)
+
+Kiosk menyimpan registrasi di antrian SQLite lokal (hanya stdlib; Django
+cukup untuk DjangoClientTransport) dengan UUID buatan kiosk, lalu mengirimnya per batch ke
+/api/kiosk/sync/ saat online (lihat services/kiosk_sync.py):
+
+- Koneksi putus sebelum / sesudah server menyimpan batch -> antrian
+  tetap, batch dikirim ulang; server membalas "duplicate" dengan nomor
+  yang sama, jadi tidak ada registrasi ganda
+- Hasil per item (nomor_kunjungan / error validasi) disimpan di antrian
+- Master data dari balasan sync disimpan lokal, dipakai form kiosk saat
+  offline; hanya dikirim server jika versi kiosk usang
+
+Transport = callable(body gzip, headers) -> (status HTTP, dict):
+    DjangoClientTransport - in-process (test, command simulate_kiosk)
+    HttpTransport         - urllib ke server sungguhan
+    FlakyTransport        - membungkus transport lain, memutus koneksi acak
+
+Usage:
+    queue = KioskQueue("/var/lib/kiosk/antrian.sqlite3")
+    client = KioskClient(queue, HttpTransport("https://.../api/kiosk/sync/"), token="...")
+    client.register(nama="Budi", no_hp="0812...", id_tipe=1, id_kategori=2, id_jenis=3, pertanyaan="...")
+    client.sync()
+"""
+
+import gzip
+import json
+import random
+import sqlite3
+import urllib.error
+import urllib.request
+import uuid
+from datetime import date
+
+
+STATUS_PENDING = "pending"
+
+# Status HTTP yang berarti "coba lagi nanti" (antrian tidak diubah)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS antrian (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_uuid TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    id_kunjungan INTEGER,
+    nomor_kunjungan TEXT,
+    errors TEXT
+);
+CREATE INDEX IF NOT EXISTS antrian_status ON antrian (status, seq);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class KioskSyncError(Exception):
+    """Server menolak batch (bukan gangguan jaringan) - perlu dicek operator"""
+
+    def __init__(self, status, payload):
+        super().__init__(f"Sync ditolak server ({status}): {payload}")
+        self.status = status
+        self.payload = payload
+
+
+# ===== ANTRIAN LOKAL =====
+
+class KioskQueue:
+    """Antrian registrasi kiosk di SQLite lokal (bertahan saat kiosk restart)"""
+
+    def __init__(self, path=":memory:"):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def add(self, data):
+        """Simpan registrasi; returns client_uuid"""
+        data = dict(data)
+        data.setdefault("client_uuid", str(uuid.uuid4()))
+        data.setdefault("tanggal", date.today().isoformat())
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO antrian (client_uuid, data) VALUES (?, ?)",
+                (data["client_uuid"], json.dumps(data, default=str)),
+            )
+        return data["client_uuid"]
+
+    def pending(self, limit):
+        """Registrasi yang belum tersinkron, urut waktu input"""
+        rows = self.conn.execute(
+            "SELECT data FROM antrian WHERE status = ? ORDER BY seq LIMIT ?", (STATUS_PENDING, limit),
+        )
+        return [json.loads(data) for data, in rows]
+
+    def pending_count(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM antrian WHERE status = ?", (STATUS_PENDING,),
+        ).fetchone()[0]
+
+    def apply_results(self, results):
+        """Simpan hasil server per item (created / duplicate / invalid)"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE antrian SET status = ?, id_kunjungan = ?, nomor_kunjungan = ?, errors = ? "
+                "WHERE client_uuid = ?",
+                [
+                    (
+                        result["status"], result.get("id_kunjungan"), result.get("nomor_kunjungan"),
+                        json.dumps(result["errors"]) if result.get("errors") else None,
+                        result["client_uuid"],
+                    )
+                    for result in results
+                ],
+            )
+
+    def result(self, client_uuid):
+        """Status & nomor satu registrasi (untuk cetak tiket)"""
+        row = self.conn.execute(
+            "SELECT status, id_kunjungan, nomor_kunjungan, errors FROM antrian WHERE client_uuid = ?",
+            (client_uuid,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, id_kunjungan, nomor, errors = row
+        return {
+            "status": status, "id_kunjungan": id_kunjungan, "nomor_kunjungan": nomor,
+            "errors": json.loads(errors) if errors else None,
+        }
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+# ===== TRANSPORT =====
+
+def encode_body(payload):
+    """Payload sync -> body gzip JSON"""
+    return gzip.compress(json.dumps(payload, separators=(",", ":"), default=str).encode())
+
+
+def _decode_response(content, content_encoding):
+    if content_encoding == "gzip":
+        content = gzip.decompress(content)
+    try:
+        return json.loads(content)
+    except ValueError:
+        # 403 / 405 dsb. berupa teks biasa
+        return {"detail": content.decode(errors="replace")}
+
+
+class DjangoClientTransport:
+    """Kirim lewat django.test.Client (tanpa server HTTP)"""
+
+    def __init__(self, client=None, path="/api/kiosk/sync/"):
+        from django.test import Client
+
+        self.client = client or Client(SERVER_NAME="localhost")
+        self.path = path
+
+    def __call__(self, body, headers):
+        response = self.client.post(self.path, data=body, content_type="application/json", headers=headers)
+        return response.status_code, _decode_response(response.content, response.get("Content-Encoding"))
+
+
+class HttpTransport:
+    """Kirim lewat urllib (server sungguhan)"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, body, headers):
+        request = urllib.request.Request(
+            self.url, data=body, method="POST",
+            headers={"Content-Type": "application/json", **headers},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, _decode_response(
+                    response.read(), response.headers.get("Content-Encoding"),
+                )
+        except urllib.error.HTTPError as exc:
+            # HTTPError juga OSError: balasan error server, bukan jaringan putus
+            return exc.code, _decode_response(exc.read(), exc.headers.get("Content-Encoding"))
+
+
+class FlakyTransport:
+    """
+    Simulasi jaringan kiosk: koneksi putus acak sebelum request sampai
+    atau setelah server selesai (balasan hilang)
+    """
+
+    def __init__(self, transport, drop_rate=0.2, seed=None):
+        self.transport = transport
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.dropped = 0
+
+    def __call__(self, body, headers):
+        if self.random.random() < self.drop_rate / 2:
+            self.dropped += 1
+            raise ConnectionError("Koneksi putus sebelum request terkirim")
+        response = self.transport(body, headers)
+        if self.random.random() < self.drop_rate / 2:
+            self.dropped += 1
+            raise ConnectionError("Koneksi putus sebelum balasan diterima")
+        return response
+
+
+# ===== KLIEN =====
+
+class KioskClient:
+    """
+    Registrasi offline + sync batch
+
+    Usage:
+        client = KioskClient(KioskQueue(), DjangoClientTransport(), token="rahasia-lobby")
+        client.register(nama="Budi", ...)
+        stats = client.sync()
+    """
+
+    def __init__(self, queue, transport, token, batch_size=200):
+        self.queue = queue
+        self.transport = transport
+        self.token = token
+        self.batch_size = batch_size
+
+    @property
+    def master(self):
+        """Master data terakhir dari server (None sebelum sync pertama)"""
+        return self.queue.get_meta("master")
+
+    def register(self, **data):
+        """Registrasi tamu di kiosk (selalu berhasil, offline sekalipun); returns client_uuid"""
+        return self.queue.add(data)
+
+    def sync(self, max_round_trips=None):
+        """
+        Kirim antrian per batch sampai kosong atau koneksi putus
+
+        Returns:
+            dict: round_trips, created, duplicate, invalid, offline (True jika
+            berhenti karena jaringan / server sibuk; sisa antrian tetap)
+        """
+        stats = {"round_trips": 0, "created": 0, "duplicate": 0, "invalid": 0, "offline": False}
+        # Tanpa antrian pun tetap satu round trip: ambil master data terbaru
+        while max_round_trips is None or stats["round_trips"] < max_round_trips:
+            batch = self.queue.pending(self.batch_size)
+            body = encode_body({
+                "master_version": self.queue.get_meta("master_version"),
+                "registrations": batch,
+            })
+            stats["round_trips"] += 1
+            try:
+                status, payload = self.transport(body, {
+                    "X-Kiosk-Token": self.token,
+                    "Content-Encoding": "gzip",
+                    "Accept-Encoding": "gzip",
+                })
+            except OSError:
+                stats["offline"] = True
+                break
+            if status in RETRY_STATUSES:
+                stats["offline"] = True
+                break
+            if status != 200:
+                raise KioskSyncError(status, payload)
+
+            self.queue.apply_results(payload["results"])
+            for result in payload["results"]:
+                stats[result["status"]] += 1
+            master = payload["master"]
+            if master["data"] is not None:
+                self.queue.set_meta("master", master["data"])
+                self.queue.set_meta("master_version", master["version"])
+            if len(batch) < self.batch_size:
+                break
+        return stats
+
+
+def random_registration(master, rnd, today=None, max_backdate_days=0):
+    """Registrasi acak dari master data kiosk (simulasi)"""
+    kategori = rnd.choice([item for item in master["kategori"] if item["jenis"]])
+    tanggal = today or date.today()
+    if max_backdate_days:
+        tanggal = date.fromordinal(tanggal.toordinal() - rnd.randint(0, max_backdate_days))
+    phone = f"08{rnd.randint(10**9, 10**10 - 1)}"
+    return {
+        "tanggal": tanggal.isoformat(),
+        "nama": f"Tamu Kiosk {phone[-4:]}",
+        "no_hp": phone,
+        "instansi_perusahaan": rnd.choice(["CV Maju", "PT Sentosa", "Dinas PU", ""]),
+        "id_tipe": rnd.choice(master["tipe"])["id"],
+        "id_kategori": kategori["id"],
+        "id_jenis": rnd.choice(kategori["jenis"])["id"],
+        "pertanyaan": "Bagaimana cara mendaftar akun penyedia?",
+    }
@@ -0,0 +1,366 @@
+"""
+Uji beban registrasi kunjungan (penomoran nomor_kunjungan)
+
+N registrasi serentak lewat Kunjungan.save() dari beberapa thread atau
+proses, lalu dicek:
+- Throughput & latency (p50/p95/p99)
+- Waktu tunggu lock (UPDATE baris nomor_sequence (kantor, bulan); di
+  SQLite: statement itu menunggu write lock database)
+- Nomor duplikat / terlewat per (kantor, bulan)
+- Retry karena IntegrityError / database locked
+
+Skenario tanggal:
+    today          - semua registrasi di tanggal hari ini
+    month-boundary - selang-seling tanggal terakhir bulan & tanggal 1 bulan berikutnya
+    backdate       - campuran hari ini & tanggal mundur di bulan-bulan sebelumnya
+
+Dengan kantor > 1 worker dibagi ke beberapa kantor: tiap kantor punya
+sequence sendiri, jadi di PostgreSQL lock wait tidak naik dengan jumlah
+kantor (SQLite tetap satu writer untuk seluruh database).
+
+Dipakai command `loadtest_registrasi`.
+"""
+
+import calendar
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.db import IntegrityError, OperationalError, connection, connections, transaction
+from django.utils import timezone
+
+from apps.konsultasi import periods
+
+
+SCENARIOS = ("today", "month-boundary", "backdate")
+
+# Worker mulai serentak setelah jeda ini (detik), supaya semua siap dulu
+START_DELAY = 1.0
+
+
+def scenario_dates(scenario, today=None, seed=None):
+    """Daftar tanggal yang digilir oleh registrasi"""
+    today = today or timezone.localdate()
+
+    if scenario == "today":
+        return [today]
+
+    if scenario == "month-boundary":
+        last_day = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+        return [last_day, last_day + timedelta(days=1)]
+
+    if scenario == "backdate":
+        rnd = random.Random(seed)
+        dates = [today] * 4
+        for months_back in range(1, 4):
+            year, month = today.year, today.month - months_back
+            while month < 1:
+                year, month = year - 1, month + 12
+            day = rnd.randint(1, calendar.monthrange(year, month)[1])
+            dates.append(date(year, month, day))
+        return dates
+
+    raise ValueError(f"Skenario tidak dikenal: {scenario}")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class _LockTimer:
+    """execute_wrapper: total waktu query yang menunggu lock penomoran"""
+
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if self._is_lock_statement(sql):
+                self.seconds += time.perf_counter() - started
+
+    def _is_lock_statement(self, sql):
+        # Lock penomoran = UPDATE / INSERT baris nomor_sequence (PostgreSQL:
+        # row lock; SQLite: write lock database). Dengan transaction_mode
+        # IMMEDIATE tunggu SQLite pindah ke BEGIN (tidak lewat
+        # execute_wrapper) dan hanya terlihat di latency.
+        return sql.startswith(('UPDATE "nomor_sequence"', 'INSERT INTO "nomor_sequence"'))
+
+
+def _register_batch(task):
+    """
+    Worker (thread atau proses): registrasi `count` kunjungan
+
+    Returns:
+        list[dict]: satu hasil per registrasi
+    """
+    from apps.konsultasi.models import Kunjungan
+
+    delay = task["start_at"] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+    timer = _LockTimer(connection.vendor)
+    results = []
+    try:
+        with connection.execute_wrapper(timer):
+            for i in range(task["count"]):
+                tanggal = task["dates"][(task["offset"] + i) % len(task["dates"])]
+                results.append(_register_one(Kunjungan, task, tanggal, timer))
+    finally:
+        connection.close()
+    return results
+
+
+def _register_one(Kunjungan, task, tanggal, timer):
+    retries = Counter()
+    lock_before = timer.seconds
+    started = time.perf_counter()
+
+    while True:
+        kunjungan = Kunjungan(tanggal_kunjungan=tanggal, pertanyaan="Load test", **task["sample"])
+        try:
+            kunjungan.save()
+            error = None
+            break
+        except IntegrityError:
+            retries["integrity"] += 1
+        except OperationalError as exc:
+            # SQLite: "database is locked" setelah busy timeout
+            if "locked" not in str(exc):
+                raise
+            retries["locked"] += 1
+        if sum(retries.values()) > task["max_retries"]:
+            error = "max_retries"
+            kunjungan = None
+            break
+        time.sleep(random.uniform(0, 0.01) * sum(retries.values()))
+
+    return {
+        "pk": kunjungan.pk if kunjungan else None,
+        "nomor": kunjungan.nomor_kunjungan if kunjungan else None,
+        "tanggal": tanggal,
+        "latency": time.perf_counter() - started,
+        "lock_wait": timer.seconds - lock_before,
+        "retries": dict(retries),
+        "error": error,
+    }
+
+
+def _init_process():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+class RegistrationLoadTest:
+    """
+    Jalankan registrasi serentak dan analisis hasil penomoran
+
+    Usage:
+        test = RegistrationLoadTest(workers=8, per_worker=50, mode="thread")
+        report = test.run(scenario="month-boundary")
+        test.cleanup()
+
+        # 8 worker dibagi ke kantor 1..4 (kantor harus sudah ada)
+        RegistrationLoadTest(workers=8, kantor=4).run()
+    """
+
+    def __init__(self, workers=8, per_worker=50, mode="thread", max_retries=5, seed=None, kantor=1):
+        if mode not in ("thread", "process"):
+            raise ValueError("mode harus 'thread' atau 'process'")
+        self.workers = workers
+        self.per_worker = per_worker
+        self.mode = mode
+        self.max_retries = max_retries
+        self.seed = seed
+        self.kantor = kantor
+        self.created = []
+        self.periods = set()
+
+    def kantor_ids(self):
+        """Kantor yang dipakai worker (id terkecil lebih dulu)"""
+        from apps.konsultasi.models import Kantor
+
+        ids = list(Kantor.objects.order_by("id_kantor").values_list("id_kantor", flat=True)[:self.kantor])
+        if len(ids) < self.kantor:
+            raise ValueError(f"Butuh {self.kantor} kantor, baru ada {len(ids)}")
+        return ids
+
+    def sample(self):
+        """FK valid untuk registrasi (diambil dari data yang ada)"""
+        from apps.konsultasi.models import JenisLayanan, Tamu, TipeKunjungan
+
+        tamu_id = Tamu.objects.values_list("id_tamu", flat=True).first()
+        tipe_id = TipeKunjungan.objects.values_list("id_tipe", flat=True).first()
+        jenis = JenisLayanan.objects.values("id_jenis", "id_kategori_id").first()
+        if not (tamu_id and tipe_id and jenis):
+            raise ValueError("Butuh minimal satu Tamu, TipeKunjungan & JenisLayanan")
+        return {
+            "id_tamu_id": tamu_id,
+            "id_tipe_id": tipe_id,
+            "id_kategori_id": jenis["id_kategori_id"],
+            "id_jenis_id": jenis["id_jenis"],
+        }
+
+    def run(self, scenario="today"):
+        dates = scenario_dates(scenario, seed=self.seed)
+        kantor_ids = self.kantor_ids()
+        baseline = self._month_max(dates, kantor_ids)
+        sample = self.sample()
+
+        # Koneksi milik thread utama tidak boleh diwarisi proses anak
+        connections.close_all()
+
+        start_at = time.time() + START_DELAY
+        tasks = [
+            {
+                "count": self.per_worker,
+                "offset": worker,
+                "dates": dates,
+                "sample": {**sample, "id_kantor_id": kantor_ids[worker % len(kantor_ids)]},
+                "start_at": start_at,
+                "max_retries": self.max_retries,
+            }
+            for worker in range(self.workers)
+        ]
+
+        if self.mode == "thread":
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process)
+
+        with executor:
+            batches = list(executor.map(_register_batch, tasks))
+        elapsed = time.time() - start_at
+
+        results = [result for batch in batches for result in batch]
+        self.created = [r["pk"] for r in results if r["pk"]]
+        self.periods = {(kantor_id, year * 100 + month) for kantor_id, year, month in baseline}
+        return self.report(scenario, results, elapsed, baseline)
+
+    # ===== ANALISIS =====
+
+    def _month_max(self, dates, kantor_ids):
+        """
+        Nomor terakhir per (kantor, bulan) sebelum uji (dasar deteksi nomor
+        terlewat): counter nomor_sequence jika sudah ada, selain itu data
+        """
+        from apps.konsultasi.models import NomorSequence
+
+        baseline = {}
+        for kantor_id in kantor_ids:
+            for tanggal in dates:
+                key = (kantor_id, tanggal.year, tanggal.month)
+                if key in baseline:
+                    continue
+                counter = NomorSequence.objects.filter(
+                    id_kantor_id=kantor_id, periode=tanggal.year * 100 + tanggal.month,
+                ).values_list("last_number", flat=True).first()
+                baseline[key] = counter if counter is not None else max(self._month_numbers(*key), default=0)
+        return baseline
+
+    def _month_numbers(self, kantor_id, year, month):
+        from apps.konsultasi.models import MONTH_PREFIX, Kunjungan
+
+        prefix = MONTH_PREFIX.get(month, "XXX")
+        numbers = []
+        for nomor in Kunjungan.objects.by_kantor(kantor_id).filter(
+            **periods.month(year, month).lookup(),
+            nomor_kunjungan__startswith=prefix,
+        ).values_list("nomor_kunjungan", flat=True).iterator():
+            try:
+                numbers.append(int(nomor[len(prefix):]))
+            except ValueError:
+                continue
+        return numbers
+
+    def report(self, scenario, results, elapsed, baseline):
+        ok = [r for r in results if not r["error"]]
+        latencies = [r["latency"] * 1000 for r in ok]
+        lock_waits = [r["lock_wait"] * 1000 for r in ok]
+        retries = Counter()
+        for r in results:
+            retries.update(r["retries"])
+
+        months = {}
+        for (kantor_id, year, month), base in sorted(baseline.items()):
+            numbers = [n for n in self._month_numbers(kantor_id, year, month) if n > base]
+            counts = Counter(numbers)
+            expected = set(range(base + 1, max(numbers, default=base) + 1))
+            label = f"{year}-{month:02d}" if self.kantor == 1 else f"kantor {kantor_id} {year}-{month:02d}"
+            months[label] = {
+                "created": len(numbers),
+                "duplicates": sorted(n for n, c in counts.items() if c > 1),
+                "skipped": sorted(expected - counts.keys()),
+            }
+
+        by_date = defaultdict(int)
+        for r in ok:
+            by_date[r["tanggal"].isoformat()] += 1
+
+        return {
+            "scenario": scenario,
+            "mode": self.mode,
+            "workers": self.workers,
+            "kantor": self.kantor,
+            "vendor": connection.vendor,
+            "requested": len(results),
+            "succeeded": len(ok),
+            "failed": len(results) - len(ok),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_per_s": round(len(ok) / elapsed, 1) if elapsed > 0 else 0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 2),
+                "p95": round(percentile(latencies, 95), 2),
+                "p99": round(percentile(latencies, 99), 2),
+                "max": round(max(latencies, default=0), 2),
+            },
+            "lock_wait_ms": {
+                "total": round(sum(lock_waits), 2),
+                "mean": round(statistics.mean(lock_waits), 2) if lock_waits else 0,
+                "p95": round(percentile(lock_waits, 95), 2),
+            },
+            "retries": dict(retries),
+            "by_date": dict(by_date),
+            "months": months,
+        }
+
+    def cleanup(self):
+        """
+        Hapus kunjungan hasil uji beserta jejaknya (tombstone, event change
+        feed, audit log - termasuk yang ditulis penghapusan ini) dan reset
+        counter nomor_sequence bulan yang tersentuh (diisi ulang dari data
+        saat registrasi berikutnya, jadi nomor uji tidak meninggalkan celah)
+        """
+        from apps.konsultasi.models import AuditLog, Kunjungan, KunjunganEvent, NomorSequence, Tombstone
+
+        deleted = 0
+        for start in range(0, len(self.created), 500):
+            chunk = self.created[start:start + 500]
+            with transaction.atomic():
+                deleted += Kunjungan.objects.filter(pk__in=chunk).delete()[0]
+                Tombstone.objects.filter(
+                    model_label="konsultasi.kunjungan", object_pk__in=chunk
+                ).delete()
+                KunjunganEvent.objects.filter(id_kunjungan__in=chunk).delete()
+                AuditLog.objects.filter(
+                    model_label="konsultasi.kunjungan", object_pk__in=chunk
+                ).delete()
+        for kantor_id, periode in self.periods:
+            NomorSequence.objects.filter(id_kantor_id=kantor_id, periode=periode).delete()
+        self.created = []
+        self.periods = set()
+        return deleted
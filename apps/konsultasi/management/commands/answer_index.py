@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.services import answers
+
+
+class Command(BaseCommand):
+    help = (
+        "Index pertanyaan serupa (BM25): bangun ulang snapshot dari database, "
+        "lihat statistik, atau coba query"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Bangun ulang dari konsultasi selesai & kosongkan journal",
+        )
+        parser.add_argument("--query", help="Coba suggest_answers untuk teks ini")
+        parser.add_argument("-k", type=int, default=5)
+        parser.add_argument("--jenis", type=int, help="Filter id_jenis")
+        parser.add_argument("--sumber", type=int, help="Filter id_sumber")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            started = time.perf_counter()
+            index = answers.rebuild_index()
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(index)} konsultasi di-index dalam {time.perf_counter() - started:.1f} s "
+                f"-> {index.snapshot_path}"
+            ))
+        else:
+            started = time.perf_counter()
+            index = answers.get_index()
+            self.stdout.write(
+                f"{len(index)} konsultasi, {len(index.postings)} term "
+                f"(dimuat dalam {(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+
+        if options["query"]:
+            started = time.perf_counter()
+            suggestions = answers.suggest_answers(
+                options["query"], k=options["k"],
+                id_jenis=options["jenis"], id_sumber=options["sumber"],
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            for item in suggestions:
+                self.stdout.write(
+                    f"[{item['score']:.2f}] {item['nomor_kunjungan']} "
+                    f"({item['tanggal_kunjungan']}): {item['pertanyaan']}"
+                )
+                self.stdout.write(f"    -> {item['jawaban']}")
+            self.stdout.write(f"{len(suggestions)} saran dalam {elapsed:.1f} ms")
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.managers import returning_cache
+from apps.konsultasi.models import Tamu
+
+
+class Command(BaseCommand):
+    help = (
+        "Isi kolom lookup tamu (email_normalized, no_hp_normalized) untuk data "
+        "lama; aman dijalankan ulang, hanya baris yang berubah yang di-update"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = Tamu.objects.backfill_lookup_keys(chunk_size=options["chunk_size"])
+        returning_cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"{updated} tamu di-update dalam {time.perf_counter() - started:.1f} s"
+        ))
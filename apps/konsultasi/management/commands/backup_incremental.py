@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.konsultasi.services import BackupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Backup incremental: hanya baris yang berubah sejak watermark terakhir "
+        "ditambah tombstone untuk data yang dihapus"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Folder tujuan file chunk")
+        parser.add_argument(
+            "--state",
+            help="File watermark (default: <directory>/watermark.json)",
+        )
+        parser.add_argument(
+            "--since",
+            help="Override watermark (ISO datetime), contoh: 2025-12-01T00:00:00+07:00",
+        )
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--max-rows", type=int, default=50000,
+            help="Maksimal record per file chunk",
+        )
+        parser.add_argument(
+            "--overlap", type=int, default=300,
+            help="Detik overlap watermark untuk transaksi yang commit terlambat",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"])
+        state_path = options["state"] or directory / "watermark.json"
+        service = BackupService(using=options["database"])
+
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError("Format --since tidak valid")
+        else:
+            since = service.read_watermark(state_path)
+            if since is None:
+                raise CommandError(
+                    f"Watermark {state_path} belum ada. Jalankan dulu "
+                    f"`backup_stream <file> --state {state_path}` atau pakai --since."
+                )
+
+        watermark, paths, counts = service.backup_incremental(
+            directory,
+            since,
+            max_rows=options["max_rows"],
+            overlap=options["overlap"],
+        )
+        service.write_watermark(state_path, watermark, paths)
+
+        for label, total in counts.items():
+            self.stdout.write(f"{label}: {total}")
+        for path in paths:
+            self.stdout.write(f"-> {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backup incremental selesai, watermark baru: {watermark.isoformat()}"
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.konsultasi.services import BackupService
+
+
+class Command(BaseCommand):
+    help = "Backup data buku tamu ke file gzip NDJSON (streaming, memori konstan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File tujuan, contoh: backup.ndjson.gz")
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Jumlah baris per fetch dari database",
+        )
+        parser.add_argument(
+            "--state",
+            help="File watermark untuk backup_incremental berikutnya",
+        )
+
+    def handle(self, *args, **options):
+        service = BackupService(
+            using=options["database"],
+            chunk_size=options["chunk_size"],
+        )
+        started = timezone.now()
+        counts = service.backup(options["path"])
+
+        if options["state"]:
+            service.write_watermark(options["state"], started, [options["path"]])
+
+        for label, total in counts.items():
+            self.stdout.write(f"{label}: {total}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backup selesai: {sum(counts.values())} record -> {options['path']}"
+        ))
@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.konsultasi.benchmarks import REGISTRY, BenchmarkRunner, compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark manager, service, registrasi, export & admin. "
+        "Hasil JSON bisa dibandingkan antar commit dengan --compare"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only", action="append",
+            help="Prefix nama benchmark, contoh: --only managers. --only services.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument("--output", help="Simpan hasil JSON ke file")
+        parser.add_argument("--compare", help="File JSON hasil sebelumnya")
+        parser.add_argument("--list", action="store_true", help="Tampilkan daftar benchmark")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for name in sorted(REGISTRY):
+                self.stdout.write(name)
+            return
+
+        runner = BenchmarkRunner(repeat=options["repeat"], warmup=options["warmup"])
+        result = runner.run(only=options["only"])
+
+        output = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Gagal membaca {options['compare']}: {exc}")
+
+            self.stdout.write(f"\n{'benchmark':45} {'before':>10} {'after':>10} {'ratio':>7}")
+            for name, before, after, ratio in compare(result, baseline):
+                style = self.style.ERROR if ratio > 1.2 else self.style.SUCCESS if ratio < 0.8 else str
+                self.stdout.write(style(f"{name:45} {before:>10.2f} {after:>10.2f} {ratio:>7.2f}"))
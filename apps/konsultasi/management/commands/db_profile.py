@@ -0,0 +1,124 @@
+import json
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.utils import load_backend
+
+from apps.konsultasi import db
+from apps.konsultasi.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Profil koneksi database: konfigurasi efektif (pool, CONN_MAX_AGE, timeout, "
+        "server-side cursor), overhead koneksi per request, dan memori export CSV "
+        "(list vs streaming). Hanya membaca data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Siklus request untuk overhead koneksi")
+        parser.add_argument("--export-rows", type=int, default=20000, help="Jumlah kunjungan untuk uji export")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        result = {"config": db.describe(using)}
+        for key, value in result["config"].items():
+            self.stdout.write(f"{key:>22}: {value}")
+
+        result["connection"] = {
+            "fresh": self.request_cycle(options["requests"], using, fresh=True),
+            "configured": self.request_cycle(options["requests"], using, fresh=False),
+        }
+        self.stdout.write("\nOverhead koneksi per request (SELECT 1), ms:")
+        for name, stats in result["connection"].items():
+            self.stdout.write(f"  {name:<11} p50 {stats['p50_ms']:>7}  p95 {stats['p95_ms']:>7}")
+
+        result["export"] = self.export_memory(options["export_rows"], using)
+        self.stdout.write(f"\nExport CSV {result['export']['rows']} kunjungan:")
+        for name in ("list", "stream"):
+            stats = result["export"][name]
+            self.stdout.write(f"  {name:<7} {stats['seconds']:>7} s  puncak memori {stats['peak_kb']:>9} KB")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(result, f, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {options['output']}"))
+
+    def request_cycle(self, count, using, fresh):
+        """
+        Waktu satu "request" = akhir request sebelumnya + satu query
+
+        fresh: koneksi baru setiap request (default Django tanpa pool,
+        CONN_MAX_AGE=0). configured: alias sesuai settings - pool atau koneksi
+        persisten, lewat close_old_connections() seperti signal request.
+        """
+        if fresh:
+            settings_dict = dict(connections[using].settings_dict)
+            settings_dict["OPTIONS"] = {
+                key: value for key, value in settings_dict.get("OPTIONS", {}).items() if key != "pool"
+            }
+            settings_dict["CONN_MAX_AGE"] = 0
+            conn = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias=f"{using}_profile")
+        else:
+            conn = connections[using]
+
+        timings = []
+        try:
+            for _ in range(count):
+                started = time.perf_counter()
+                if fresh:
+                    conn.close()
+                else:
+                    close_old_connections()
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            if fresh:
+                conn.close()
+        return {
+            "requests": count,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+        }
+
+    def export_memory(self, rows, using):
+        """Puncak memori Python: export_to_csv_data (list) vs stream_csv (generator)"""
+        from apps.konsultasi.models import Kunjungan
+        from apps.konsultasi.services import KunjunganReports
+
+        reports = KunjunganReports()
+        # `rows` kunjungan terbaru (kurang dari itu: semua)
+        boundary = (
+            Kunjungan.objects.using(using).order_by("-id_kunjungan")
+            .values_list("id_kunjungan", flat=True)[rows - 1:rows]
+        )
+        queryset = Kunjungan.objects.using(using).filter(id_kunjungan__gte=next(iter(boundary), 0))
+
+        def measure(run):
+            # Waktu tanpa tracemalloc (tracing memperlambat berkali lipat)
+            started = time.perf_counter()
+            run()
+            seconds = time.perf_counter() - started
+            tracemalloc.start()
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return {"seconds": round(seconds, 2), "peak_kb": peak // 1024}
+
+        def stream():
+            for _ in reports.stream_csv(queryset):
+                pass
+
+        return {
+            "rows": queryset.count(),
+            "list": measure(lambda: reports.export_to_csv_data(queryset)),
+            "stream": measure(stream),
+        }
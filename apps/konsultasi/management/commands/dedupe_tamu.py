@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.konsultasi.services import TamuDeduplicator
+from apps.konsultasi.services.dedupe import HIGH_SCORE, MAX_BLOCK, MIN_SCORE
+
+
+class Command(BaseCommand):
+    help = (
+        "Deteksi tamu ganda (blocking no HP / email / fonetik nama) dan merge: "
+        "Kunjungan dialihkan ke tamu yang dipertahankan dalam satu transaksi"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-score", type=float, default=MIN_SCORE)
+        parser.add_argument("--max-block", type=int, default=MAX_BLOCK)
+        parser.add_argument("--output", help="Simpan saran merge ke file JSON (untuk direview)")
+        parser.add_argument("--show", type=int, default=20, help="Jumlah saran yang ditampilkan")
+        parser.add_argument("--apply", metavar="FILE", help="Merge semua grup dari file JSON saran")
+        parser.add_argument(
+            "--high-only", action="store_true",
+            help=f"Dengan --apply: hanya grup skor >= {HIGH_SCORE}",
+        )
+        parser.add_argument(
+            "--merge", nargs="+", type=int, metavar="ID",
+            help="Merge manual: ID pertama dipertahankan, sisanya digabungkan",
+        )
+
+    def handle(self, *args, **options):
+        dedupe = TamuDeduplicator(min_score=options["min_score"], max_block=options["max_block"])
+
+        if options["merge"]:
+            if len(options["merge"]) < 2:
+                raise CommandError("--merge butuh minimal dua ID")
+            self._merge(dedupe, [{"keep": options["merge"][0], "merge": options["merge"][1:]}])
+            return
+
+        if options["apply"]:
+            with open(options["apply"], encoding="utf-8") as fh:
+                groups = json.load(fh)
+            if options["high_only"]:
+                groups = [g for g in groups if g["score"] >= HIGH_SCORE]
+            self._merge(dedupe, groups)
+            return
+
+        started = time.perf_counter()
+        suggestions = dedupe.suggest()
+        stats = dedupe.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['tamu']} tamu, {stats['pairs_scored']} pasangan dinilai "
+            f"({stats['oversized_blocks']} blok terlalu besar dilewati) -> "
+            f"{len(suggestions)} grup dalam {time.perf_counter() - started:.1f} s"
+        ))
+
+        for item in suggestions[:options["show"]]:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\nSkor {item['score']:.2f} ({item['confidence']}) - pertahankan #{item['keep']}"
+            ))
+            for member in item["members"]:
+                self.stdout.write(
+                    f"  #{member['id_tamu']} {member.get('nama', '')} | {member.get('email', '')} | "
+                    f"{member.get('no_hp', '')} | {member.get('instansi_perusahaan', '')} "
+                    f"({member['kunjungan']} kunjungan)"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(suggestions, fh, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(
+                f"\nSaran disimpan ke {options['output']}; review lalu jalankan "
+                f"--apply {options['output']}"
+            ))
+
+    def _merge(self, dedupe, groups):
+        try:
+            result = dedupe.merge_groups(groups)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['groups']} grup: {result['tamu']} tamu digabung, "
+            f"{result['kunjungan']} kunjungan dialihkan"
+        ))
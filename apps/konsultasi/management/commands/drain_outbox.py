@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.services import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Kirim notifikasi dari tabel outbox (retry + backoff). Default sekali "
+        "jalan sampai antrian kosong (cron); --loop untuk worker terus-menerus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Pesan per batch")
+        parser.add_argument("--loop", action="store_true", help="Jalan terus, poll tiap --interval detik")
+        parser.add_argument("--interval", type=float, default=5.0)
+        parser.add_argument("--purge-days", type=int, help="Hapus pesan terkirim yang lebih tua dari N hari")
+
+    def handle(self, *args, **options):
+        if options["purge_days"] is not None:
+            deleted = outbox.purge_sent(days=options["purge_days"])
+            self.stdout.write(f"{deleted} pesan terkirim lama dihapus")
+
+        while True:
+            started = time.perf_counter()
+            stats = outbox.drain(batch_size=options["batch_size"])
+            if stats["batches"] or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{stats['sent']} terkirim, {stats['retried']} dijadwalkan ulang, "
+                    f"{stats['failed']} gagal dalam {time.perf_counter() - started:.1f} s"
+                ))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,67 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.services import FaqMiner
+
+
+class Command(BaseCommand):
+    help = (
+        "Cluster pertanyaan konsultasi yang mirip (MinHash/LSH) per jenis layanan "
+        "dan tampilkan kandidat FAQ. Default incremental: hanya konsultasi yang "
+        "selesai sejak run sebelumnya."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Abaikan state, proses semua")
+        parser.add_argument("--min-size", type=int, default=3, help="Minimal pertanyaan per cluster")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--jenis", type=int, help="Hanya id_jenis ini")
+        parser.add_argument("--threshold", type=float, help="Minimal estimasi Jaccard (default 0.6)")
+        parser.add_argument("--output", help="Simpan kandidat ke .json atau .csv")
+
+    def handle(self, *args, **options):
+        miner = FaqMiner(threshold=options["threshold"])
+        if not options["full"]:
+            miner.load()
+
+        started = time.perf_counter()
+        stats = miner.run(full=options["full"])
+        miner.save()
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['processed']} pertanyaan baru diproses dalam "
+            f"{time.perf_counter() - started:.1f} s ({stats['docs']} total, "
+            f"{stats['clusters']} cluster)"
+        ))
+
+        candidates = miner.candidates(
+            min_size=options["min_size"], top=options["top"], id_jenis=options["jenis"]
+        )
+        for item in candidates:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n#{item['rank']} [{item['jenis']}] {item['jumlah']} pertanyaan"
+            ))
+            self.stdout.write(f"  Q: {item['pertanyaan']}")
+            self.stdout.write(f"  A: {item['jawaban']}")
+            if item["sumber"]:
+                self.stdout.write(f"  Sumber: {item['sumber']}")
+
+        if options["output"]:
+            self._write(options["output"], candidates)
+            self.stdout.write(self.style.SUCCESS(f"\nKandidat disimpan ke {options['output']}"))
+
+    def _write(self, path, candidates):
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["rank", "jenis", "jumlah", "pertanyaan", "jawaban", "sumber", "variasi"])
+                for item in candidates:
+                    writer.writerow([
+                        item["rank"], item["jenis"], item["jumlah"], item["pertanyaan"],
+                        item["jawaban"], item["sumber"], " | ".join(item["variasi"]),
+                    ])
+        else:
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(candidates, fh, indent=2, ensure_ascii=False, default=str)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.synthetic import SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = "Generate data sintetis (tamu, petugas, kunjungan) untuk benchmark"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--visits", type=int, default=100_000)
+        parser.add_argument("--tamu", type=int, help="Default: visits / 3")
+        parser.add_argument("--petugas", type=int, default=10)
+        parser.add_argument("--years", type=int, default=3)
+        parser.add_argument("--kantor", type=int, default=1, help="Jumlah kantor (dibuat jika belum ada)")
+        parser.add_argument(
+            "--pending-ratio", type=float, default=0.05,
+            help="Porsi kunjungan hari ini yang masih menunggu",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        generator = SyntheticDataGenerator(
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+        )
+
+        started = time.perf_counter()
+        result = generator.generate(
+            visits=options["visits"],
+            tamu=options["tamu"],
+            petugas=options["petugas"],
+            years=options["years"],
+            pending_ratio=options["pending_ratio"],
+            kantor=options["kantor"],
+            stdout=self.stdout if options["verbosity"] > 1 else None,
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Dibuat {result['kunjungan']} kunjungan, {result['tamu']} tamu, "
+            f"{result['petugas']} petugas dalam {elapsed:.1f} detik"
+        ))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.konsultasi.models import Kantor
+from apps.konsultasi.services import BukuTamuImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import massal buku tamu lama dari CSV/XLSX. "
+        "Kolom wajib: tanggal, nama, tipe, kategori, jenis"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File sumber (.csv / .xlsx)")
+        parser.add_argument(
+            "--reject-file",
+            help="CSV untuk baris yang gagal (default: <path>.reject.csv)",
+        )
+        parser.add_argument("--sheet", help="Nama sheet (XLSX)")
+        parser.add_argument("--delimiter", default=",", help="Pemisah kolom (CSV)")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--kantor", type=int, help="id Kantor tujuan (default: kantor 1)")
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Validasi saja, tidak menulis ke database",
+        )
+
+    def handle(self, *args, **options):
+        if options["kantor"] and not Kantor.objects.filter(pk=options["kantor"]).exists():
+            raise CommandError(f"Kantor {options['kantor']} tidak ditemukan")
+
+        reject_path = options["reject_file"] or f"{options['path']}.reject.csv"
+        importer = BukuTamuImporter(
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+            kantor=options["kantor"],
+        )
+
+        started = time.perf_counter()
+        try:
+            result = importer.run(
+                options["path"],
+                reject_path=reject_path,
+                sheet=options["sheet"],
+                delimiter=options["delimiter"],
+            )
+        except (ValueError, ImportError, OSError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Total: {result['total']} | Import: {result['imported']} | "
+            f"Ditolak: {result['rejected']} | Tamu baru: {result['tamu_baru']}"
+        )
+        if result["rejected"]:
+            self.stdout.write(self.style.WARNING(f"Baris gagal -> {reject_path}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai dalam {elapsed:.1f} detik"
+            + (" (dry run)" if options["dry_run"] else "")
+        ))
@@ -0,0 +1,92 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.konsultasi.loadtest import SCENARIOS, RegistrationLoadTest
+
+
+class Command(BaseCommand):
+    help = (
+        "Uji beban registrasi serentak lewat Kunjungan.save(): throughput, "
+        "latency, lock wait, nomor duplikat/terlewat & retry"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--per-worker", type=int, default=50)
+        parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+        parser.add_argument("--kantor", type=int, default=1, help="Bagi worker ke N kantor pertama")
+        parser.add_argument(
+            "--scenario", choices=SCENARIOS, action="append",
+            help="Bisa diulang; default semua skenario",
+        )
+        parser.add_argument("--max-retries", type=int, default=5)
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--keep", action="store_true", help="Jangan hapus data hasil uji")
+        parser.add_argument("--output", help="Simpan laporan JSON ke file")
+        parser.add_argument(
+            "--fail-on-anomaly", action="store_true",
+            help="Exit error jika ada nomor duplikat/terlewat (untuk CI)",
+        )
+
+    def handle(self, *args, **options):
+        reports = []
+        anomalies = 0
+
+        for scenario in options["scenario"] or SCENARIOS:
+            test = RegistrationLoadTest(
+                workers=options["workers"],
+                per_worker=options["per_worker"],
+                mode=options["mode"],
+                max_retries=options["max_retries"],
+                seed=options["seed"],
+                kantor=options["kantor"],
+            )
+            try:
+                report = test.run(scenario)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            finally:
+                if not options["keep"]:
+                    test.cleanup()
+
+            reports.append(report)
+            anomalies += self._print(report)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                json.dump(reports, fh, indent=2, default=str)
+            self.stdout.write(self.style.SUCCESS(f"Laporan disimpan ke {options['output']}"))
+
+        if anomalies and options["fail_on_anomaly"]:
+            raise CommandError(f"{anomalies} anomali penomoran ditemukan")
+
+    def _print(self, report):
+        latency = report["latency_ms"]
+        lock = report["lock_wait_ms"]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n[{report['scenario']}] {report['mode']} x{report['workers']}, "
+            f"{report['kantor']} kantor ({report['vendor']})"
+        ))
+        self.stdout.write(
+            f"  berhasil {report['succeeded']}/{report['requested']} "
+            f"dalam {report['elapsed_s']} s = {report['throughput_per_s']}/s"
+        )
+        self.stdout.write(
+            f"  latency p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+            f"p99 {latency['p99']} ms, max {latency['max']} ms"
+        )
+        self.stdout.write(f"  lock wait rata-rata {lock['mean']} ms, p95 {lock['p95']} ms")
+        self.stdout.write(f"  retry {report['retries'] or 0}")
+
+        anomalies = 0
+        for month, info in report["months"].items():
+            line = f"  {month}: {info['created']} nomor baru"
+            if info["duplicates"] or info["skipped"]:
+                anomalies += len(info["duplicates"]) + len(info["skipped"])
+                self.stdout.write(self.style.ERROR(
+                    f"{line}, duplikat {info['duplicates'][:10]}, terlewat {info['skipped'][:10]}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{line}, tanpa duplikat/terlewat"))
+        return anomalies
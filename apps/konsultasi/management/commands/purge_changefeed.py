@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.services import changefeed
+
+
+class Command(BaseCommand):
+    help = "Hapus event change feed kunjungan yang lebih tua dari masa simpan (jadwalkan harian)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Default KONSULTASI_CHANGEFEED['RETENTION_DAYS']")
+
+    def handle(self, *args, **options):
+        deleted = changefeed.purge_before(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"{deleted} event change feed dihapus"))
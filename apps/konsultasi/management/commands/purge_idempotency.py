@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.konsultasi.services import idempotency
+
+
+class Command(BaseCommand):
+    help = "Hapus idempotency key yang sudah kedaluwarsa (jadwalkan harian)"
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} idempotency key kedaluwarsa dihapus"))
@@ -0,0 +1,58 @@
+import difflib
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.konsultasi import query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "Tampilkan / simpan / cek snapshot query plan method KunjunganQuerySet "
+        "(apps/konsultasi/plan_snapshots/<vendor>.txt)"
+    )
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--write", action="store_true", help="Tulis ulang snapshot")
+        group.add_argument(
+            "--check", action="store_true",
+            help="Exit error jika plan berbeda dari snapshot atau ada masalah baru",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        vendor = connections[using].vendor
+        results = query_plans.inspect_all(using=using)
+        text = query_plans.render_snapshot(results)
+        path = query_plans.snapshot_path(vendor)
+
+        if options["write"]:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Snapshot ditulis ke {path}"))
+        elif not options["check"]:
+            self.stdout.write(text)
+
+        unexpected = {name: r["unexpected"] for name, r in results.items() if r["unexpected"]}
+        for name, problems in unexpected.items():
+            for rule, lines in problems.items():
+                self.stdout.write(self.style.ERROR(f"{name}: {rule} -> {'; '.join(lines)}"))
+
+        if options["check"]:
+            if not path.exists():
+                raise CommandError(f"Snapshot {path} belum ada, jalankan --write dulu")
+            if path.read_text(encoding="utf-8") != text:
+                self._diff(path.read_text(encoding="utf-8"), text, path)
+                raise CommandError("Query plan berbeda dari snapshot")
+            if unexpected:
+                raise CommandError(f"{len(unexpected)} query dengan masalah plan baru")
+            self.stdout.write(self.style.SUCCESS("Query plan sesuai snapshot"))
+
+    def _diff(self, before, after, path):
+        for line in difflib.unified_diff(
+            before.splitlines(), after.splitlines(),
+            fromfile=str(path), tofile="current", lineterm="",
+        ):
+            self.stdout.write(line)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from apps.konsultasi.services import BackupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore data buku tamu dari file gzip NDJSON hasil backup_stream, "
+        "opsional diikuti file backup_incremental (urut dari yang terlama)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="+",
+            help="File full backup lalu file incremental (.ndjson.gz)",
+        )
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Jumlah baris per bulk insert",
+        )
+
+    def handle(self, *args, **options):
+        service = BackupService(
+            using=options["database"],
+            batch_size=options["batch_size"],
+        )
+
+        try:
+            counts = service.restore(*options["paths"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Restore gagal, data sudah ada di database tujuan: {exc}"
+            )
+
+        for label, total in counts.items():
+            self.stdout.write(f"{label}: {total}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Restore selesai: {sum(counts.values())} record"
+        ))
@@ -0,0 +1,72 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.konsultasi.assignment_sim import POLICIES, pick_benchmark, run_scenarios
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulasi waktu tunggu per jumlah petugas: pengambilan manual dari "
+        "unassigned() vs round robin vs penugasan least-loaded otomatis "
+        "(services/assignment.py). Tidak menyentuh database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--staff", default="2,3,4,6", help="Jumlah petugas per skenario, dipisah koma")
+        parser.add_argument("--arrivals-per-hour", type=float, default=15.0, help="Rata-rata kedatangan per jam")
+        parser.add_argument("--specialists", type=float, default=0.5, help="Porsi petugas spesialis (0-1)")
+        parser.add_argument("--poll-minutes", type=float, default=10.0,
+                            help="Manual: jeda petugas menganggur mengecek daftar unassigned")
+        parser.add_argument("--days", type=int, default=20, help="Hari simulasi per skenario")
+        parser.add_argument("--policy", action="append", choices=POLICIES, help="Default: semua")
+        parser.add_argument("--pick-benchmark", action="store_true",
+                            help="Ukur juga biaya pick LoadBoard untuk 10..10000 petugas")
+        parser.add_argument("--seed", type=int)
+        parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+
+    def handle(self, *args, **options):
+        try:
+            staff_levels = [int(value) for value in options["staff"].split(",") if value.strip()]
+        except ValueError:
+            raise CommandError("--staff harus daftar angka, contoh 2,3,4,6")
+        if not staff_levels or min(staff_levels) < 1:
+            raise CommandError("--staff minimal 1 petugas")
+        if options["days"] < 1:
+            raise CommandError("--days minimal 1")
+
+        rows = run_scenarios(
+            staff_levels,
+            policies=options["policy"] or POLICIES,
+            days=options["days"],
+            arrivals_per_hour=options["arrivals_per_hour"],
+            specialist_ratio=options["specialists"],
+            poll_minutes=options["poll_minutes"],
+            seed=options["seed"],
+        )
+
+        self.stdout.write(
+            f"{'staff':>5}  {'kebijakan':<13}{'mean':>7}{'p50':>7}{'p95':>7}{'maks':>7}"
+            f"{'util':>7}{'tak terlayani':>15}"
+        )
+        for row in rows:
+            wait = row["wait_min"]
+            self.stdout.write(
+                f"{row['staff']:>5}  {row['policy']:<13}{wait['mean']:>7}{wait['p50']:>7}{wait['p95']:>7}"
+                f"{wait['max']:>7}{row['utilization']:>7.0%}{row['unassigned']:>15}"
+            )
+        self.stdout.write(
+            f"Waktu tunggu dalam menit, {options['days']} hari x "
+            f"~{rows[0]['visits_per_day'] if rows else 0} kunjungan/hari per skenario"
+        )
+
+        result = {"scenarios": rows}
+        if options["pick_benchmark"]:
+            result["pick"] = pick_benchmark(seed=options["seed"])
+            for row in result["pick"]:
+                self.stdout.write(f"pick {row['petugas']:>6} petugas: {row['us_per_pick']} us")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Hasil disimpan ke {options['output']}"))
@@ -0,0 +1,84 @@
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.konsultasi.kiosk import (
+    DjangoClientTransport, FlakyTransport, HttpTransport, KioskClient, KioskQueue, KioskSyncError,
+    random_registration,
+)
+
+
+SIMULATION_TOKEN = "simulasi-kiosk"
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulasi kiosk offline: antrian registrasi lokal lalu sync batch ke "
+        "/api/kiosk/sync/ (in-process, atau --url ke server). Data registrasi "
+        "benar-benar tersimpan - jalankan di database dev."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--visits", type=int, default=300, help="Registrasi selama offline")
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--drop-rate", type=float, default=0.0, help="Peluang koneksi putus per round trip")
+        parser.add_argument("--backdate-days", type=int, default=0, help="Sebar tanggal registrasi mundur")
+        parser.add_argument("--url", help="Endpoint sync server (default: in-process)")
+        parser.add_argument("--token", help="X-Kiosk-Token (wajib dengan --url)")
+        parser.add_argument("--queue", default=":memory:", help="File antrian SQLite kiosk")
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            if not options["token"]:
+                raise CommandError("--token wajib dengan --url")
+            self._run(HttpTransport(options["url"]), options["token"], options)
+            return
+
+        # In-process: daftarkan token simulasi hanya selama command berjalan
+        ratelimit = dict(getattr(settings, "KONSULTASI_RATELIMIT", {}))
+        ratelimit["KIOSKS"] = {**ratelimit.get("KIOSKS", {}), SIMULATION_TOKEN: "simulasi"}
+        with override_settings(KONSULTASI_RATELIMIT=ratelimit):
+            self._run(DjangoClientTransport(), SIMULATION_TOKEN, options)
+
+    def _run(self, transport, token, options):
+        rnd = random.Random(options["seed"])
+        flaky = FlakyTransport(transport, options["drop_rate"], seed=options["seed"])
+        client = KioskClient(KioskQueue(options["queue"]), flaky, token, batch_size=options["batch_size"])
+
+        # Online sebentar: ambil master data untuk form kiosk
+        for _ in range(10):
+            if not client.sync()["offline"]:
+                break
+        if client.master is None:
+            raise CommandError("Master data tidak bisa diambil (server tidak terjangkau?)")
+
+        # Offline: registrasi masuk antrian lokal
+        for _ in range(options["visits"]):
+            client.register(**random_registration(client.master, rnd, max_backdate_days=options["backdate_days"]))
+        self.stdout.write(f"{client.queue.pending_count()} registrasi di antrian kiosk")
+
+        # Online lagi: sync sampai antrian kosong
+        totals = {"round_trips": 0, "created": 0, "duplicate": 0, "invalid": 0}
+        started = time.perf_counter()
+        attempts = 0
+        while client.queue.pending_count() and attempts < 100:
+            attempts += 1
+            try:
+                stats = client.sync()
+            except KioskSyncError as exc:
+                raise CommandError(str(exc))
+            for key in totals:
+                totals[key] += stats[key]
+        elapsed = time.perf_counter() - started
+
+        style = self.style.SUCCESS if not client.queue.pending_count() else self.style.ERROR
+        self.stdout.write(style(
+            f"{totals['created']} dibuat, {totals['duplicate']} duplicate (upload ulang), "
+            f"{totals['invalid']} invalid dalam {totals['round_trips']} round trip "
+            f"({flaky.dropped} koneksi putus), {elapsed:.2f} s; "
+            f"sisa antrian {client.queue.pending_count()}"
+        ))
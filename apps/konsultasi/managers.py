@@ -1,7 +1,12 @@
-from django.db import models
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import connections, models, transaction
 from django.db.models import Q, Count
-from django.utils import timezone
-from datetime import timedelta
+
+from apps.konsultasi import periods
+from apps.konsultasi.normalizers import normalize_email, normalize_phone
 
 
 # ===== TAMU MANAGER =====
@@ -29,6 +34,151 @@ class TamuQuerySet(models.QuerySet):
             Q(instansi_perusahaan__icontains=query)
         )
 
+    def lookup_returning(self, contact):
+        """
+        Cari tamu lama dari no HP atau email (form registrasi publik)
+
+        Satu point query di index email_normalized / no_hp_normalized;
+        hasil ditemukan disimpan di LRU cache per proses (miss tidak
+        di-cache supaya tamu baru langsung terlihat; queryset yang sudah
+        difilter tidak memakai cache).
+
+        Usage:
+            Tamu.objects.lookup_returning("0812-3456-7890")
+            # {"id_tamu": 12, "nama": "Budi", ...} atau None
+
+        Returns:
+            dict | None: field RETURNING_FIELDS
+        """
+        key = contact_lookup_key(contact)
+        if not key:
+            return None
+
+        cache_key = (self.db, key) if not self.query.where else None
+        cached = returning_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return dict(cached)
+
+        field = "email_normalized" if key.startswith("e:") else "no_hp_normalized"
+        row = (
+            self.filter(**{field: key[2:]})
+            .order_by("id_tamu")
+            .values(*RETURNING_FIELDS)
+            .first()
+        )
+        if row is not None and cache_key:
+            returning_cache.set(cache_key, row)
+        return dict(row) if row is not None else None
+
+    def backfill_lookup_keys(self, chunk_size=5000):
+        """
+        Isi ulang email_normalized / no_hp_normalized per chunk pk
+
+        Hanya baris yang berubah yang di-update; updated_at tidak disentuh
+        (kolom turunan, dihitung ulang saat restore).
+
+        Returns:
+            int: jumlah baris yang di-update
+        """
+        table = connections[self.db].ops.quote_name(self.model._meta.db_table)
+        updated = 0
+        last_pk = 0
+        while True:
+            rows = list(
+                self.filter(id_tamu__gt=last_pk).order_by("id_tamu")
+                .only("id_tamu", "email", "no_hp", "email_normalized", "no_hp_normalized")
+                [:chunk_size]
+            )
+            if not rows:
+                return updated
+            last_pk = rows[-1].pk
+            changed = []
+            for tamu in rows:
+                before = (tamu.email_normalized, tamu.no_hp_normalized)
+                tamu.set_lookup_keys()
+                if (tamu.email_normalized, tamu.no_hp_normalized) != before:
+                    changed.append(tamu)
+            if changed:
+                # executemany: jauh lebih cepat dari bulk_update (CASE WHEN) untuk jutaan baris
+                with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+                    cursor.executemany(
+                        f"UPDATE {table} SET email_normalized = %s, no_hp_normalized = %s "
+                        f"WHERE id_tamu = %s",
+                        [(t.email_normalized, t.no_hp_normalized, t.pk) for t in changed],
+                    )
+                updated += len(changed)
+
+
+# ===== LOOKUP TAMU LAMA =====
+
+RETURNING_FIELDS = ("id_tamu", "nama", "email", "no_hp", "instansi_perusahaan", "alamat")
+
+
+def contact_lookup_key(contact):
+    """
+    "e:<email>" untuk input berisi '@', selain itu "p:<E.164>"
+
+    Usage:
+        contact_lookup_key(" Budi@Mail.COM ")  # "e:budi@mail.com"
+        contact_lookup_key("0812 3456 7890")   # "p:+6281234567890"
+    """
+    if not contact or not contact.strip():
+        return ""
+    if "@" in contact:
+        return "e:" + normalize_email(contact)
+    phone = normalize_phone(contact)
+    return "p:" + phone if phone else ""
+
+
+class ReturningCache:
+    """
+    LRU cache (dengan TTL) hasil lookup_returning, thread-safe
+
+    Tiap worker punya cache sendiri; signal save/delete Tamu membuang
+    entri di proses yang sama, TTL membatasi data basi dari worker lain.
+    """
+
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_tamu(self, pk):
+        """Buang semua entri yang menunjuk ke tamu ini"""
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if v["id_tamu"] == pk]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+returning_cache = ReturningCache()
+
 
 class TamuManager(models.Manager):
     """Custom manager untuk Tamu"""
@@ -42,6 +192,12 @@ class TamuManager(models.Manager):
     def search(self, query):
         return self.get_queryset().search(query)
 
+    def lookup_returning(self, contact):
+        return self.get_queryset().lookup_returning(contact)
+
+    def backfill_lookup_keys(self, chunk_size=5000):
+        return self.get_queryset().backfill_lookup_keys(chunk_size=chunk_size)
+
 
 # ===== PETUGAS MANAGER =====
 
@@ -55,6 +211,10 @@ class PetugasQuerySet(models.QuerySet):
     def inactive(self):
         """Petugas yang tidak aktif"""
         return self.filter(is_active=False)
+
+    def by_kantor(self, kantor_id):
+        """Petugas satu kantor"""
+        return self.filter(id_kantor_id=kantor_id)
     
     def with_stats(self):
         """
@@ -83,6 +243,9 @@ class PetugasManager(models.Manager):
     
     def inactive(self):
         return self.get_queryset().inactive()
+
+    def by_kantor(self, kantor_id):
+        return self.get_queryset().by_kantor(kantor_id)
     
     def with_stats(self):
         return self.get_queryset().with_stats()
@@ -100,8 +263,21 @@ class KunjunganQuerySet(models.QuerySet):
     - NO complex calculations (use services/)
     - NO actions/updates (use services/)
     - Focus on READING data efficiently
+    - Per kantor: mulai dari by_kantor() supaya memakai index komposit
+      yang diawali id_kantor
     """
     
+    # ===== KANTOR (scope) =====
+    
+    def by_kantor(self, kantor_id):
+        """
+        Kunjungan satu kantor (antrian, list, laporan per kantor)
+        
+        Usage:
+            Kunjungan.objects.by_kantor(2).pending()
+        """
+        return self.filter(id_kantor_id=kantor_id)
+    
     # ===== STATUS FILTERS (Core Business Logic) =====
     
     def pending(self):
@@ -113,36 +289,38 @@ class KunjunganQuerySet(models.QuerySet):
         return self.filter(status_selesai=True)
     
     # ===== TIME-BASED FILTERS (Frequently Used) =====
+    # Semua periode = range [start, end) di kolom ber-index, tanggal lokal
+    # (lihat periods.py)
+    
+    def in_period(self, period):
+        """
+        Kunjungan dalam periode (periods.day/week/month/quarter/year)
+        
+        Usage:
+            Kunjungan.objects.in_period(periods.quarter(2025, 4))
+        """
+        return self.filter(**period.lookup())
     
     def today(self):
-        """Kunjungan hari ini"""
-        return self.filter(tanggal_kunjungan=timezone.now().date())
+        """Kunjungan hari ini (tanggal Asia/Jakarta)"""
+        return self.filter(tanggal_kunjungan=periods.local_today())
     
     def this_week(self):
-        """Kunjungan minggu ini"""
-        today = timezone.now().date()
-        start_week = today - timedelta(days=today.weekday())
-        return self.filter(tanggal_kunjungan__gte=start_week)
+        """Kunjungan minggu ini (Senin s/d Minggu)"""
+        return self.in_period(periods.week())
     
     def this_month(self):
         """Kunjungan bulan ini"""
-        now = timezone.now()
-        return self.filter(
-            tanggal_kunjungan__year=now.year,
-            tanggal_kunjungan__month=now.month
-        )
+        return self.in_period(periods.month())
     
     def by_date_range(self, start_date, end_date):
         """
-        Kunjungan dalam rentang tanggal
+        Kunjungan dalam rentang tanggal (inklusif)
         
         Usage:
             Kunjungan.objects.by_date_range(date(2025,12,1), date(2025,12,31))
         """
-        return self.filter(
-            tanggal_kunjungan__gte=start_date,
-            tanggal_kunjungan__lte=end_date
-        )
+        return self.in_period(periods.between(start_date, end_date))
     
     def by_month(self, year, month):
         """
@@ -151,10 +329,7 @@ class KunjunganQuerySet(models.QuerySet):
         Usage:
             Kunjungan.objects.by_month(2025, 12)
         """
-        return self.filter(
-            tanggal_kunjungan__year=year,
-            tanggal_kunjungan__month=month
-        )
+        return self.in_period(periods.month(year, month))
     
     # ===== KATEGORI FILTERS (Business Logic) =====
     
@@ -265,6 +440,7 @@ class KunjunganQuerySet(models.QuerySet):
             Kunjungan.objects.pending().with_relations()
         """
         return self.select_related(
+            'id_kantor',
             'id_tamu',
             'id_tipe',
             'id_kategori',
@@ -283,6 +459,17 @@ class KunjunganQuerySet(models.QuerySet):
         """
         return self.with_relations().order_by('-tanggal_kunjungan', '-id_kunjungan')
     
+    def with_konten(self):
+        """
+        Ikut muat pertanyaan/jawaban (tabel kunjungan_konten) dalam 1 query
+        
+        Hanya untuk halaman detail/cetak; list tidak perlu konten.
+        
+        Usage:
+            Kunjungan.objects.with_konten().get(pk=pk)
+        """
+        return self.select_related('konten')
+    
     def for_admin(self):
         """
         Query optimized untuk admin interface
@@ -309,6 +496,12 @@ class KunjunganManager(models.Manager):
     def get_queryset(self):
         return KunjunganQuerySet(self.model, using=self._db)
     
+    # ===== KANTOR =====
+    
+    def by_kantor(self, kantor_id):
+        """Satu kantor"""
+        return self.get_queryset().by_kantor(kantor_id)
+    
     # ===== STATUS =====
     
     def pending(self):
@@ -321,6 +514,10 @@ class KunjunganManager(models.Manager):
     
     # ===== TIME-BASED =====
     
+    def in_period(self, period):
+        """Periode kalender"""
+        return self.get_queryset().in_period(period)
+    
     def today(self):
         """Hari ini"""
         return self.get_queryset().today()
@@ -407,6 +604,52 @@ class KunjunganManager(models.Manager):
         """For list views"""
         return self.get_queryset().for_list_display()
     
+    def with_konten(self):
+        """With pertanyaan/jawaban (detail view)"""
+        return self.get_queryset().with_konten()
+    
     def for_admin(self):
         """For admin interface"""
-        return self.get_queryset().for_admin()
\ No newline at end of file
+        return self.get_queryset().for_admin()
+
+# ===== AUDIT LOG =====
+
+class AuditLogQuerySet(models.QuerySet):
+    """
+    Query audit log lewat index audit_object_idx / audit_petugas_idx
+
+    Usage:
+        AuditLog.objects.for_object(kunjungan)          # riwayat, terlama dulu
+        AuditLog.objects.for_object("konsultasi.tamu", 12)
+        AuditLog.objects.by_petugas(petugas, since=awal_bulan)
+    """
+
+    def for_object(self, obj, pk=None):
+        """Riwayat satu objek (instance, atau model_label + pk)"""
+        if pk is None:
+            label, pk = obj._meta.label_lower, obj.pk
+        else:
+            label = obj
+        return self.filter(model_label=label, object_pk=pk).order_by("id")
+
+    def by_petugas(self, petugas, since=None, until=None):
+        """Perubahan oleh petugas (instance atau id), terbaru dulu; rentang [since, until)"""
+        queryset = self.filter(id_petugas=getattr(petugas, "pk", petugas))
+        if since is not None:
+            queryset = queryset.filter(created_at__gte=since)
+        if until is not None:
+            queryset = queryset.filter(created_at__lt=until)
+        return queryset.order_by("-created_at")
+
+
+class AuditLogManager(models.Manager):
+    """Custom manager untuk AuditLog"""
+
+    def get_queryset(self):
+        return AuditLogQuerySet(self.model, using=self._db)
+
+    def for_object(self, obj, pk=None):
+        return self.get_queryset().for_object(obj, pk)
+
+    def by_petugas(self, petugas, since=None, until=None):
+        return self.get_queryset().by_petugas(petugas, since, until)
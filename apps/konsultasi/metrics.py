@@ -0,0 +1,442 @@
+"""
+Metrics in-process (counter, gauge, histogram) + endpoint scrape
+
+- Update metric hanya menyentuh dict lokal (murah, thread-safe)
+- Tiap proses mem-flush snapshot ke backend bersama (cache/file)
+  paling sering setiap FLUSH_INTERVAL detik
+- Endpoint /metrics menggabungkan snapshot semua worker dalam format
+  teks Prometheus
+
+Konfigurasi lewat settings.KONSULTASI_METRICS:
+    BACKEND        - "cache" (default) atau "file"; "cache" hanya
+                     menggabungkan worker jika CACHES bersama (Redis/
+                     Memcached), LocMemCache = per proses
+    DIRECTORY      - folder snapshot untuk backend file
+    FLUSH_INTERVAL - detik antar flush per proses
+    PROCESS_TTL    - detik sejak flush terakhir sebelum snapshot proses
+                     dianggap milik worker mati (dibuang & dihapus); proses
+                     di host yang sama langsung dibuang begitu pid-nya hilang
+    GAUGE_TTL      - detik cache untuk gauge berbasis query (antrian)
+    TOKEN          - jika diisi, scrape wajib header Authorization: Bearer <TOKEN>
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+DEFAULTS = {
+    "BACKEND": "cache",
+    "DIRECTORY": None,
+    "FLUSH_INTERVAL": 5,
+    "PROCESS_TTL": 60 * 60,
+    "GAUGE_TTL": 15,
+    "TOKEN": "",
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CACHE_PREFIX = "konsultasi:metrics"
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_METRICS", {}))
+    return config
+
+
+# ===== METRIC TYPES =====
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help_text, labels=()):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.registry.lock:
+            self.values[self._key(labels)] = value
+        self.registry.maybe_flush()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {
+                    "buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+        self.registry.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Usage:
+            with SAVE_SECONDS.time(op="create"):
+                ...
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+# ===== BACKENDS =====
+
+def is_stale(process_id, written_at, ttl, now=None):
+    """
+    Snapshot milik proses yang sudah mati?
+
+    Proses di host ini: cek pid (POSIX). Selain itu: tidak di-flush
+    selama `ttl` detik. Counter worker yang mati tidak lagi dijumlahkan.
+    """
+    host, _, pid = process_id.rpartition("-")
+    if os.name == "posix" and host == socket.gethostname() and pid.isdigit():
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            # PermissionError: pid ada, milik user lain
+            pass
+    return (now if now is not None else time.time()) - written_at > ttl
+
+
+class CacheBackend:
+    """Snapshot per proses di Django cache (pakai cache bersama di multi-worker)"""
+
+    def __init__(self, config):
+        self.config = config
+        self.ttl = config["PROCESS_TTL"]
+
+    def write(self, process_id, snapshot):
+        key = f"{CACHE_PREFIX}:proc:{process_id}"
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+        # {process_id: waktu flush terakhir}; proses mati dibuang dari daftar
+        processes = self._processes()
+        processes[process_id] = time.time()
+        self._save_processes(processes)
+
+    def read_all(self):
+        processes = self._processes()
+        stale = [p for p, written_at in processes.items() if is_stale(p, written_at, self.ttl)]
+        if stale:
+            cache.delete_many([f"{CACHE_PREFIX}:proc:{p}" for p in stale])
+            for process_id in stale:
+                del processes[process_id]
+            self._save_processes(processes)
+        snapshots = cache.get_many([f"{CACHE_PREFIX}:proc:{p}" for p in processes])
+        return list(snapshots.values())
+
+    def _processes(self):
+        processes = cache.get(f"{CACHE_PREFIX}:procs")
+        return dict(processes) if isinstance(processes, dict) else {}
+
+    def _save_processes(self, processes):
+        cache.set(f"{CACHE_PREFIX}:procs", processes, SNAPSHOT_TIMEOUT)
+
+
+class FileBackend:
+    """Snapshot per proses sebagai file JSON di satu folder bersama (mtime = flush terakhir)"""
+
+    def __init__(self, config):
+        self.directory = Path(config["DIRECTORY"] or Path(settings.BASE_DIR) / "var" / "metrics")
+        self.ttl = config["PROCESS_TTL"]
+
+    def write(self, process_id, snapshot):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{process_id}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def read_all(self):
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                if is_stale(path.stem, path.stat().st_mtime, self.ttl):
+                    path.unlink(missing_ok=True)
+                    continue
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+
+BACKENDS = {"cache": CacheBackend, "file": FileBackend}
+
+
+# ===== REGISTRY =====
+
+class MetricsRegistry:
+    """
+    Kumpulan metric satu proses
+
+    Usage:
+        from apps.konsultasi import metrics
+        metrics.REGISTRASI.inc(kategori=kunjungan.id_kategori_id)
+    """
+
+    def __init__(self, config=None):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self._last_flush = 0.0
+        self._backend = None
+        self._config = config
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = get_config()
+        return self._config
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = BACKENDS[self.config["BACKEND"]](self.config)
+        return self._backend
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(self, name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(self, name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, help_text, labels, buckets))
+
+    def collector(self, func):
+        """
+        Daftarkan fungsi yang dipanggil saat scrape (untuk gauge dari cache)
+
+        Fungsi mengembalikan list (metric, value, labels).
+        """
+        self.collectors.append(func)
+        return func
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    # ===== FLUSH & MERGE =====
+
+    def process_id(self):
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    def snapshot(self):
+        snapshot = {}
+        with self.lock:
+            for name, metric in self.metrics.items():
+                series = snapshot[name] = {}
+                for key, value in metric.values.items():
+                    if metric.kind == "histogram":
+                        value = dict(value, buckets=list(value["buckets"]))
+                    series["|".join(key)] = value
+        return snapshot
+
+    def maybe_flush(self):
+        now = time.monotonic()
+        if now - self._last_flush < self.config["FLUSH_INTERVAL"]:
+            return
+        self._last_flush = now
+        self.flush()
+
+    def flush(self):
+        try:
+            self.backend.write(self.process_id(), self.snapshot())
+        except Exception:
+            # Metrics tidak boleh menggagalkan request
+            pass
+
+    def merged(self):
+        """Gabungkan snapshot semua proses: counter & histogram dijumlah"""
+        self.flush()
+        merged = {}
+        for snapshot in self.backend.read_all():
+            for name, series in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                target = merged.setdefault(name, {})
+                for key, value in series.items():
+                    if metric.kind == "histogram":
+                        entry = target.setdefault(key, {
+                            "buckets": [0] * len(metric.buckets), "sum": 0.0, "count": 0,
+                        })
+                        entry["buckets"] = [a + b for a, b in zip(entry["buckets"], value["buckets"])]
+                        entry["sum"] += value["sum"]
+                        entry["count"] += value["count"]
+                    elif metric.kind == "counter":
+                        target[key] = target.get(key, 0) + value
+                    else:
+                        target[key] = value
+        return merged
+
+    # ===== EXPOSITION =====
+
+    def render(self):
+        """Format teks Prometheus (text/plain; version=0.0.4)"""
+        merged = self.merged()
+
+        for func in self.collectors:
+            for metric, value, labels in func():
+                merged.setdefault(metric.name, {})["|".join(metric._key(labels))] = value
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(merged.get(name, {}).items()):
+                labels = self._labels(metric, key)
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{self._fmt_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets, value["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._fmt_labels(labels + [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_bucket{self._fmt_labels(labels + [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{name}_sum{self._fmt_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{self._fmt_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, metric, key):
+        values = key.split("|") if metric.labels else []
+        return list(zip(metric.labels, values))
+
+    def _fmt_labels(self, labels):
+        if not labels:
+            return ""
+        body = ",".join(
+            '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+            for k, v in labels
+        )
+        return "{" + body + "}"
+
+
+registry = MetricsRegistry()
+
+
+def timed(histogram, **labels):
+    """
+    Decorator pencatat durasi fungsi ke histogram
+
+    Usage:
+        @metrics.timed(metrics.SERVICE_SECONDS, method="complete_konsultasi")
+        def complete_konsultasi(...):
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ===== METRIC DEFINITIONS =====
+
+REGISTRASI = registry.counter(
+    "konsultasi_registrasi_total",
+    "Jumlah kunjungan baru yang terdaftar",
+    labels=("tipe", "kategori"),
+)
+
+SELESAI = registry.counter(
+    "konsultasi_selesai_total",
+    "Jumlah kunjungan yang diselesaikan petugas",
+    labels=("jalur",),
+)
+
+DITOLAK = registry.counter(
+    "konsultasi_admission_ditolak_total",
+    "Request publik yang ditolak 429 (rate limit / batas konkurensi)",
+    labels=("scope", "alasan"),
+)
+
+NOTIFIKASI = registry.counter(
+    "konsultasi_notifikasi_total",
+    "Hasil pengiriman pesan outbox",
+    labels=("channel", "hasil"),
+)
+
+SAVE_SECONDS = registry.histogram(
+    "konsultasi_kunjungan_save_seconds",
+    "Durasi Kunjungan.save()",
+    labels=("op",),
+)
+
+SERVICE_SECONDS = registry.histogram(
+    "konsultasi_service_seconds",
+    "Durasi method KunjunganService",
+    labels=("method",),
+)
+
+ANTRIAN_MENUNGGU = registry.gauge(
+    "konsultasi_antrian_menunggu",
+    "Jumlah kunjungan hari ini yang masih menunggu",
+)
+
+
+@registry.collector
+def collect_antrian():
+    """
+    Kedalaman antrian hari ini
+
+    COUNT hanya dijalankan sekali per GAUGE_TTL, bukan setiap scrape
+    (dengan LocMemCache: sekali per GAUGE_TTL per worker).
+    """
+    key = f"{CACHE_PREFIX}:antrian_menunggu"
+    value = cache.get(key)
+    if value is None:
+        from apps.konsultasi.models import Kunjungan
+
+        value = Kunjungan.objects.today().pending().count()
+        cache.set(key, value, registry.config["GAUGE_TTL"])
+    return [(ANTRIAN_MENUNGGU, value, {})]
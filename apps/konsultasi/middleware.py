@@ -0,0 +1,90 @@
+import logging
+import random
+from contextlib import ExitStack
+
+from django.db import connections
+
+from apps.konsultasi import audit, profiling
+
+
+logger = logging.getLogger("apps.konsultasi.profiling")
+
+
+class QueryProfilingMiddleware:
+    """
+    Catat jumlah query, waktu DB, SQL duplikat (N+1) & wall time per view
+
+    - Hanya request yang tersampel (SAMPLE_RATE) yang diprofil,
+      jadi aman dibiarkan aktif di production
+    - Request di atas ambang di-log ke logger "apps.konsultasi.profiling"
+      beserta query bermasalah dan asal pemanggilnya
+    - Ringkasan per endpoint: /admin/profiling/
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = profiling.get_config()
+
+    def __call__(self, request):
+        config = self.config
+        if not config["ENABLED"] or random.random() >= config["SAMPLE_RATE"]:
+            return self.get_response(request)
+
+        profile = profiling.RequestProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        profile.finish()
+
+        self._report(request, profile)
+        return response
+
+    def _report(self, request, profile):
+        config = self.config
+        summary = profile.summary(config)
+        slow = profile.is_slow(summary, config)
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = (match.view_name or match._func_path) if match else request.path
+
+        if slow:
+            logger.warning(
+                "Slow request %s %s: %.0f ms, %d queries (%.0f ms DB)",
+                request.method, endpoint,
+                summary["wall_ms"], summary["queries"], summary["db_ms"],
+                extra={"profile": summary},
+            )
+            for item in summary["duplicates"]:
+                logger.warning(
+                    "  N+1 x%d at %s: %s", item["count"], item["origin"], item["sql"]
+                )
+            for item in summary["slow_queries"]:
+                logger.warning(
+                    "  slow %.0f ms at %s: %s", item["ms"], item["origin"], item["sql"]
+                )
+
+        profiling.record(endpoint, request.method, summary, slow)
+
+
+class AuditMiddleware:
+    """
+    Satu scope audit per request (lihat audit.py): aktor entry = user
+    login (Petugas dicari sekali per request). Request yang mengubah data
+    (selain GET/HEAD/OPTIONS) berjalan di dalam audit.batch(): satu
+    transaksi, semua entry audit ditulis sekali bulk insert sebelum commit.
+    Pasang setelah AuthenticationMiddleware.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit.scope(user=getattr(request, "user", None)):
+            if request.method in self.SAFE_METHODS:
+                return self.get_response(request)
+            with audit.batch():
+                return self.get_response(request)
+
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0003_change_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KunjunganKonten',
+            fields=[
+                ('kunjungan', models.OneToOneField(db_column='id_kunjungan', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='konten', serialize=False, to='konsultasi.kunjungan')),
+                ('pertanyaan', models.TextField(blank=True, help_text='Wajib untuk kategori konsultasi')),
+                ('jawaban', models.TextField(blank=True, help_text='Diisi petugas untuk konsultasi')),
+            ],
+            options={
+                'verbose_name': 'Konten Kunjungan',
+                'verbose_name_plural': 'Konten Kunjungan',
+                'db_table': 'kunjungan_konten',
+            },
+        ),
+        # Pindahkan isi yang ada (hanya baris yang berisi)
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO kunjungan_konten (id_kunjungan, pertanyaan, jawaban)
+                SELECT id_kunjungan, pertanyaan, jawaban FROM kunjungan
+                WHERE pertanyaan <> '' OR jawaban <> ''
+            """,
+            reverse_sql="""
+                UPDATE kunjungan SET
+                    pertanyaan = (SELECT k.pertanyaan FROM kunjungan_konten k
+                                  WHERE k.id_kunjungan = kunjungan.id_kunjungan),
+                    jawaban = (SELECT k.jawaban FROM kunjungan_konten k
+                               WHERE k.id_kunjungan = kunjungan.id_kunjungan)
+                WHERE id_kunjungan IN (SELECT id_kunjungan FROM kunjungan_konten)
+            """,
+        ),
+        migrations.RemoveField(
+            model_name='kunjungan',
+            name='jawaban',
+        ),
+        migrations.RemoveField(
+            model_name='kunjungan',
+            name='pertanyaan',
+        ),
+    ]
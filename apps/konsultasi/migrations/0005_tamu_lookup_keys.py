@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0004_kunjungan_konten'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tamu',
+            name='email_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='tamu',
+            name='no_hp_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+    ]
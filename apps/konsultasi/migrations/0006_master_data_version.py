@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0005_tamu_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MasterDataVersion',
+            fields=[
+                ('id', models.SmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Versi Master Data',
+                'verbose_name_plural': 'Versi Master Data',
+                'db_table': 'master_data_version',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:47
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0008_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KunjunganEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('id_kunjungan', models.BigIntegerField(db_index=True)),
+                ('event', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('complete', 'Complete'), ('reset', 'Reset'), ('delete', 'Delete')], max_length=10)),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Event Kunjungan',
+                'verbose_name_plural': 'Event Kunjungan',
+                'db_table': 'kunjungan_event',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:50
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0009_kunjungan_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model_label', models.CharField(max_length=100)),
+                ('object_pk', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('id_petugas', models.BigIntegerField(blank=True, null=True)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Audit Log',
+                'verbose_name_plural': 'Audit Log',
+                'db_table': 'audit_log',
+                'indexes': [models.Index(fields=['model_label', 'object_pk', 'id'], name='audit_object_idx'), models.Index(fields=['id_petugas', 'created_at'], name='audit_petugas_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0010_audit_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kunjungan',
+            name='client_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:01
+
+import django.db.models.deletion
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def create_default_kantor(apps, schema_editor):
+    # Kunjungan & petugas yang sudah ada masuk kantor 1 (default kolom baru)
+    Kantor = apps.get_model('konsultasi', 'Kantor')
+    Kantor.objects.using(schema_editor.connection.alias).get_or_create(
+        id_kantor=1, defaults={'kode': 'PUSAT', 'nama_kantor': 'Kantor Pusat'},
+    )
+    # id diisi manual: majukan sequence (PostgreSQL) supaya kantor baru mulai dari 2
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [Kantor]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0011_kunjungan_client_uuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Kantor',
+            fields=[
+                ('id_kantor', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('kode', models.CharField(max_length=10, unique=True)),
+                ('nama_kantor', models.CharField(max_length=100)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Kantor',
+                'verbose_name_plural': 'Kantor',
+                'db_table': 'kantor',
+            },
+        ),
+        migrations.RunPython(create_default_kantor, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='NomorSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periode', models.PositiveIntegerField(help_text='YYYYMM')),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequence Nomor',
+                'verbose_name_plural': 'Sequence Nomor',
+                'db_table': 'nomor_sequence',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='kunjungan',
+            name='unique_nomor_kunjungan_per_tanggal',
+        ),
+        migrations.AddField(
+            model_name='kunjungan',
+            name='id_kantor',
+            field=models.ForeignKey(db_column='id_kantor', db_index=False, default=1, on_delete=django.db.models.deletion.PROTECT, related_name='kunjungan', to='konsultasi.kantor'),
+        ),
+        migrations.AddField(
+            model_name='petugas',
+            name='id_kantor',
+            field=models.ForeignKey(db_column='id_kantor', default=1, on_delete=django.db.models.deletion.PROTECT, related_name='petugas', to='konsultasi.kantor'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['id_kantor', 'tanggal_kunjungan', 'id_kunjungan'], name='kunjungan_kantor_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(condition=models.Q(('status_selesai', False)), fields=['id_kantor', 'id_kunjungan'], name='kunjungan_kantor_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='kunjungan',
+            constraint=models.UniqueConstraint(fields=('id_kantor', 'tanggal_kunjungan', 'nomor_kunjungan'), name='unique_nomor_kunjungan_per_kantor'),
+        ),
+        migrations.AddField(
+            model_name='nomorsequence',
+            name='id_kantor',
+            field=models.ForeignKey(db_column='id_kantor', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='konsultasi.kantor'),
+        ),
+        migrations.AddConstraint(
+            model_name='nomorsequence',
+            constraint=models.UniqueConstraint(fields=('id_kantor', 'periode'), name='nomor_sequence_kantor_periode_uniq'),
+        ),
+    ]
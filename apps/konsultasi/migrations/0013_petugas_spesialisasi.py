@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0012_kantor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petugas',
+            name='spesialisasi',
+            field=models.ManyToManyField(blank=True, db_table='petugas_spesialisasi', help_text='Jenis layanan yang ditangani; kosong = semua jenis', related_name='spesialis', to='konsultasi.jenislayanan'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0013_petugas_spesialisasi'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='kunjungan',
+            name='kunjungan_tanggal_b76c4e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='kunjungan',
+            name='kunjungan_id_tipe_2d23a0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='kunjungan',
+            name='kunjungan_id_kate_5bd168_idx',
+        ),
+        migrations.AlterField(
+            model_name='kunjungan',
+            name='id_jenis',
+            field=models.ForeignKey(db_column='id_jenis', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='kunjungan', to='konsultasi.jenislayanan'),
+        ),
+        migrations.AlterField(
+            model_name='kunjungan',
+            name='id_kategori',
+            field=models.ForeignKey(db_column='id_kategori', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='kunjungan', to='konsultasi.kategorilayanan'),
+        ),
+        migrations.AlterField(
+            model_name='kunjungan',
+            name='id_petugas',
+            field=models.ForeignKey(blank=True, db_column='id_petugas', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='kunjungan', to='konsultasi.petugas'),
+        ),
+        migrations.AlterField(
+            model_name='kunjungan',
+            name='id_tipe',
+            field=models.ForeignKey(db_column='id_tipe', db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='kunjungan', to='konsultasi.tipekunjungan'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['tanggal_kunjungan', 'id_kunjungan'], name='kunjungan_tgl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['id_tipe', 'id_kunjungan'], name='kunjungan_tipe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['id_kategori', 'id_kunjungan'], name='kunjungan_kategori_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['id_jenis', 'id_kunjungan'], name='kunjungan_jenis_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(fields=['id_petugas', 'id_kunjungan'], name='kunjungan_petugas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kunjungan',
+            index=models.Index(condition=models.Q(('status_selesai', False)), fields=['id_kunjungan'], name='kunjungan_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0014_kunjungan_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kantor',
+            name='updated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='petugas',
+            name='updated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:31
+
+import apps.konsultasi.db
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('konsultasi', '0015_kantor_petugas_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kunjunganevent',
+            name='txid',
+            field=models.BigIntegerField(db_default=apps.konsultasi.db.CurrentTransactionId(), editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='kunjunganevent',
+            index=models.Index(fields=['txid', 'id'], name='kunjungan_event_txid_idx'),
+        ),
+    ]
@@ -1,7 +1,15 @@
-from django.db import models, transaction
+import time
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from .managers import TamuManager, PetugasManager, KunjunganManager
+from .managers import AuditLogManager, TamuManager, PetugasManager, KunjunganManager
+from . import metrics, periods
+from .db import CurrentTransactionId
+from .normalizers import normalize_email, normalize_phone
 
 
 MONTH_PREFIX = {
@@ -10,6 +18,13 @@ MONTH_PREFIX = {
     9: "SEP", 10: "OKT", 11: "NOV", 12: "DES",
 }
 
+# Field Kunjungan yang disimpan di tabel kunjungan_konten
+KONTEN_FIELDS = {"pertanyaan", "jawaban"}
+
+# Kantor bawaan (dibuat migrasi 0012): data sebelum multi-kantor & default
+# registrasi yang tidak menyebut kantor
+DEFAULT_KANTOR = 1
+
 
 # ===== MASTER DATA =====
 
@@ -102,6 +117,35 @@ class SumberJawaban(models.Model):
         return self.nama_sumber
 
 
+# ===== KANTOR =====
+
+class Kantor(models.Model):
+    """
+    Titik layanan LPSE: nomor kunjungan, antrian & laporan sendiri
+    """
+    id_kantor = models.SmallAutoField(primary_key=True)
+    kode = models.CharField(max_length=10, unique=True)
+    nama_kantor = models.CharField(max_length=100)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "kantor"
+        verbose_name = "Kantor"
+        verbose_name_plural = "Kantor"
+
+    def __str__(self):
+        return self.nama_kantor
+
+    def save(self, *args, **kwargs):
+        """updated_at ikut penanda perubahan API kunjungan (nama_kantor)"""
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        super().save(*args, **kwargs)
+
+
 # ===== AKTOR =====
 
 class Tamu(models.Model):
@@ -111,6 +155,11 @@ class Tamu(models.Model):
     no_hp = models.CharField(max_length=15, blank=True)
     instansi_perusahaan = models.CharField(max_length=150, blank=True)
     alamat = models.TextField(blank=True)
+    # Kunci lookup tamu lama (lihat set_lookup_keys); tidak unik karena
+    # duplikat lama baru dibereskan lewat dedupe_tamu
+    email_normalized = models.CharField(max_length=100, blank=True, editable=False, db_index=True)
+    no_hp_normalized = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
     objects = TamuManager()
 
     class Meta:
@@ -121,6 +170,28 @@ class Tamu(models.Model):
     def __str__(self):
         return self.nama
 
+    def set_lookup_keys(self):
+        """
+        Isi email_normalized & no_hp_normalized dari email / no_hp
+
+        Dipanggil save(); jalur bulk_create/bulk_update harus memanggilnya
+        sendiri.
+        """
+        self.email_normalized = normalize_email(self.email)
+        self.no_hp_normalized = normalize_phone(self.no_hp)
+
+    def save(self, *args, **kwargs):
+        """Set updated_at manual (bukan auto_now) agar fixture lama tetap bisa di-load"""
+        self.updated_at = timezone.now()
+        self.set_lookup_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = {*update_fields, "updated_at"}
+            if update_fields & {"email", "no_hp"}:
+                update_fields |= {"email_normalized", "no_hp_normalized"}
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
 
 class Petugas(models.Model):
     id_petugas = models.BigAutoField(primary_key=True)
@@ -129,6 +200,22 @@ class Petugas(models.Model):
     role = models.CharField(max_length=50)
     is_active = models.BooleanField(default=True)
     ttd_petugas = models.CharField(max_length=255, blank=True)
+    id_kantor = models.ForeignKey(
+        Kantor,
+        on_delete=models.PROTECT,
+        db_column='id_kantor',
+        default=DEFAULT_KANTOR,
+        related_name="petugas"
+    )
+    # Penugasan otomatis (services/assignment.py): kosong = semua jenis
+    spesialisasi = models.ManyToManyField(
+        JenisLayanan,
+        blank=True,
+        db_table="petugas_spesialisasi",
+        related_name="spesialis",
+        help_text="Jenis layanan yang ditangani; kosong = semua jenis"
+    )
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     objects = PetugasManager()
 
@@ -144,6 +231,14 @@ class Petugas(models.Model):
     def __str__(self):
         return self.nama_petugas
 
+    def save(self, *args, **kwargs):
+        """updated_at ikut penanda perubahan API kunjungan (nama_petugas)"""
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        super().save(*args, **kwargs)
+
 
 # ===== MODEL INTI =====
 
@@ -160,6 +255,16 @@ class Kunjungan(models.Model):
     """
     id_kunjungan = models.BigAutoField(primary_key=True)
 
+    # Index sendiri tidak perlu: semua index komposit di Meta diawali id_kantor
+    id_kantor = models.ForeignKey(
+        Kantor,
+        on_delete=models.PROTECT,
+        db_column='id_kantor',
+        default=DEFAULT_KANTOR,
+        db_index=False,
+        related_name="kunjungan"
+    )
+
     nomor_kunjungan = models.CharField(
         max_length=20,
         blank=True,
@@ -174,6 +279,8 @@ class Kunjungan(models.Model):
     )
 
     # === RELASI UTAMA ===
+    # id_tipe / id_kategori / id_jenis / id_petugas: tanpa index FK sendiri,
+    # diganti index komposit (kolom, id_kunjungan) di Meta
     id_tamu = models.ForeignKey(
         Tamu,
         on_delete=models.PROTECT,
@@ -185,6 +292,7 @@ class Kunjungan(models.Model):
         TipeKunjungan,
         on_delete=models.PROTECT,
         db_column='id_tipe',
+        db_index=False,
         related_name="kunjungan"
     )
 
@@ -192,6 +300,7 @@ class Kunjungan(models.Model):
         KategoriLayanan,
         on_delete=models.PROTECT,
         db_column='id_kategori',
+        db_index=False,
         related_name="kunjungan"
     )
 
@@ -199,19 +308,13 @@ class Kunjungan(models.Model):
         JenisLayanan,
         on_delete=models.PROTECT,
         db_column='id_jenis',
+        db_index=False,
         related_name="kunjungan"
     )
 
     # === KONTEN ===
-    pertanyaan = models.TextField(
-        blank=True,
-        help_text="Wajib untuk kategori konsultasi"
-    )
-
-    jawaban = models.TextField(
-        blank=True,
-        help_text="Diisi petugas untuk konsultasi"
-    )
+    # pertanyaan & jawaban ada di tabel kunjungan_konten (KunjunganKonten),
+    # diakses lewat property di bawah supaya baris utama tetap kecil
 
     # === RELASI KONSULTASI ===
     id_media = models.ForeignKey(
@@ -245,6 +348,7 @@ class Kunjungan(models.Model):
         db_column='id_petugas',
         null=True,
         blank=True,
+        db_index=False,
         related_name="kunjungan"
     )
 
@@ -252,6 +356,13 @@ class Kunjungan(models.Model):
     status_selesai = models.BooleanField(default=False)
     waktu_selesai = models.DateTimeField(null=True, blank=True)
 
+    # === CHANGE TRACKING (incremental backup) ===
+    updated_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    # === SYNC KIOSK ===
+    # UUID dari kiosk (registrasi offline); unik -> upload ulang idempoten
+    client_uuid = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
     objects = KunjunganManager()
 
     class Meta:
@@ -260,19 +371,90 @@ class Kunjungan(models.Model):
         verbose_name_plural = "Kunjungan"
         ordering = ["-id_kunjungan"]
         indexes = [
-            models.Index(fields=['tanggal_kunjungan']),
+            # Filter satu kolom + urut -id_kunjungan (Meta.ordering): index
+            # komposit supaya halaman list tanpa sort. SQLite sudah menyimpan
+            # rowid di setiap index, PostgreSQL perlu kolom id_kunjungan eksplisit
+            models.Index(fields=['tanggal_kunjungan', 'id_kunjungan'], name='kunjungan_tgl_idx'),
+            models.Index(fields=['id_tipe', 'id_kunjungan'], name='kunjungan_tipe_idx'),
+            models.Index(fields=['id_kategori', 'id_kunjungan'], name='kunjungan_kategori_idx'),
+            models.Index(fields=['id_jenis', 'id_kunjungan'], name='kunjungan_jenis_idx'),
+            # IS NULL juga memakai index ini (unassigned)
+            models.Index(fields=['id_petugas', 'id_kunjungan'], name='kunjungan_petugas_idx'),
             models.Index(fields=['status_selesai']),
+            # Antrian menunggu semua kantor: partial index, hanya baris belum selesai
+            models.Index(
+                fields=['id_kunjungan'],
+                condition=models.Q(status_selesai=False),
+                name='kunjungan_pending_idx'
+            ),
             models.Index(fields=['id_kunjungan']),
-            models.Index(fields=['id_tipe']),
-            models.Index(fields=['id_kategori']),
+            # Per kantor: list/laporan (rentang tanggal, urut tanggal & id)
+            models.Index(
+                fields=['id_kantor', 'tanggal_kunjungan', 'id_kunjungan'],
+                name='kunjungan_kantor_tgl_idx'
+            ),
+            # Per kantor: antrian menunggu (urut id). Partial index: hanya
+            # baris belum selesai, dan cocok dengan filter NOT status_selesai
+            models.Index(
+                fields=['id_kantor', 'id_kunjungan'],
+                condition=models.Q(status_selesai=False),
+                name='kunjungan_kantor_pending_idx'
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
-                fields=["tanggal_kunjungan", "nomor_kunjungan"],
-                name="unique_nomor_kunjungan_per_tanggal"
+                fields=["id_kantor", "tanggal_kunjungan", "nomor_kunjungan"],
+                name="unique_nomor_kunjungan_per_kantor"
             )
         ]
 
+    # ===== KONTEN (tabel kunjungan_konten) =====
+    def _cached_konten(self):
+        """Konten yang sudah dimuat/di-set (tanpa query)"""
+        return self._meta.get_field("konten").get_cached_value(self, None)
+
+    def _get_konten(self):
+        """
+        Konten konsultasi, dimuat saat pertama diakses (1 query)
+
+        Jika belum ada baris konten, dibuat instance baru di memori;
+        baru disimpan oleh save() jika berisi.
+        """
+        try:
+            return self.konten
+        except KunjunganKonten.DoesNotExist:
+            konten = KunjunganKonten(kunjungan=self)
+            self.konten = konten
+            return konten
+
+    @property
+    def pertanyaan(self):
+        return self._get_konten().pertanyaan
+
+    @pertanyaan.setter
+    def pertanyaan(self, value):
+        self._get_konten().pertanyaan = value
+        self._konten_dirty = True
+
+    @property
+    def jawaban(self):
+        return self._get_konten().jawaban
+
+    @jawaban.setter
+    def jawaban(self, value):
+        self._get_konten().jawaban = value
+        self._konten_dirty = True
+
+    def _save_konten(self, using=None):
+        konten = self._cached_konten()
+        if konten is None or not getattr(self, "_konten_dirty", False):
+            return
+        if konten._state.adding and not (konten.pertanyaan or konten.jawaban):
+            return
+        konten.kunjungan = self
+        konten.save(using=using)
+        self._konten_dirty = False
+
     # ===== HELPER PROPERTIES =====
     @property
     def is_konsultasi(self):
@@ -326,40 +508,79 @@ class Kunjungan(models.Model):
             if errors:
                 raise ValidationError(errors)
 
+    # ===== NOMOR KUNJUNGAN =====
+    @classmethod
+    def reserve_nomor(cls, tanggal, count=1, kantor=DEFAULT_KANTOR):
+        """
+        Ambil `count` nomor kunjungan berurutan untuk bulan `tanggal` di `kantor`
+
+        Counter per (kantor, bulan) di tabel nomor_sequence: yang dikunci
+        hanya baris itu, jadi registrasi di kantor lain tidak ikut antri.
+        Dipakai save() (count=1) dan import massal (satu blok per bulan).
+        Wajib dipanggil di dalam transaction.atomic agar lock berlaku
+        sampai baris baru tersimpan.
+
+        Returns:
+            list: ["DES0001", "DES0002", ...]
+        """
+        prefix = MONTH_PREFIX.get(tanggal.month, "XXX")
+        first = NomorSequence.advance(getattr(kantor, "pk", kantor), tanggal, count)
+        return [f"{prefix}{number:04d}" for number in range(first, first + count)]
+
+    @classmethod
+    def last_nomor_number(cls, kantor, tanggal):
+        """
+        Nomor terakhir yang sudah terpakai di bulan `tanggal` (0 jika belum ada)
+
+        Hanya untuk mengisi counter nomor_sequence pertama kali per
+        (kantor, bulan), mis. data sebelum multi-kantor.
+        """
+        prefix = MONTH_PREFIX.get(tanggal.month, "XXX")
+        last = (
+            cls.objects
+            .filter(
+                id_kantor=kantor,
+                **periods.month_of(tanggal).lookup(),
+                nomor_kunjungan__startswith=prefix
+            )
+            .order_by("-id_kunjungan")
+            .values_list("nomor_kunjungan", flat=True)
+            .first()
+        )
+        try:
+            return int(last.replace(prefix, "")) if last else 0
+        except (ValueError, TypeError):
+            return 0
+
     # ===== SAVE =====
     @transaction.atomic
-    def save(self, skip_validation=False, *args, **kwargs):
+    def save(self, skip_validation=False, *args, event=None, **kwargs):
         """
         Override save untuk:
         1. Auto-generate nomor kunjungan
         2. Auto-set media tatap muka untuk offline konsultasi
         3. Auto-set waktu selesai
+        4. Update updated_at (watermark backup incremental)
+        5. Simpan konten (pertanyaan/jawaban) jika berubah
+        6. Catat event change feed (default create/update; service
+           mengirim event="complete"/"reset")
+        7. Catat metrics (durasi save & jumlah registrasi)
         """
-        # 1. Generate nomor kunjungan
-        if not self.nomor_kunjungan:
-            tanggal = self.tanggal_kunjungan or timezone.now().date()
-            prefix = MONTH_PREFIX.get(tanggal.month, "XXX")
-
-            last = (
-                Kunjungan.objects
-                .select_for_update()
-                .filter(
-                    tanggal_kunjungan__year=tanggal.year,
-                    tanggal_kunjungan__month=tanggal.month,
-                    nomor_kunjungan__startswith=prefix
-                )
-                .order_by("-id_kunjungan")
-                .first()
-            )
+        from apps.konsultasi.services import changefeed
 
-            last_number = 0
-            if last and last.nomor_kunjungan:
-                try:
-                    last_number = int(last.nomor_kunjungan.replace(prefix, ""))
-                except (ValueError, TypeError):
-                    last_number = 0
+        started = time.perf_counter()
+        is_new = self._state.adding
 
-            self.nomor_kunjungan = f"{prefix}{last_number + 1:04d}"
+        # default=timezone.now memberi datetime UTC: jadikan tanggal lokal
+        # dulu supaya nomor & tanggal tersimpan jatuh di bulan yang sama
+        if isinstance(self.tanggal_kunjungan, datetime):
+            value = self.tanggal_kunjungan
+            self.tanggal_kunjungan = timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+        # 1. Generate nomor kunjungan
+        if not self.nomor_kunjungan:
+            tanggal = self.tanggal_kunjungan or periods.local_today()
+            self.nomor_kunjungan = Kunjungan.reserve_nomor(tanggal, kantor=self.id_kantor_id)[0]
 
         # 2. Auto-set media "Tatap Muka" untuk offline konsultasi
         if self.is_offline and self.is_konsultasi and self.status_selesai:
@@ -376,11 +597,335 @@ class Kunjungan(models.Model):
         if self.status_selesai and not self.waktu_selesai:
             self.waktu_selesai = timezone.now()
 
+        # 4. Tandai perubahan untuk backup incremental
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        save_konten = True
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            save_konten = bool(update_fields & KONTEN_FIELDS)
+            kwargs["update_fields"] = (update_fields - KONTEN_FIELDS) | {"updated_at"}
+
         # Validasi sebelum save
         if not skip_validation:
             self.full_clean()
 
         super().save(*args, **kwargs)
 
+        # 5. Konten di tabel terpisah
+        if save_konten:
+            self._save_konten(using=kwargs.get("using"))
+
+        # 6. Change feed
+        changefeed.record(self, event or ("create" if is_new else "update"), using=kwargs.get("using"))
+
+        # 7. Metrics (registrasi dihitung setelah commit)
+        metrics.SAVE_SECONDS.observe(
+            time.perf_counter() - started, op="create" if is_new else "update"
+        )
+        if is_new:
+            tipe, kategori = self.id_tipe_id, self.id_kategori_id
+            transaction.on_commit(
+                lambda: metrics.REGISTRASI.inc(tipe=tipe, kategori=kategori)
+            )
+
+    def __str__(self):
+        return f"{self.nomor_kunjungan} - {self.id_tamu.nama}"
+
+
+class KunjunganKonten(models.Model):
+    """
+    Isi konsultasi (pertanyaan & jawaban) terpisah dari baris kunjungan
+
+    TextField panjang tidak ikut terbaca di list, export, laporan, dan
+    select_for_update penomoran. Dimuat hanya di halaman detail
+    (Kunjungan.objects.with_konten()) atau saat property diakses.
+    Baris hanya dibuat jika ada isinya.
+    """
+    kunjungan = models.OneToOneField(
+        Kunjungan,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        db_column='id_kunjungan',
+        related_name="konten"
+    )
+
+    pertanyaan = models.TextField(
+        blank=True,
+        help_text="Wajib untuk kategori konsultasi"
+    )
+
+    jawaban = models.TextField(
+        blank=True,
+        help_text="Diisi petugas untuk konsultasi"
+    )
+
+    class Meta:
+        db_table = "kunjungan_konten"
+        verbose_name = "Konten Kunjungan"
+        verbose_name_plural = "Konten Kunjungan"
+
+    def __str__(self):
+        return f"Konten {self.kunjungan_id}"
+
+    @classmethod
+    def bulk_create_for(cls, kunjungan_list, batch_size=None):
+        """
+        Simpan konten dari instance Kunjungan hasil bulk_create
+
+        bulk_create tidak memanggil save(), jadi konten yang di-set lewat
+        property (Kunjungan(pertanyaan=...)) disimpan di sini.
+        """
+        rows = []
+        for kunjungan in kunjungan_list:
+            konten = kunjungan._cached_konten()
+            if konten is not None and (konten.pertanyaan or konten.jawaban):
+                konten.kunjungan = kunjungan
+                rows.append(konten)
+        return cls.objects.bulk_create(rows, batch_size=batch_size)
+
+
+# ===== PENOMORAN =====
+
+class NomorSequence(models.Model):
+    """
+    Counter nomor kunjungan per (kantor, bulan)
+
+    Satu baris = satu lock penomoran: UPDATE baris ini mengunci sampai
+    transaksi registrasi commit, tanpa menyentuh tabel kunjungan. Baris
+    dibuat saat nomor pertama bulan itu diminta, diisi dari nomor terakhir
+    yang sudah ada (Kunjungan.last_nomor_number).
+    """
+    id_kantor = models.ForeignKey(
+        Kantor,
+        on_delete=models.CASCADE,
+        db_column='id_kantor',
+        related_name="+"
+    )
+    periode = models.PositiveIntegerField(help_text="YYYYMM")
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "nomor_sequence"
+        verbose_name = "Sequence Nomor"
+        verbose_name_plural = "Sequence Nomor"
+        constraints = [
+            models.UniqueConstraint(fields=["id_kantor", "periode"], name="nomor_sequence_kantor_periode_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.id_kantor_id}/{self.periode}: {self.last_number}"
+
+    @classmethod
+    def advance(cls, kantor_id, tanggal, count=1):
+        """
+        Naikkan counter sebanyak `count` (di transaksi pemanggil)
+
+        UPDATE dulu baru SELECT: write lock diambil di statement pertama
+        (SQLite tidak perlu upgrade read -> write lock, PostgreSQL mengunci
+        baris sampai commit).
+
+        Returns:
+            int: nomor pertama dari blok
+        """
+        periode = tanggal.year * 100 + tanggal.month
+        sequence = cls.objects.filter(id_kantor_id=kantor_id, periode=periode)
+        if not sequence.update(last_number=F("last_number") + count):
+            start = Kunjungan.last_nomor_number(kantor_id, tanggal)
+            try:
+                with transaction.atomic():
+                    cls.objects.create(id_kantor_id=kantor_id, periode=periode, last_number=start + count)
+                return start + 1
+            except IntegrityError:
+                # Registrasi paralel sudah membuat baris bulan ini
+                sequence.update(last_number=F("last_number") + count)
+        return sequence.values_list("last_number", flat=True).get() - count + 1
+
+
+# ===== CHANGE TRACKING =====
+
+class KunjunganEvent(models.Model):
+    """
+    Change feed kunjungan (append-only), dibaca sistem lain per cursor
+
+    id = cursor yang selalu naik. data berisi snapshot field kunjungan
+    (pertanyaan/jawaban hanya jika ikut dimuat/diubah). Lihat
+    services/changefeed.py.
+    """
+    EVENT_CHOICES = [
+        ("create", "Create"),
+        ("update", "Update"),
+        ("complete", "Complete"),
+        ("reset", "Reset"),
+        ("delete", "Delete"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    id_kunjungan = models.BigIntegerField(db_index=True)
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Transaksi penulis (PostgreSQL; NULL di SQLite): urutan baca aman-commit
+    txid = models.BigIntegerField(null=True, editable=False, db_default=CurrentTransactionId())
+
+    class Meta:
+        db_table = "kunjungan_event"
+        verbose_name = "Event Kunjungan"
+        verbose_name_plural = "Event Kunjungan"
+        indexes = [
+            models.Index(fields=["txid", "id"], name="kunjungan_event_txid_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.event} kunjungan {self.id_kunjungan}"
+
+
+class Tombstone(models.Model):
+    """
+    Catatan baris yang dihapus, dipakai backup incremental
+
+    Diisi otomatis lewat signal post_delete (lihat signals.py).
+    """
+    model_label = models.CharField(max_length=100)
+    object_pk = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "tombstone"
+        verbose_name = "Tombstone"
+        verbose_name_plural = "Tombstone"
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_pk}"
+
+
+class AuditLog(models.Model):
+    """
+    Audit trail append-only: diff per field {field: [lama, baru]}
+
+    Ditulis apps/konsultasi/audit.py dari semua jalur tulis (save, delete,
+    queryset.update lewat changefeed.update_queryset, merge tamu) di
+    transaksi yang sama dengan perubahannya. id_petugas = petugas yang login (username sama)
+    atau petugas kunjungan; sengaja bukan FK agar log tetap utuh.
+    """
+    ACTION_CHOICES = [
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    model_label = models.CharField(max_length=100)
+    object_pk = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    id_petugas = models.BigIntegerField(null=True, blank=True)
+    username = models.CharField(max_length=150, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = AuditLogManager()
+
+    class Meta:
+        db_table = "audit_log"
+        verbose_name = "Audit Log"
+        verbose_name_plural = "Audit Log"
+        indexes = [
+            # Riwayat satu objek: WHERE model_label=? AND object_pk=? ORDER BY id
+            models.Index(fields=["model_label", "object_pk", "id"], name="audit_object_idx"),
+            # Aktivitas petugas: WHERE id_petugas=? AND created_at range
+            models.Index(fields=["id_petugas", "created_at"], name="audit_petugas_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_pk} {self.action}"
+
+
+class MasterDataVersion(models.Model):
+    """
+    Counter perubahan master data (tipe, kategori, jenis, media, sumber)
+
+    Satu baris; dinaikkan lewat signal save/delete master data dan dipakai
+    sebagai versi/ETag dokumen JSON master data (services/master_data.py).
+    """
+    id = models.SmallIntegerField(primary_key=True, default=1)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "master_data_version"
+        verbose_name = "Versi Master Data"
+        verbose_name_plural = "Versi Master Data"
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Hasil submit yang sudah diproses, per kunci dari klien (header Idempotency-Key)
+
+    Retry / double-tap dengan kunci yang sama mengembalikan hasil awal tanpa
+    save ulang (lihat services/idempotency.py). Baris kedaluwarsa dihapus
+    command purge_idempotency.
+    """
+    scope = models.CharField(max_length=40)
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=32)
+    response = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "idempotency_key"
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Key"
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="idempotency_scope_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+# ===== OUTBOX =====
+
+class Outbox(models.Model):
+    """
+    Pesan keluar (notifikasi) yang ditulis dalam transaksi yang sama
+    dengan perubahan datanya
+
+    Dikirim di luar request oleh command drain_outbox (lihat
+    services/outbox.py); gagal -> dicoba lagi dengan backoff.
+    """
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Menunggu"),
+        (STATUS_SENT, "Terkirim"),
+        (STATUS_FAILED, "Gagal"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=50)
+    channel = models.CharField(max_length=20)
+    recipient = models.CharField(max_length=150)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "outbox"
+        verbose_name = "Outbox"
+        verbose_name_plural = "Outbox"
+        indexes = [
+            # Antrian drain: WHERE status='pending' AND available_at <= now ORDER BY available_at
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.nomor_kunjungan} - {self.id_tamu.nama}"
\ No newline at end of file
+        return f"{self.topic} -> {self.channel}:{self.recipient} ({self.status})"
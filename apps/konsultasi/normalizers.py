@@ -0,0 +1,119 @@
+"""
+Normalisasi data kontak & nama
+
+Dipakai import massal, pencarian tamu lama, dan deteksi duplikat
+supaya semua jalur membandingkan kontak dengan aturan yang sama.
+"""
+
+import re
+
+
+_NON_DIGIT = re.compile(r"\D+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_email(value):
+    """
+    Lowercase + trim email
+
+    Usage:
+        normalize_email(" Budi@Mail.COM ")  # "budi@mail.com"
+    """
+    if not value:
+        return ""
+    return value.strip().lower()
+
+
+def normalize_phone(value, country_code="62"):
+    """
+    Normalisasi nomor HP ke format E.164 (tanpa validasi operator)
+
+    Usage:
+        normalize_phone("0812-3456-789")   # "+628123456789"
+        normalize_phone("+62 812 3456789") # "+628123456789"
+        normalize_phone("812 3456 789")    # "+628123456789"
+    """
+    if not value:
+        return ""
+    digits = _NON_DIGIT.sub("", value)
+    if not digits:
+        return ""
+    if digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = country_code + digits[1:]
+    elif not digits.startswith(country_code):
+        digits = country_code + digits
+    return f"+{digits}"
+
+
+def normalize_name(value):
+    """Lowercase + rapikan spasi, untuk pencocokan nama master data/tamu"""
+    if not value:
+        return ""
+    return _SPACES.sub(" ", value.strip().lower())
+
+
+_NON_ALPHA = re.compile(r"[^a-z]+")
+_VOWELS = re.compile(r"[aiueo]")
+_REPEAT = re.compile(r"(.)\1+")
+
+# Ejaan lama -> baru & variasi ejaan nama yang umum (urutan penting)
+_SPELLING = (
+    ("dj", "j"), ("tj", "c"), ("sj", "sy"), ("oe", "u"),
+    ("ch", "k"), ("kh", "k"), ("c", "k"), ("q", "k"),
+    ("ph", "f"), ("v", "f"), ("z", "s"), ("j", "y"), ("y", "i"),
+)
+
+_NAME_TITLES = frozenset(
+    "bapak bpk ibu pak bu sdr sdri h hj ir dr drs dra prof st se sh mm mt "
+    "spd skom amd ssi sag mpd".split()
+)
+
+_NAME_ALIASES = {
+    "muhammad": "m", "muhamad": "m", "mohammad": "m", "mohamad": "m",
+    "mohd": "m", "moh": "m", "muh": "m", "mhd": "m",
+}
+
+
+def phonetic_name(value):
+    """
+    Kunci fonetik nama untuk blocking deteksi tamu ganda
+
+    Ejaan lama (dj/tj/oe/j), variasi huruf (ch/kh/c/k, v/f, z/s), gelar,
+    dan singkatan Muhammad disamakan; gelar di belakang koma diabaikan;
+    vokal setelah huruf pertama dibuang.
+
+    Usage:
+        phonetic_name("Djoko Soesanto, S.Kom")  # "ik snt"
+        phonetic_name("Joko Susanto")           # "ik snt"
+    """
+    if not value:
+        return ""
+    name = _NON_ALPHA.sub(" ", normalize_name(value.split(",", 1)[0]))
+    for old, new in _SPELLING:
+        name = name.replace(old, new)
+
+    keys = []
+    for token in name.split():
+        if token in _NAME_TITLES:
+            continue
+        token = _NAME_ALIASES.get(token, token)
+        if len(token) > 2 and token.endswith("h"):
+            token = token[:-1]
+        keys.append(_REPEAT.sub(r"\1", token[0] + _VOWELS.sub("", token[1:])))
+    return " ".join(keys)
+
+
+def email_local_key(value):
+    """
+    Bagian lokal email tanpa titik & sufiks +tag, untuk blocking
+
+    Usage:
+        email_local_key("Budi.Santoso+lpse@gmail.com")  # "budisantoso"
+    """
+    email = normalize_email(value)
+    if "@" not in email:
+        return ""
+    local = email.split("@", 1)[0].split("+", 1)[0]
+    return local.replace(".", "")
@@ -0,0 +1,84 @@
+"""
+Backend pengiriman notifikasi untuk outbox
+
+Satu backend per channel, dipilih lewat settings.KONSULTASI_NOTIFICATIONS:
+    BACKENDS   - {channel: dotted path class backend}
+    FROM_EMAIL - pengirim email (default settings.DEFAULT_FROM_EMAIL)
+
+Backend menerima satu pesan outbox dan raise exception jika gagal;
+drain_outbox yang mengatur retry & backoff. Lokal cukup EmailBackend
+dengan EMAIL_BACKEND console/file Django, dan ConsoleBackend sebagai
+pengganti WhatsApp gateway.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger("apps.konsultasi.notifications")
+
+DEFAULTS = {
+    "BACKENDS": {
+        "email": "apps.konsultasi.notifications.EmailBackend",
+        "whatsapp": "apps.konsultasi.notifications.ConsoleBackend",
+    },
+    "FROM_EMAIL": None,
+}
+
+_backends = {}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_NOTIFICATIONS", {}))
+    return config
+
+
+def get_backend(channel):
+    """Instance backend untuk channel (di-cache per proses)"""
+    path = get_config()["BACKENDS"].get(channel)
+    if not path:
+        raise LookupError(f"Tidak ada backend notifikasi untuk channel {channel!r}")
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+def render(message):
+    """
+    Subjek & isi teks untuk satu pesan outbox
+
+    Returns:
+        tuple: (subject, body)
+    """
+    payload = message.payload
+    if message.topic == "konsultasi.selesai":
+        subject = f"Jawaban konsultasi {payload['nomor_kunjungan']}"
+        body = (
+            f"Yth. {payload['nama']},\n\n"
+            f"Pertanyaan Anda:\n{payload['pertanyaan']}\n\n"
+            f"Jawaban petugas:\n{payload['jawaban']}\n\n"
+            f"Nomor kunjungan: {payload['nomor_kunjungan']}\n"
+        )
+        return subject, body
+    return message.topic, str(payload)
+
+
+class EmailBackend:
+    """Kirim lewat django.core.mail (EMAIL_BACKEND menentukan SMTP/console/file)"""
+
+    def send(self, message):
+        subject, body = render(message)
+        from_email = get_config()["FROM_EMAIL"] or settings.DEFAULT_FROM_EMAIL
+        send_mail(subject, body, from_email, [message.recipient], fail_silently=False)
+
+
+class ConsoleBackend:
+    """Tulis pesan ke log (pengganti gateway WhatsApp/SMS saat development)"""
+
+    def send(self, message):
+        subject, body = render(message)
+        logger.info("[%s -> %s] %s\n%s", message.channel, message.recipient, subject, body)
@@ -0,0 +1,109 @@
+"""
+Helper kalender: periode -> rentang setengah terbuka [start, end)
+
+Semua periode dihitung di timezone lokal (settings.TIME_ZONE,
+Asia/Jakarta), bukan tanggal UTC. Filter dibuat sebagai range pada kolom
+ber-index (tanggal_kunjungan >= start AND tanggal_kunjungan < end),
+jadi tidak ada fungsi EXTRACT/date_extract yang membungkus kolom.
+
+Usage:
+    from apps.konsultasi import periods
+
+    Kunjungan.objects.filter(**periods.month(2025, 12).lookup())
+    Kunjungan.objects.in_period(periods.week())
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+from django.utils import timezone
+
+
+class Period(NamedTuple):
+    """Rentang tanggal [start, end) - end tidak termasuk"""
+
+    start: date
+    end: date
+
+    def __contains__(self, value):
+        return self.start <= value < self.end
+
+    @property
+    def last_day(self):
+        """Tanggal terakhir (inklusif), untuk tampilan"""
+        return self.end - timedelta(days=1)
+
+    def lookup(self, field="tanggal_kunjungan"):
+        """kwargs filter untuk DateField"""
+        return {f"{field}__gte": self.start, f"{field}__lt": self.end}
+
+    def datetime_lookup(self, field):
+        """
+        kwargs filter untuk DateTimeField (mis. waktu_selesai)
+
+        Batas dihitung sebagai tengah malam lokal lalu dibuat aware.
+        """
+        tz = timezone.get_current_timezone()
+        return {
+            f"{field}__gte": timezone.make_aware(datetime.combine(self.start, time.min), tz),
+            f"{field}__lt": timezone.make_aware(datetime.combine(self.end, time.min), tz),
+        }
+
+
+def local_today():
+    """Tanggal hari ini di timezone lokal (bukan timezone.now().date() yang UTC)"""
+    return timezone.localdate()
+
+
+def day(value=None):
+    value = value or local_today()
+    return Period(value, value + timedelta(days=1))
+
+
+def week(value=None):
+    """Minggu ISO (Senin s/d Minggu) yang memuat `value`"""
+    value = value or local_today()
+    start = value - timedelta(days=value.weekday())
+    return Period(start, start + timedelta(days=7))
+
+
+def iso_week(year, week_number):
+    start = date.fromisocalendar(year, week_number, 1)
+    return Period(start, start + timedelta(days=7))
+
+
+def month(year=None, month_number=None):
+    """Bulan kalender; default bulan berjalan"""
+    if year is None or month_number is None:
+        today = local_today()
+        year = year or today.year
+        month_number = month_number or today.month
+    start = date(year, month_number, 1)
+    end = date(year + 1, 1, 1) if month_number == 12 else date(year, month_number + 1, 1)
+    return Period(start, end)
+
+
+def month_of(value):
+    return month(value.year, value.month)
+
+
+def quarter(year=None, quarter_number=None):
+    """Kuartal 1-4; default kuartal berjalan"""
+    if year is None or quarter_number is None:
+        today = local_today()
+        year = year or today.year
+        quarter_number = quarter_number or (today.month - 1) // 3 + 1
+    first_month = (quarter_number - 1) * 3 + 1
+    start = date(year, first_month, 1)
+    end = date(year + 1, 1, 1) if quarter_number == 4 else date(year, first_month + 3, 1)
+    return Period(start, end)
+
+
+def year(year_number=None):
+    year_number = year_number or local_today().year
+    return Period(date(year_number, 1, 1), date(year_number + 1, 1, 1))
+
+
+def between(start, end):
+    """Rentang inklusif start..end (seperti filter by_date_range) sebagai [start, end+1)"""
+    return Period(start, end + timedelta(days=1))
@@ -0,0 +1,220 @@
+"""
+Profiling query & latency per request
+
+Dipakai QueryProfilingMiddleware (middleware.py) dan halaman
+ringkasan di admin (views.profiling_report).
+
+Konfigurasi lewat settings.KONSULTASI_PROFILING:
+    ENABLED             - aktif/nonaktif (default: True)
+    SAMPLE_RATE         - 0.0-1.0, porsi request yang diprofil
+    SLOW_REQUEST_MS     - ambang waktu request untuk di-log
+    SLOW_QUERY_MS       - ambang waktu satu query untuk di-log
+    MAX_QUERIES         - ambang jumlah query per request
+    DUPLICATE_THRESHOLD - fingerprint yang muncul >= N kali dianggap N+1
+                          (batch bulk_create / executemany tidak dihitung)
+"""
+
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SAMPLE_RATE": 1.0,
+    "SLOW_REQUEST_MS": 500,
+    "SLOW_QUERY_MS": 100,
+    "MAX_QUERIES": 50,
+    "DUPLICATE_THRESHOLD": 3,
+}
+
+CACHE_KEY_ENDPOINTS = "konsultasi:profiling:endpoints"
+CACHE_KEY_SLOW = "konsultasi:profiling:slow"
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+MAX_SLOW_ENTRIES = 50
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+# INSERT ... VALUES (...), (...): satu batch bulk_create berisi beberapa baris
+_MULTI_ROW = re.compile(r"\bVALUES\s*\([^()]*\)\s*,\s*\(", re.IGNORECASE)
+
+_PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+_SKIP_FILES = (__file__, str(Path(__file__).with_name("middleware.py")))
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_PROFILING", {}))
+    return config
+
+
+def fingerprint(sql):
+    """
+    Normalisasi SQL supaya query yang sama dengan parameter berbeda
+    menghasilkan fingerprint yang sama (deteksi N+1)
+    """
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING.sub("?", sql)
+    return _NUMBER.sub("?", sql)
+
+
+def is_batch(sql, many=False):
+    """
+    Query bagian dari tulis massal (executemany atau INSERT multi-baris):
+    berulang per batch memang disengaja, bukan N+1
+    """
+    return bool(many or _MULTI_ROW.search(sql))
+
+
+def stack_origin():
+    """
+    Frame kode proyek pertama (bukan Django/site-packages) yang memicu query
+
+    Memakai sys._getframe, jauh lebih murah dari traceback.extract_stack.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and "site-packages" not in filename
+            and filename not in _SKIP_FILES
+        ):
+            relative = filename[len(_PROJECT_ROOT):].lstrip("/\\")
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "-"
+
+
+class RequestProfile:
+    """
+    Kumpulkan query satu request lewat connection.execute_wrapper
+
+    Usage:
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            ...
+        summary = profile.summary(config)
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.started = time.perf_counter()
+        self.wall_ms = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((
+                sql,
+                (time.perf_counter() - started) * 1000,
+                stack_origin(),
+                is_batch(sql, many),
+            ))
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+
+    def summary(self, config):
+        """Ringkasan request + daftar query bermasalah"""
+        counts = Counter()
+        origins = {}
+        for sql, _, origin, batch in self.queries:
+            if batch:
+                continue
+            key = fingerprint(sql)
+            counts[key] += 1
+            origins.setdefault(key, origin)
+
+        duplicates = [
+            {"sql": key, "count": count, "origin": origins[key]}
+            for key, count in counts.most_common()
+            if count >= config["DUPLICATE_THRESHOLD"]
+        ]
+        slow_queries = [
+            {"sql": sql, "ms": round(ms, 2), "origin": origin}
+            for sql, ms, origin, _ in self.queries
+            if ms >= config["SLOW_QUERY_MS"]
+        ]
+
+        return {
+            "queries": len(self.queries),
+            "db_ms": round(sum(query[1] for query in self.queries), 2),
+            "wall_ms": round(self.wall_ms or 0, 2),
+            "duplicates": duplicates,
+            "slow_queries": slow_queries,
+        }
+
+    def is_slow(self, summary, config):
+        return bool(
+            summary["wall_ms"] >= config["SLOW_REQUEST_MS"]
+            or summary["queries"] >= config["MAX_QUERIES"]
+            or summary["duplicates"]
+            or summary["slow_queries"]
+        )
+
+
+# ===== STORAGE (cache) =====
+
+def record(endpoint, method, summary, slow):
+    """
+    Akumulasi statistik per endpoint di cache
+
+    NOTE: read-modify-write tanpa lock; di multi-worker beberapa sampel
+    bisa hilang, cukup untuk tujuan ringkasan.
+    """
+    endpoints = cache.get(CACHE_KEY_ENDPOINTS) or {}
+    stats = endpoints.setdefault(endpoint, {
+        "requests": 0,
+        "wall_ms_total": 0.0,
+        "wall_ms_max": 0.0,
+        "db_ms_total": 0.0,
+        "queries_total": 0,
+        "queries_max": 0,
+        "slow": 0,
+    })
+    stats["requests"] += 1
+    stats["wall_ms_total"] += summary["wall_ms"]
+    stats["wall_ms_max"] = max(stats["wall_ms_max"], summary["wall_ms"])
+    stats["db_ms_total"] += summary["db_ms"]
+    stats["queries_total"] += summary["queries"]
+    stats["queries_max"] = max(stats["queries_max"], summary["queries"])
+    stats["slow"] += int(slow)
+    cache.set(CACHE_KEY_ENDPOINTS, endpoints, CACHE_TIMEOUT)
+
+    if slow:
+        entries = cache.get(CACHE_KEY_SLOW) or []
+        entries.insert(0, dict(summary, endpoint=endpoint, method=method, at=time.time()))
+        cache.set(CACHE_KEY_SLOW, entries[:MAX_SLOW_ENTRIES], CACHE_TIMEOUT)
+
+
+def worst_endpoints(limit=20, order_by="wall_ms_avg"):
+    """Endpoint terburuk untuk halaman ringkasan admin"""
+    rows = []
+    for endpoint, stats in (cache.get(CACHE_KEY_ENDPOINTS) or {}).items():
+        requests = stats["requests"] or 1
+        rows.append(dict(
+            stats,
+            endpoint=endpoint,
+            wall_ms_avg=round(stats["wall_ms_total"] / requests, 2),
+            db_ms_avg=round(stats["db_ms_total"] / requests, 2),
+            queries_avg=round(stats["queries_total"] / requests, 1),
+        ))
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit]
+
+
+def recent_slow_requests():
+    return cache.get(CACHE_KEY_SLOW) or []
+
+
+def reset():
+    cache.delete_many([CACHE_KEY_ENDPOINTS, CACHE_KEY_SLOW])
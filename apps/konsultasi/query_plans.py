@@ -0,0 +1,229 @@
+"""
+Inspeksi query plan (EXPLAIN) untuk method KunjunganQuerySet
+
+Setiap method manager dijalankan sebagai query halaman list (LIMIT) lalu
+plan-nya diperiksa:
+- FULL_SCAN    - full table scan pada tabel transaksi (bukan master kecil)
+- TEMP_BTREE   - sort tanpa index (SQLite "USE TEMP B-TREE", PostgreSQL "Sort")
+- NON_SARGABLE - kolom tanggal_kunjungan dibungkus fungsi (EXTRACT/date_extract)
+
+SQLite memakai EXPLAIN QUERY PLAN. PostgreSQL memakai EXPLAIN (COSTS OFF)
+dengan enable_seqscan/enable_sort dimatikan, supaya Seq Scan / Sort yang
+masih muncul berarti memang tidak ada index yang bisa dipakai (bukan
+sekadar tabel test yang kecil).
+
+Dipakai tests.py (regresi index) dan command `query_plans` (snapshot
+plan dalam bentuk teks yang bisa di-diff antar commit).
+"""
+
+import re
+from datetime import date
+from pathlib import Path
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+PAGE_SIZE = 50
+
+# Tabel master kecil: scan di sini tidak dianggap masalah
+MASTER_TABLES = {
+    "tipe_kunjungan", "kategori_layanan", "jenis_layanan",
+    "media_konsultasi", "sumber_jawaban",
+}
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "plan_snapshots"
+
+_NON_SARGABLE = re.compile(
+    r"(django_date_extract|django_date_trunc|EXTRACT|DATE_TRUNC|strftime)\s*\([^)]*tanggal_kunjungan",
+    re.IGNORECASE,
+)
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+_PG_SORT = re.compile(r"^(->\s+)?Sort\b")
+
+
+def _cases():
+    from apps.konsultasi.models import Kunjungan
+
+    objects = Kunjungan.objects
+    return {
+        "pending": objects.pending(),
+        "completed": objects.completed(),
+        "today": objects.today(),
+        "this_week": objects.this_week(),
+        "this_month": objects.this_month(),
+        "by_date_range": objects.by_date_range(date(2025, 12, 1), date(2025, 12, 31)),
+        "by_month": objects.by_month(2025, 12),
+        "konsultasi": objects.konsultasi(),
+        "pendaftaran": objects.pendaftaran(),
+        "informasi": objects.informasi(),
+        "by_kategori": objects.by_kategori(1),
+        "by_jenis": objects.by_jenis(1),
+        "offline": objects.offline(),
+        "online": objects.online(),
+        "by_tipe": objects.by_tipe(1),
+        "by_petugas": objects.by_petugas(1),
+        "unassigned": objects.unassigned(),
+        "assigned": objects.assigned(),
+        "search": objects.search("budi"),
+        "for_list_display": objects.for_list_display(),
+        "kantor_pending": objects.by_kantor(1).pending(),
+        "kantor_this_month": objects.by_kantor(1).this_month(),
+        "kantor_list_display": objects.by_kantor(1).for_list_display(),
+    }
+
+
+# Urutan tetap untuk snapshot & nama test (tanpa menyentuh database)
+CASE_NAMES = (
+    "pending", "completed", "today", "this_week", "this_month",
+    "by_date_range", "by_month", "konsultasi", "pendaftaran", "informasi",
+    "by_kategori", "by_jenis", "offline", "online", "by_tipe",
+    "by_petugas", "unassigned", "assigned", "search", "for_list_display",
+    "kantor_pending", "kantor_this_month", "kantor_list_display",
+)
+
+# Masalah yang diketahui & diterima, beserta alasannya.
+# Menambah entri di sini harus disertai alasan yang jelas di review.
+KNOWN_ISSUES = {
+    "completed": {
+        "FULL_SCAN": "status_selesai boolean (selektivitas rendah); halaman berhenti di LIMIT",
+    },
+    "konsultasi": {
+        "FULL_SCAN": "filter nama kategori (icontains); TODO(HIGH) flag is_konsultasi",
+    },
+    "pendaftaran": {
+        "FULL_SCAN": "filter nama kategori (icontains); TODO(MEDIUM) slug/flag",
+    },
+    "informasi": {
+        "FULL_SCAN": "filter nama kategori (icontains); TODO(MEDIUM) slug/flag",
+    },
+    "offline": {
+        "FULL_SCAN": "filter nama tipe (iexact); TODO(MEDIUM) slug",
+    },
+    "online": {
+        "FULL_SCAN": "filter nama tipe (iexact); TODO(MEDIUM) slug",
+    },
+    "assigned": {
+        "FULL_SCAN": "mayoritas kunjungan punya petugas; halaman berhenti di LIMIT",
+    },
+    "search": {
+        "FULL_SCAN": "icontains '%q%' tidak bisa memakai index B-tree",
+    },
+}
+
+# Filter rentang + ORDER BY -id_kunjungan (Meta.ordering): sort hanya atas
+# baris hasil filter, bukan seluruh tabel. Filter sama-dengan sudah memakai
+# index komposit (kolom, id_kunjungan) tanpa sort
+for _name in (
+    "this_week", "this_month", "by_date_range", "by_month", "assigned",
+    "kantor_this_month",
+):
+    KNOWN_ISSUES.setdefault(_name, {})["TEMP_BTREE"] = (
+        "filter rentang + ORDER BY -id_kunjungan; sort terbatas pada hasil filter"
+    )
+
+
+def page_query(queryset):
+    """Query yang benar-benar dijalankan list view (satu halaman)"""
+    return queryset[:PAGE_SIZE]
+
+
+def explain(queryset, using=None):
+    """
+    Plan ter-normalisasi (list baris teks, stabil untuk di-diff)
+
+    SQLite: baris EXPLAIN QUERY PLAN diindentasi sesuai parent node,
+    tanpa id node. PostgreSQL: EXPLAIN (COSTS OFF).
+    """
+    conn = connections[using or DEFAULT_DB_ALIAS]
+    sql, params = queryset.query.sql_with_params()
+
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            if conn.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+                cursor.execute("EXPLAIN (COSTS OFF) " + sql, params)
+                return [row[0].rstrip() for row in cursor.fetchall()]
+
+            if conn.vendor == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                depth = {0: -1}
+                lines = []
+                for node_id, parent, _, detail in cursor.fetchall():
+                    depth[node_id] = depth.get(parent, -1) + 1
+                    lines.append("  " * depth[node_id] + detail)
+                return lines
+
+            cursor.execute("EXPLAIN " + sql, params)
+            return [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+def find_problems(plan, sql, vendor):
+    """
+    Returns:
+        dict: {"FULL_SCAN": [baris...], "TEMP_BTREE": [...], "NON_SARGABLE": [...]}
+    """
+    problems = {}
+
+    for line in plan:
+        text = line.strip()
+        if vendor == "postgresql":
+            match = _PG_SEQ_SCAN.search(text)
+            if match and match.group(1) not in MASTER_TABLES:
+                problems.setdefault("FULL_SCAN", []).append(text)
+            if _PG_SORT.match(text):
+                problems.setdefault("TEMP_BTREE", []).append(text)
+        else:
+            match = _SQLITE_SCAN.match(text)
+            if match and match.group(1) not in MASTER_TABLES:
+                problems.setdefault("FULL_SCAN", []).append(text)
+            if text.startswith("USE TEMP B-TREE"):
+                problems.setdefault("TEMP_BTREE", []).append(text)
+
+    where = sql.split(" WHERE ", 1)[1] if " WHERE " in sql else ""
+    for match in _NON_SARGABLE.finditer(where):
+        problems.setdefault("NON_SARGABLE", []).append(match.group(0))
+
+    return problems
+
+
+def inspect_case(name, queryset=None, using=None):
+    """
+    Plan + masalah untuk satu case
+
+    Returns:
+        dict: {"plan", "problems", "unexpected"}
+    """
+    queryset = page_query(queryset if queryset is not None else _cases()[name])
+    conn = connections[using or DEFAULT_DB_ALIAS]
+    sql, _ = queryset.query.sql_with_params()
+
+    plan = explain(queryset, using=using)
+    problems = find_problems(plan, sql, conn.vendor)
+    allowed = KNOWN_ISSUES.get(name, {})
+    unexpected = {rule: lines for rule, lines in problems.items() if rule not in allowed}
+    return {"plan": plan, "problems": problems, "unexpected": unexpected}
+
+
+def inspect_all(using=None):
+    cases = _cases()
+    return {name: inspect_case(name, cases[name], using=using) for name in CASE_NAMES}
+
+
+# ===== SNAPSHOT =====
+
+def snapshot_path(vendor):
+    return SNAPSHOT_DIR / f"{vendor}.txt"
+
+
+def render_snapshot(results):
+    """Teks snapshot: satu blok per case, masalah ditandai di header"""
+    blocks = []
+    for name, result in results.items():
+        flags = []
+        for rule in sorted(result["problems"]):
+            flags.append(rule if rule in result["unexpected"] else f"{rule} (known)")
+        header = f"## {name}" + (f"  [{', '.join(flags)}]" if flags else "")
+        blocks.append("\n".join([header, *result["plan"]]))
+    return "\n\n".join(blocks) + "\n"
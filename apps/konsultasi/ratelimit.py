@@ -0,0 +1,226 @@
+"""
+Admission control untuk jalur registrasi publik (tanpa login)
+
+Dua lapis, keduanya hanya memakai cache bersama (tanpa tulis DB):
+
+1. Token bucket per klien (IP) atau per kiosk terdaftar, dihitung
+   dengan GCRA: satu nilai "theoretical arrival time" per key
+2. Batas konkurensi global: MAX_CONCURRENT slot (cache.add atomik);
+   slot penuh -> 429 cepat, bukan antri di lock penomoran database.
+   Slot kedaluwarsa sendiri (SLOT_TTL) jika worker mati di tengah request.
+
+IP klien di belakang proxy: X-Forwarded-For dikirim klien apa adanya lalu
+tiap proxy menambahkan alamat yang dilihatnya di kanan. Entri kiri bisa
+dipalsukan (IP baru = bucket baru tiap request), jadi yang dipakai adalah
+entri ke-TRUSTED_PROXIES dari kanan, yaitu alamat yang ditulis proxy
+tepercaya terluar.
+
+Token bucket memakai get/set tanpa CAS: saat dua worker bertabrakan pada
+key yang sama, paling banyak satu request ekstra per tabrakan ikut lolos.
+
+Konfigurasi lewat settings.KONSULTASI_RATELIMIT:
+    ENABLED           - aktif/nonaktif (default: True)
+    CLIENT_PER_MINUTE - laju token per IP
+    CLIENT_BURST      - kapasitas bucket per IP
+    KIOSK_PER_MINUTE  - laju token per kiosk (header X-Kiosk-Token)
+    KIOSK_BURST       - kapasitas bucket per kiosk
+    KIOSKS            - {token: nama kiosk}; token tak dikenal = klien biasa
+    MAX_CONCURRENT    - registrasi yang boleh berjalan bersamaan (semua worker)
+    SLOT_TTL          - detik sebelum slot yatim dilepas otomatis
+    CLIENT_IP_HEADER  - mis. "HTTP_X_FORWARDED_FOR" di belakang reverse proxy
+    TRUSTED_PROXIES   - jumlah proxy tepercaya yang menambah entri header itu
+                        (default 1)
+    CACHE             - alias cache (harus bersama antar worker, mis. Redis)
+"""
+
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from apps.konsultasi import metrics
+
+
+DEFAULTS = {
+    "ENABLED": True,
+    "CLIENT_PER_MINUTE": 10,
+    "CLIENT_BURST": 5,
+    "KIOSK_PER_MINUTE": 120,
+    "KIOSK_BURST": 30,
+    "KIOSKS": {},
+    "MAX_CONCURRENT": 8,
+    "SLOT_TTL": 30,
+    "CLIENT_IP_HEADER": "",
+    "TRUSTED_PROXIES": 1,
+    "CACHE": "default",
+}
+
+CACHE_PREFIX = "konsultasi:ratelimit"
+KIOSK_HEADER = "X-Kiosk-Token"
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_RATELIMIT", {}))
+    return config
+
+
+# ===== TOKEN BUCKET =====
+
+class TokenBucket:
+    """
+    Token bucket (GCRA) di cache
+
+    Usage:
+        bucket = TokenBucket(per_minute=10, burst=5)
+        allowed, retry_after = bucket.take("registrasi:client:10.0.0.1")
+    """
+
+    def __init__(self, per_minute, burst, cache_alias="default"):
+        self.interval = 60.0 / per_minute
+        self.tolerance = self.interval * (max(1, burst) - 1)
+        self.cache = caches[cache_alias]
+
+    def take(self, key, now=None):
+        """
+        Returns:
+            tuple: (allowed, retry_after detik)
+        """
+        now = time.time() if now is None else now
+        cache_key = f"{CACHE_PREFIX}:bucket:{key}"
+        tat = max(self.cache.get(cache_key) or now, now)
+
+        allowed_at = tat - self.tolerance
+        if now < allowed_at:
+            return False, allowed_at - now
+
+        tat += self.interval
+        self.cache.set(cache_key, tat, timeout=math.ceil(tat - now) + 1)
+        return True, 0.0
+
+
+# ===== KONKURENSI =====
+
+class ConcurrencyLimiter:
+    """
+    Batas request bersamaan lintas worker (slot di cache)
+
+    Usage:
+        limiter = ConcurrencyLimiter("registrasi", max_concurrent=8)
+        slot = limiter.acquire()
+        if slot is None:
+            ...  # penuh -> 429
+        try:
+            ...
+        finally:
+            limiter.release(slot)
+    """
+
+    def __init__(self, scope, max_concurrent, slot_ttl=30, cache_alias="default"):
+        self.scope = scope
+        self.max_concurrent = max_concurrent
+        self.slot_ttl = slot_ttl
+        self.cache = caches[cache_alias]
+
+    def _key(self, index):
+        return f"{CACHE_PREFIX}:slot:{self.scope}:{index}"
+
+    def acquire(self):
+        """Returns: (key, owner) slot yang didapat, atau None jika penuh"""
+        owner = uuid.uuid4().hex
+        start = random.randrange(self.max_concurrent)
+        for offset in range(self.max_concurrent):
+            key = self._key((start + offset) % self.max_concurrent)
+            if self.cache.add(key, owner, timeout=self.slot_ttl):
+                return key, owner
+        return None
+
+    def release(self, slot):
+        key, owner = slot
+        # Jangan hapus slot milik request lain (slot kita sudah kedaluwarsa)
+        if self.cache.get(key) == owner:
+            self.cache.delete(key)
+
+    def in_use(self):
+        return sum(
+            1 for value in self.cache.get_many(
+                [self._key(i) for i in range(self.max_concurrent)]
+            ).values() if value
+        )
+
+
+# ===== DECORATOR VIEW =====
+
+def client_key(request, config):
+    """
+    ("kiosk", nama) untuk kiosk terdaftar, selain itu ("client", alamat IP)
+
+    Dengan CLIENT_IP_HEADER: entri ke-TRUSTED_PROXIES dari kanan (entri
+    di kirinya bisa dipalsukan klien).
+    """
+    token = request.headers.get(KIOSK_HEADER, "")
+    kiosk = config["KIOSKS"].get(token) if token else None
+    if kiosk:
+        return "kiosk", kiosk
+
+    ip = ""
+    if config["CLIENT_IP_HEADER"]:
+        entries = [
+            entry.strip()
+            for entry in request.META.get(config["CLIENT_IP_HEADER"], "").split(",")
+            if entry.strip()
+        ]
+        if entries:
+            ip = entries[-min(max(1, config["TRUSTED_PROXIES"]), len(entries))]
+    return "client", ip or request.META.get("REMOTE_ADDR", "")
+
+
+def too_many_requests(retry_after, detail):
+    response = JsonResponse({"detail": detail}, status=429)
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def admission_control(scope):
+    """
+    Token bucket + batas konkurensi untuk view publik
+
+    Usage:
+        @admission_control("registrasi")
+        def registrasi(request): ...
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            config = get_config()
+            if not config["ENABLED"]:
+                return view(request, *args, **kwargs)
+
+            kind, identity = client_key(request, config)
+            prefix = kind.upper()
+            bucket = TokenBucket(
+                config[f"{prefix}_PER_MINUTE"], config[f"{prefix}_BURST"], config["CACHE"]
+            )
+            allowed, retry_after = bucket.take(f"{scope}:{kind}:{identity}")
+            if not allowed:
+                metrics.DITOLAK.inc(scope=scope, alasan="rate")
+                return too_many_requests(retry_after, "Terlalu banyak permintaan, coba lagi nanti.")
+
+            limiter = ConcurrencyLimiter(
+                scope, config["MAX_CONCURRENT"], config["SLOT_TTL"], config["CACHE"]
+            )
+            slot = limiter.acquire()
+            if slot is None:
+                metrics.DITOLAK.inc(scope=scope, alasan="konkurensi")
+                return too_many_requests(1, "Server sedang sibuk, coba lagi sebentar.")
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                limiter.release(slot)
+        return wrapper
+    return decorator
@@ -1,9 +1,20 @@
 from .actions import KunjunganService
 from .statistics import KunjunganStatistics
 from .reports import KunjunganReports
+from .backup import BackupService
+from .importer import BukuTamuImporter
+from .answers import AnswerIndex, suggest_answers
+from .faq import FaqMiner
+from .dedupe import TamuDeduplicator
 
 __all__ = [
     'KunjunganService',
     'KunjunganStatistics',
     'KunjunganReports',
+    'BackupService',
+    'BukuTamuImporter',
+    'AnswerIndex',
+    'suggest_answers',
+    'FaqMiner',
+    'TamuDeduplicator',
 ]
\ No newline at end of file
@@ -8,9 +8,29 @@ Handles:
 - Status changes
 """
 
-from django.db import transaction
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+
+from apps.konsultasi import audit, metrics, periods
+from apps.konsultasi.normalizers import normalize_email, normalize_phone
+from apps.konsultasi.services import assignment, changefeed
+from apps.konsultasi.services.answers import record_answer
+from apps.konsultasi.services.idempotency import idempotent_kunjungan
+from apps.konsultasi.services.outbox import enqueue_konsultasi_selesai
+
+
+# Batas parameter IN (...) per query (SQLite: 999 pada versi lama)
+IN_CHUNK = 900
+
+
+def _pk(value):
+    return getattr(value, "pk", value)
 
 
 class KunjunganService:
@@ -22,8 +42,329 @@ class KunjunganService:
         
         service = KunjunganService()
         service.complete_konsultasi(kunjungan, petugas, data)
+
+        # Retry aman: kunci yang sama -> hasil awal (services/idempotency.py)
+        service.register_kunjungan(data, idempotency_key="3f0c9a...")
     """
     
+    @idempotent_kunjungan("registrasi", lambda data: data)
+    @metrics.timed(metrics.SERVICE_SECONDS, method="register_kunjungan")
+    @transaction.atomic
+    def register_kunjungan(self, data):
+        """
+        Registrasi kunjungan dari form publik / kiosk
+
+        Business Rules:
+        1. Tamu lama dikenali dari no HP lalu email (lookup_returning)
+        2. Tamu baru wajib punya nama
+        3. Petugas paling ringan ditetapkan otomatis (services/assignment.py)
+        4. Validasi & penomoran lewat Kunjungan.save()
+
+        Args:
+            data: dict - nama, email, no_hp, instansi_perusahaan, alamat,
+                  id_tipe, id_kategori, id_jenis, pertanyaan, id_kantor
+                  (opsional, default kantor 1)
+
+        Returns:
+            Kunjungan instance (baru)
+
+        Raises:
+            ValidationError: Jika data tidak valid
+        """
+        from apps.konsultasi.models import DEFAULT_KANTOR, Kunjungan, Tamu
+
+        email = (data.get("email") or "").strip()
+        no_hp = (data.get("no_hp") or "").strip()
+        returning = (
+            (no_hp and Tamu.objects.lookup_returning(no_hp))
+            or (email and Tamu.objects.lookup_returning(email))
+        )
+        if returning:
+            id_tamu = returning["id_tamu"]
+        else:
+            nama = (data.get("nama") or "").strip()
+            if not nama:
+                raise ValidationError({"nama": "Nama wajib diisi untuk tamu baru."})
+            tamu = Tamu(
+                nama=nama,
+                email=email,
+                no_hp=no_hp,
+                instansi_perusahaan=(data.get("instansi_perusahaan") or "").strip(),
+                alamat=(data.get("alamat") or "").strip(),
+            )
+            tamu.full_clean()
+            tamu.save()
+            id_tamu = tamu.pk
+
+        kunjungan = Kunjungan(
+            id_kantor_id=data.get("id_kantor") or DEFAULT_KANTOR,
+            tanggal_kunjungan=periods.local_today(),
+            id_tamu_id=id_tamu,
+            id_tipe_id=data.get("id_tipe"),
+            id_kategori_id=data.get("id_kategori"),
+            id_jenis_id=data.get("id_jenis"),
+            pertanyaan=(data.get("pertanyaan") or "").strip(),
+        )
+        assignment.assign(kunjungan)
+        kunjungan.save()
+        return kunjungan
+
+    @metrics.timed(metrics.SERVICE_SECONDS, method="register_batch")
+    def register_batch(self, items, max_backdate_days=30, kantor=None):
+        """
+        Registrasi massal idempoten (sync kiosk offline)
+
+        Business Rules:
+        1. Tiap item punya client_uuid; uuid yang sudah tersimpan
+           -> "duplicate" dengan nomor yang sama (upload ulang aman)
+        2. Validasi sama dengan register_kunjungan + clean() (jenis sesuai
+           kategori, pertanyaan wajib untuk konsultasi), tanggal boleh
+           mundur maksimal max_backdate_days, tidak boleh di masa depan
+        3. Tamu lama dikenali dari no HP lalu email; tamu baru dalam satu
+           batch dengan kontak sama hanya dibuat sekali
+        4. Nomor dialokasikan per blok bulan (reserve_nomor), lalu satu
+           bulk insert - query tetap, tidak bertambah per item
+        5. Item bertanggal hari ini langsung ditugaskan ke petugas paling
+           ringan (services/assignment.py, tanpa query per item)
+
+        Args:
+            items: list of dict - client_uuid, tanggal (YYYY-MM-DD), nama,
+                   email, no_hp, instansi_perusahaan, alamat, id_tipe,
+                   id_kategori, id_jenis, pertanyaan
+            kantor: id Kantor kiosk (default kantor 1); nomor dari
+                    sequence kantor ini
+
+        Returns:
+            list of dict (urutan sama dengan items): client_uuid, status
+            ("created" / "duplicate" / "invalid"), id_kunjungan,
+            nomor_kunjungan, tanggal, errors
+        """
+        for attempt in range(2):
+            try:
+                return self._register_batch(items, max_backdate_days, kantor)
+            except IntegrityError:
+                # Upload paralel dengan uuid yang sama: ulangi, kini "duplicate"
+                if attempt:
+                    raise
+
+    @transaction.atomic
+    def _register_batch(self, items, max_backdate_days, kantor=None):
+        from apps.konsultasi.models import (
+            DEFAULT_KANTOR, JenisLayanan, KategoriLayanan, Kunjungan, KunjunganKonten, Tamu,
+            TipeKunjungan,
+        )
+
+        kantor = _pk(kantor) or DEFAULT_KANTOR
+        today = periods.local_today()
+        earliest = today - timedelta(days=max_backdate_days)
+        tipe_ids = set(TipeKunjungan.objects.values_list("pk", flat=True))
+        jenis_kategori = dict(JenisLayanan.objects.values_list("pk", "id_kategori"))
+        konsultasi_ids = set(
+            KategoriLayanan.objects.filter(nama_kategori__icontains="konsultasi").values_list("pk", flat=True)
+        )
+
+        results = []
+        valid = []
+        for item in items:
+            result, row = self._parse_batch_item(
+                item, today, earliest, tipe_ids, jenis_kategori, konsultasi_ids,
+            )
+            results.append(result)
+            if row is not None:
+                valid.append((result, row))
+
+        # 1. Idempoten: uuid yang sudah ada (atau kembar di batch ini)
+        existing = {}
+        uuids = [row["client_uuid"] for _, row in valid]
+        for start in range(0, len(uuids), IN_CHUNK):
+            for pk, client_uuid, nomor, tanggal in Kunjungan.objects.filter(
+                client_uuid__in=uuids[start:start + IN_CHUNK]
+            ).values_list("pk", "client_uuid", "nomor_kunjungan", "tanggal_kunjungan"):
+                existing[client_uuid] = (pk, nomor, tanggal)
+
+        fresh = []
+        first_by_uuid = {}
+        for result, row in valid:
+            if row["client_uuid"] in existing:
+                pk, nomor, tanggal = existing[row["client_uuid"]]
+                result.update(status="duplicate", id_kunjungan=pk, nomor_kunjungan=nomor, tanggal=tanggal)
+            elif row["client_uuid"] in first_by_uuid:
+                first_by_uuid[row["client_uuid"]][1].append(result)
+            else:
+                first_by_uuid[row["client_uuid"]] = (row, [])
+                fresh.append((result, row))
+        if not fresh:
+            return results
+
+        # 2. Tamu lama (no HP lalu email), tamu baru sekali per kontak
+        tamu_by_phone, tamu_by_email = {}, {}
+        phones = list({row["no_hp_normalized"] for _, row in fresh if row["no_hp_normalized"]})
+        emails = list({row["email_normalized"] for _, row in fresh if row["email_normalized"]})
+        for start in range(0, len(phones), IN_CHUNK):
+            for pk, phone in Tamu.objects.filter(
+                no_hp_normalized__in=phones[start:start + IN_CHUNK]
+            ).order_by("pk").values_list("pk", "no_hp_normalized"):
+                tamu_by_phone.setdefault(phone, pk)
+        for start in range(0, len(emails), IN_CHUNK):
+            for pk, email in Tamu.objects.filter(
+                email_normalized__in=emails[start:start + IN_CHUNK]
+            ).order_by("pk").values_list("pk", "email_normalized"):
+                tamu_by_email.setdefault(email, pk)
+
+        new_tamu = {}
+        for _, row in fresh:
+            phone, email = row["no_hp_normalized"], row["email_normalized"]
+            row["id_tamu"] = (phone and tamu_by_phone.get(phone)) or (email and tamu_by_email.get(email))
+            if row["id_tamu"]:
+                continue
+            key = ("p", phone) if phone else ("e", email) if email else ("u", row["client_uuid"])
+            if key not in new_tamu:
+                tamu = Tamu(
+                    nama=row["nama"], email=row["email"], no_hp=row["no_hp"],
+                    instansi_perusahaan=row["instansi_perusahaan"], alamat=row["alamat"],
+                )
+                tamu.set_lookup_keys()
+                new_tamu[key] = tamu
+            row["tamu"] = new_tamu[key]
+        Tamu.objects.bulk_create(list(new_tamu.values()))
+        audit.record_many(new_tamu.values(), audit.ACTION_CREATE)
+
+        # 3. Nomor per blok bulan (urut tanggal lalu urutan upload). Insert
+        #    di urutan yang sama supaya nomor naik searah id_kunjungan
+        fresh.sort(key=lambda pair: pair[1]["tanggal"])
+        by_month = {}
+        for index, (_, row) in enumerate(fresh):
+            by_month.setdefault((row["tanggal"].year, row["tanggal"].month), []).append(index)
+        nomor = {}
+        for rows in by_month.values():
+            block = Kunjungan.reserve_nomor(fresh[rows[0]][1]["tanggal"], count=len(rows), kantor=kantor)
+            nomor.update(zip(rows, block))
+
+        # 4. Satu bulk insert
+        now = timezone.now()
+        kunjungan = [
+            Kunjungan(
+                id_kantor_id=kantor,
+                client_uuid=row["client_uuid"],
+                nomor_kunjungan=nomor[index],
+                tanggal_kunjungan=row["tanggal"],
+                id_tamu_id=row["id_tamu"] or row["tamu"].pk,
+                id_tipe_id=row["id_tipe"],
+                id_kategori_id=row["id_kategori"],
+                id_jenis_id=row["id_jenis"],
+                pertanyaan=row["pertanyaan"],
+                updated_at=now,
+            )
+            for index, (_, row) in enumerate(fresh)
+        ]
+        for obj in kunjungan:
+            assignment.assign(obj)
+        Kunjungan.objects.bulk_create(kunjungan)
+        konten = KunjunganKonten.bulk_create_for(kunjungan)
+        audit.record_many([*kunjungan, *konten], audit.ACTION_CREATE)
+        changefeed.record_bulk(kunjungan, "create")
+
+        for (result, row), obj in zip(fresh, kunjungan):
+            result.update(
+                status="created", id_kunjungan=obj.pk, nomor_kunjungan=obj.nomor_kunjungan,
+                tanggal=obj.tanggal_kunjungan,
+            )
+            for twin in first_by_uuid[row["client_uuid"]][1]:
+                twin.update(result, status="duplicate")
+
+        counts = Counter((obj.id_tipe_id, obj.id_kategori_id) for obj in kunjungan)
+
+        def count_registrasi():
+            for (tipe, kategori), total in counts.items():
+                metrics.REGISTRASI.inc(total, tipe=tipe, kategori=kategori)
+
+        transaction.on_commit(count_registrasi)
+        return results
+
+    def _parse_batch_item(self, item, today, earliest, tipe_ids, jenis_kategori, konsultasi_ids):
+        """Validasi satu item batch tanpa query; returns (result, row | None)"""
+        errors = {}
+        result = {"client_uuid": str(item.get("client_uuid") or ""), "status": "invalid"}
+
+        try:
+            client_uuid = uuid.UUID(str(item.get("client_uuid")))
+        except ValueError:
+            errors["client_uuid"] = ["UUID tidak valid."]
+            client_uuid = None
+
+        try:
+            tanggal = date.fromisoformat(item.get("tanggal") or today.isoformat())
+        except (TypeError, ValueError):
+            errors["tanggal"] = ["Format tanggal YYYY-MM-DD."]
+        else:
+            if tanggal > today:
+                errors["tanggal"] = ["Tanggal tidak boleh di masa depan."]
+            elif tanggal < earliest:
+                errors["tanggal"] = [f"Tanggal lebih lama dari {(today - earliest).days} hari."]
+
+        def text(name, max_length=None):
+            value = str(item.get(name) or "").strip()
+            if max_length and len(value) > max_length:
+                errors[name] = [f"Maksimal {max_length} karakter."]
+            return value
+
+        # Kiosk offline tidak bisa mengenali tamu lama: nama selalu wajib
+        nama = text("nama", 100)
+        if not nama:
+            errors["nama"] = ["Nama wajib diisi."]
+        email = text("email", 100)
+        no_hp = text("no_hp", 15)
+        instansi = text("instansi_perusahaan", 150)
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                errors["email"] = ["Email tidak valid."]
+
+        def ref(name):
+            try:
+                return int(item.get(name))
+            except (TypeError, ValueError):
+                errors[name] = ["Wajib diisi."]
+                return None
+
+        id_tipe, id_kategori, id_jenis = ref("id_tipe"), ref("id_kategori"), ref("id_jenis")
+        if id_tipe is not None and id_tipe not in tipe_ids:
+            errors["id_tipe"] = ["Tipe tidak dikenal."]
+        if id_jenis is not None and jenis_kategori.get(id_jenis) != id_kategori:
+            errors["id_jenis"] = ["Jenis layanan tidak sesuai dengan kategori yang dipilih."]
+        pertanyaan = text("pertanyaan")
+        if id_kategori in konsultasi_ids and not pertanyaan:
+            errors["pertanyaan"] = ["Pertanyaan wajib diisi untuk kategori konsultasi."]
+
+        if errors:
+            result["errors"] = errors
+            return result, None
+        result["client_uuid"] = str(client_uuid)
+        return result, {
+            "client_uuid": client_uuid,
+            "tanggal": tanggal,
+            "nama": nama,
+            "email": email,
+            "no_hp": no_hp,
+            "email_normalized": normalize_email(email),
+            "no_hp_normalized": normalize_phone(no_hp),
+            "instansi_perusahaan": instansi,
+            "alamat": str(item.get("alamat") or "").strip(),
+            "id_tipe": id_tipe,
+            "id_kategori": id_kategori,
+            "id_jenis": id_jenis,
+            "pertanyaan": pertanyaan,
+        }
+
+    @idempotent_kunjungan(
+        "complete_konsultasi",
+        lambda kunjungan, petugas, jawaban, id_media=None, id_sumber=None: {
+            "id_kunjungan": kunjungan.pk, "petugas": _pk(petugas), "jawaban": jawaban,
+            "media": _pk(id_media), "sumber": _pk(id_sumber),
+        },
+    )
+    @metrics.timed(metrics.SERVICE_SECONDS, method="complete_konsultasi")
     @transaction.atomic
     def complete_konsultasi(self, kunjungan, petugas, jawaban, id_media=None, id_sumber=None):
         """
@@ -33,6 +374,8 @@ class KunjunganService:
         1. Jika offline -> auto-set media "Tatap Muka"
         2. Validasi jawaban, media, sumber wajib diisi
         3. Set petugas & waktu selesai
+        4. Notifikasi jawaban ke tamu masuk outbox (transaksi yang sama)
+        5. Setelah commit: masuk index pertanyaan serupa (suggest_answers)
         
         Args:
             kunjungan: Kunjungan instance
@@ -88,14 +431,25 @@ class KunjunganService:
         kunjungan.id_sumber = id_sumber
         
         # Set petugas dan status selesai
+        assigned = kunjungan.id_petugas_id
         kunjungan.id_petugas = petugas
         kunjungan.status_selesai = True
         
         # Save (waktu_selesai auto-set by model)
-        kunjungan.save()
+        kunjungan.save(event="complete")
+        self._release_on_commit(assigned, kunjungan.tanggal_kunjungan)
+        # Notifikasi ke tamu dikirim drain_outbox, bukan di dalam request
+        enqueue_konsultasi_selesai(kunjungan)
+        transaction.on_commit(lambda: metrics.SELESAI.inc(jalur="konsultasi"))
+        transaction.on_commit(lambda: record_answer(kunjungan))
         
         return kunjungan
     
+    @idempotent_kunjungan(
+        "complete_non_konsultasi",
+        lambda kunjungan, petugas: {"id_kunjungan": kunjungan.pk, "petugas": _pk(petugas)},
+    )
+    @metrics.timed(metrics.SERVICE_SECONDS, method="complete_non_konsultasi")
     @transaction.atomic
     def complete_non_konsultasi(self, kunjungan, petugas):
         """
@@ -123,12 +477,16 @@ class KunjunganService:
             raise ValidationError("Kunjungan sudah selesai")
         
         # Set petugas dan status
+        assigned = kunjungan.id_petugas_id
         kunjungan.id_petugas = petugas
         kunjungan.status_selesai = True
-        kunjungan.save()
+        kunjungan.save(event="complete")
+        self._release_on_commit(assigned, kunjungan.tanggal_kunjungan)
+        transaction.on_commit(lambda: metrics.SELESAI.inc(jalur="non_konsultasi"))
         
         return kunjungan
     
+    @metrics.timed(metrics.SERVICE_SECONDS, method="bulk_complete_non_konsultasi")
     @transaction.atomic
     def bulk_complete_non_konsultasi(self, queryset, petugas):
         """
@@ -151,15 +509,33 @@ class KunjunganService:
             id_kategori__nama_kategori__icontains='konsultasi'
         ).filter(status_selesai=False)
         
+        # Beban petugas yang ditugaskan (penugasan otomatis, hari ini saja)
+        today = periods.local_today()
+        assigned = []
+        if assignment.get_config()["ENABLED"]:
+            assigned = list(
+                valid_queryset.filter(tanggal_kunjungan=today).assigned().values_list("id_petugas", flat=True)
+            )
+
         # Bulk update (skip validation untuk performa)
-        updated = valid_queryset.update(
+        # updated_at di-set manual karena update() tidak memicu auto_now;
+        # update_queryset ikut mencatat event "complete" di change feed
+        now = timezone.now()
+        updated = changefeed.update_queryset(
+            valid_queryset,
+            "complete",
             id_petugas=petugas,
             status_selesai=True,
-            waktu_selesai=timezone.now()
+            waktu_selesai=now,
+            updated_at=now
         )
+        transaction.on_commit(lambda: metrics.SELESAI.inc(updated, jalur="bulk"))
+        for id_petugas in assigned:
+            self._release_on_commit(id_petugas, today)
         
         return updated
     
+    @metrics.timed(metrics.SERVICE_SECONDS, method="reset_to_pending")
     @transaction.atomic
     def reset_to_pending(self, kunjungan):
         """
@@ -177,6 +553,14 @@ class KunjunganService:
         """
         kunjungan.status_selesai = False
         kunjungan.waktu_selesai = None
-        kunjungan.save(skip_validation=True)
+        kunjungan.save(skip_validation=True, event="reset")
+        if kunjungan.id_petugas_id:
+            petugas, tanggal = kunjungan.id_petugas_id, kunjungan.tanggal_kunjungan
+            transaction.on_commit(lambda: assignment.reopen(petugas, tanggal))
         
-        return kunjungan
\ No newline at end of file
+        return kunjungan
+
+    def _release_on_commit(self, petugas, tanggal):
+        """Kunjungan selesai: beban petugas yang ditugaskan turun setelah commit"""
+        if petugas:
+            transaction.on_commit(lambda: assignment.release(petugas, tanggal))
\ No newline at end of file
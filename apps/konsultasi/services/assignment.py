@@ -0,0 +1,250 @@
+"""
+Penugasan petugas otomatis (least-loaded) saat registrasi
+
+Kunjungan baru hari ini langsung ditetapkan ke petugas aktif dengan beban
+terbuka paling ringan, tanpa menunggu ada yang membuka daftar unassigned():
+
+- Beban = kunjungan hari ini yang ditugaskan ke petugas dan belum selesai
+- Pool = (kantor, jenis) untuk petugas spesialis (Petugas.spesialisasi),
+  (kantor, None) untuk petugas umum; kandidat = puncak heap pool jenis
+  kunjungan dan pool umum kantornya (seri: spesialis, lalu yang paling
+  lama tidak berubah bebannya)
+- Pilih O(log n): heap per pool dengan lazy deletion (entri basi dibuang
+  saat naik ke puncak), tanpa query agregat di transaksi registrasi
+- Beban naik saat dipilih (registrasi paralel di proses yang sama langsung
+  melihatnya), turun setelah commit penyelesaian
+
+Papan beban disimpan per proses (seperti returning_cache): signal Petugas
+membangun ulang di proses yang sama, REFRESH_SECONDS membatasi selisih
+dengan worker lain / perubahan lewat admin (satu query agregat per
+refresh). Registrasi yang rollback menyisakan +1 beban sampai refresh.
+
+Konfigurasi lewat settings.KONSULTASI_ASSIGNMENT:
+    ENABLED         - tetapkan petugas otomatis saat registrasi (default
+                      mati: mengubah alur kerja, unassigned() jadi sepi)
+    REFRESH_SECONDS - umur maksimum papan beban sebelum dibangun ulang
+
+Simulasi waktu tunggu per jumlah petugas: python manage.py simulate_assignment
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count
+
+from apps.konsultasi import periods
+
+
+DEFAULTS = {
+    "ENABLED": False,
+    "REFRESH_SECONDS": 60,
+}
+
+# Heap dipadatkan jika entri basi jauh lebih banyak dari petugas
+COMPACT_SLACK = 64
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_ASSIGNMENT", {}))
+    return config
+
+
+# ===== PAPAN BEBAN =====
+
+class LoadBoard:
+    """
+    Beban live per petugas + heap per pool (tanpa database)
+
+    Usage:
+        board = LoadBoard()
+        board.add(1, kantor=1)                  # petugas umum
+        board.add(2, kantor=1, jenis=(3,))      # spesialis jenis 3
+        petugas = board.pick(kantor=1, jenis=3) # -> 2 (beban 0, spesialis)
+        board.release(petugas)                  # kunjungan selesai
+    """
+
+    def __init__(self):
+        self.load = {}
+        self._pools = {}
+        self._stamp = {}
+        self._heaps = defaultdict(list)
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self.load)
+
+    def add(self, petugas, kantor, jenis=(), load=0):
+        """Daftarkan (atau perbarui) petugas aktif"""
+        self._pools[petugas] = tuple((kantor, id_jenis) for id_jenis in jenis) or ((kantor, None),)
+        self.load[petugas] = load
+        self._push(petugas)
+
+    def remove(self, petugas):
+        """Petugas nonaktif: entri heap-nya jadi basi"""
+        self.load.pop(petugas, None)
+        self._pools.pop(petugas, None)
+        self._stamp.pop(petugas, None)
+
+    def pick(self, kantor, jenis=None):
+        """
+        Petugas paling ringan yang boleh melayani jenis ini; beban +1
+
+        Returns:
+            id_petugas | None jika tidak ada petugas aktif yang cocok
+        """
+        keys = ((kantor, jenis), (kantor, None)) if jenis is not None else ((kantor, None),)
+        best = None
+        for umum, key in enumerate(keys):
+            top = self._peek(key)
+            if top is not None:
+                rank = (top[0], umum, top[1])
+                if best is None or rank < best[0]:
+                    best = (rank, top[2])
+        if best is None:
+            return None
+        self.assign(best[1])
+        return best[1]
+
+    def assign(self, petugas):
+        """Beban +1 (dipilih pick, atau kunjungan dibuka lagi)"""
+        if petugas in self.load:
+            self.load[petugas] += 1
+            self._push(petugas)
+
+    def release(self, petugas):
+        """Beban -1 (kunjungan selesai / dialihkan)"""
+        if self.load.get(petugas, 0) > 0:
+            self.load[petugas] -= 1
+            self._push(petugas)
+
+    def _push(self, petugas):
+        stamp = next(self._counter)
+        self._stamp[petugas] = stamp
+        entry = (self.load[petugas], stamp, petugas)
+        for key in self._pools[petugas]:
+            heap = self._heaps[key]
+            heapq.heappush(heap, entry)
+            if len(heap) > 2 * len(self.load) + COMPACT_SLACK:
+                self._compact(key)
+
+    def _valid(self, entry):
+        return self._stamp.get(entry[2]) == entry[1]
+
+    def _peek(self, key):
+        heap = self._heaps.get(key)
+        while heap:
+            if self._valid(heap[0]):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _compact(self, key):
+        heap = [entry for entry in self._heaps[key] if self._valid(entry)]
+        heapq.heapify(heap)
+        self._heaps[key] = heap
+
+
+def build_board(tanggal=None, using=DEFAULT_DB_ALIAS):
+    """
+    Papan beban dari database (3 query: petugas aktif, spesialisasi, beban
+    terbuka hari ini per petugas)
+    """
+    from apps.konsultasi.models import Kunjungan, Petugas
+
+    tanggal = tanggal or periods.local_today()
+    spesialisasi = defaultdict(list)
+    for petugas, id_jenis in (
+        Petugas.spesialisasi.through.objects.using(using)
+        .filter(petugas__is_active=True)
+        .values_list("petugas_id", "jenislayanan_id")
+    ):
+        spesialisasi[petugas].append(id_jenis)
+
+    load = dict(
+        Kunjungan.objects.using(using)
+        .filter(tanggal_kunjungan=tanggal).pending().assigned()
+        .order_by()
+        .values_list("id_petugas")
+        .annotate(total=Count("id_kunjungan"))
+    )
+
+    board = LoadBoard()
+    for petugas, kantor in Petugas.objects.using(using).active().values_list("id_petugas", "id_kantor"):
+        board.add(petugas, kantor, spesialisasi.get(petugas, ()), load.get(petugas, 0))
+    return board
+
+
+# ===== PAPAN PER PROSES =====
+
+_board = None
+_board_key = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def _current_board(using):
+    """Papan proses ini; dibangun ulang jika hari berganti / lewat REFRESH_SECONDS"""
+    global _board, _board_key, _built_at
+
+    key = (using, periods.local_today())
+    if (
+        _board is None
+        or _board_key != key
+        or time.monotonic() - _built_at > get_config()["REFRESH_SECONDS"]
+    ):
+        _board = build_board(key[1], using)
+        _board_key = key
+        _built_at = time.monotonic()
+    return _board
+
+
+def assign(kunjungan, using=DEFAULT_DB_ALIAS):
+    """
+    Tetapkan petugas paling ringan ke kunjungan baru (sebelum disimpan)
+
+    Hanya kunjungan hari ini yang belum punya petugas; kunjungan mundur
+    (kiosk offline) tetap masuk antrian unassigned().
+
+    Returns:
+        id_petugas | None
+    """
+    if (
+        not get_config()["ENABLED"]
+        or kunjungan.id_petugas_id
+        or kunjungan.tanggal_kunjungan != periods.local_today()
+    ):
+        return None
+    with _lock:
+        petugas = _current_board(using).pick(kunjungan.id_kantor_id, kunjungan.id_jenis_id)
+    if petugas is not None:
+        kunjungan.id_petugas_id = petugas
+    return petugas
+
+
+def release(petugas, tanggal, using=DEFAULT_DB_ALIAS):
+    """Kunjungan hari ini milik petugas selesai (panggil lewat on_commit)"""
+    with _lock:
+        if _board is not None and _board_key == (using, tanggal):
+            _board.release(petugas)
+
+
+def reopen(petugas, tanggal, using=DEFAULT_DB_ALIAS):
+    """Kunjungan hari ini dibuka lagi (reset_to_pending): beban petugas +1"""
+    with _lock:
+        if _board is not None and _board_key == (using, tanggal):
+            _board.assign(petugas)
+
+
+def reset():
+    """Buang papan proses ini (signal Petugas, test); dibangun ulang saat dipakai"""
+    global _board, _board_key
+
+    with _lock:
+        _board = None
+        _board_key = None
@@ -0,0 +1,529 @@
+"""
+Backup Service untuk data Buku Tamu
+
+Handles:
+- Streaming backup ke gzip NDJSON (satu record per baris)
+- Backup incremental berdasarkan watermark updated_at + tombstone
+- Streaming restore dengan bulk insert per batch (full + N incremental)
+- Reset sequence setelah restore
+
+Format baris mengikuti bentuk `dumpdata` ({"model", "pk", "fields"})
+supaya mudah dibaca, tapi ditulis per baris sehingga memori tetap konstan.
+"""
+
+import gzip
+import json
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.konsultasi import db
+
+
+BACKUP_FORMAT = "konsultasi-ndjson"
+BACKUP_VERSION = 1
+
+KIND_FULL = "full"
+KIND_INCREMENTAL = "incremental"
+
+# Urutan penting: master data -> aktor -> kunjungan (mengikuti ForeignKey)
+BACKUP_MODELS = [
+    "konsultasi.kantor",
+    "konsultasi.tipekunjungan",
+    "konsultasi.kategorilayanan",
+    "konsultasi.jenislayanan",
+    "konsultasi.mediakonsultasi",
+    "konsultasi.sumberjawaban",
+    "konsultasi.tamu",
+    "konsultasi.petugas",
+    "konsultasi.petugas_spesialisasi",
+    "konsultasi.kunjungan",
+    "konsultasi.kunjungankonten",
+]
+
+# Model dengan kolom updated_at; sisanya kecil & diekspor utuh tiap incremental
+TRACKED_MODELS = [
+    "konsultasi.tamu",
+    "konsultasi.kunjungan",
+]
+
+# Model tanpa updated_at sendiri yang ikut watermark induknya
+# (Kunjungan.save() menaikkan updated_at saat konten berubah)
+DEPENDENT_MODELS = {
+    "konsultasi.kunjungankonten": "kunjungan__updated_at",
+}
+
+# Tabel relasi M2M tanpa updated_at & tombstone: tiap incremental memuat isi
+# lengkapnya dan restore mengganti seluruh isi tabel (link yang dilepas ikut hilang)
+REPLACED_MODELS = {
+    "konsultasi.petugas_spesialisasi",
+}
+
+# Baris yang sudah dibuat migration (Kantor 1): selalu upsert, juga di full restore
+SEEDED_MODELS = {
+    "konsultasi.kantor",
+}
+
+# Backup lama: pertanyaan/jawaban masih di record kunjungan
+LEGACY_KONTEN_FIELDS = ("pertanyaan", "jawaban")
+
+
+class BackupService:
+    """
+    Service class untuk backup/restore streaming
+
+    Usage:
+        from apps.konsultasi.services import BackupService
+
+        service = BackupService()
+        service.backup("backup.ndjson.gz")
+        service.restore("backup.ndjson.gz")
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, chunk_size=2000, batch_size=1000):
+        self.using = using
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+
+    # ===== BACKUP =====
+
+    def backup(self, path, models=None):
+        """
+        Tulis backup gzip NDJSON
+
+        Baris pertama adalah header, sisanya satu record per baris
+        diurutkan berdasarkan primary key.
+
+        Args:
+            path: str/Path - file tujuan (.ndjson.gz)
+            models: list label model (default: BACKUP_MODELS)
+
+        Returns:
+            dict: Jumlah record per model
+
+        NOTE: header["created"] diambil sebelum membaca data, jadi aman
+        dipakai sebagai watermark awal backup incremental. Semua tabel
+        dibaca dari satu snapshot (db.read_snapshot), jadi registrasi yang
+        commit di tengah backup ikut utuh atau tidak sama sekali.
+        """
+        labels = models or BACKUP_MODELS
+        counts = {}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        with (
+            gzip.open(path, "wt", encoding="utf-8") as fh,
+            db.read_snapshot(using=self.using),
+            db.workload("maintenance", using=self.using),
+        ):
+            header = {
+                "format": BACKUP_FORMAT,
+                "version": BACKUP_VERSION,
+                "kind": KIND_FULL,
+                "created": timezone.now(),
+                "models": labels,
+            }
+            fh.write(self._dumps(header))
+
+            for label in labels:
+                model = apps.get_model(label)
+                counts[label] = 0
+                for record in self.iter_records(model):
+                    fh.write(self._dumps(record))
+                    counts[label] += 1
+
+        return counts
+
+    def iter_records(self, model, queryset=None):
+        """
+        Iterasi record model dalam urutan pk dengan chunked iterator
+
+        FK disimpan sebagai id mentah (tanpa instansiasi model).
+        """
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        names = [f.name for f in fields]
+        attnames = [f.attname for f in fields]
+        label = model._meta.label_lower
+
+        if queryset is None:
+            queryset = model._default_manager.using(self.using)
+
+        rows = (
+            queryset
+            .order_by("pk")
+            .values_list("pk", *attnames)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        for row in rows:
+            yield {
+                "model": label,
+                "pk": row[0],
+                "fields": dict(zip(names, row[1:])),
+            }
+
+    # ===== INCREMENTAL BACKUP =====
+
+    def backup_incremental(self, directory, since, max_rows=50000, overlap=300):
+        """
+        Tulis perubahan sejak watermark ke file chunk gzip NDJSON
+
+        - Tamu & Kunjungan: hanya baris dengan updated_at >= since
+          (konten kunjungan ikut updated_at kunjungan)
+        - Master data & Petugas: diekspor utuh (kecil, tanpa updated_at)
+        - Spesialisasi petugas: diekspor utuh dengan penanda "replace"
+        - Penghapusan: tombstone sejak watermark
+
+        Watermark dimundurkan `overlap` detik untuk menangkap transaksi yang
+        commit terlambat. Restore memakai upsert sehingga overlap aman.
+
+        Args:
+            directory: str/Path - folder tujuan chunk
+            since: datetime - watermark backup sebelumnya
+            max_rows: int - maksimal record per file chunk
+            overlap: int - detik overlap watermark
+
+        Returns:
+            tuple: (watermark baru, list path file yang ditulis, dict counts)
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # Satu snapshot untuk semua tabel & tombstone (lihat backup())
+        with db.read_snapshot(using=self.using):
+            return self._write_incremental(directory, since - timedelta(seconds=overlap), max_rows)
+
+    def _write_incremental(self, directory, since, max_rows):
+        until = timezone.now()
+        stamp = until.strftime("%Y%m%dT%H%M%S")
+
+        header = {
+            "format": BACKUP_FORMAT,
+            "version": BACKUP_VERSION,
+            "kind": KIND_INCREMENTAL,
+            "created": until,
+            "since": since,
+            "models": BACKUP_MODELS,
+        }
+
+        writer = _ChunkWriter(directory, f"incr-{stamp}", header, max_rows, self._dumps)
+        counts = {}
+
+        with writer, db.workload("maintenance", using=self.using):
+            for label in BACKUP_MODELS:
+                model = apps.get_model(label)
+                queryset = model._default_manager.using(self.using)
+                if label in TRACKED_MODELS:
+                    queryset = queryset.filter(updated_at__gte=since)
+                elif label in DEPENDENT_MODELS:
+                    queryset = queryset.filter(**{f"{DEPENDENT_MODELS[label]}__gte": since})
+
+                if label in REPLACED_MODELS:
+                    writer.write({"model": label, "replace": True})
+
+                counts[label] = 0
+                for record in self.iter_records(model, queryset):
+                    writer.write(record)
+                    counts[label] += 1
+
+            for record in self.iter_tombstones(since):
+                writer.write(record)
+                counts["tombstone"] = counts.get("tombstone", 0) + 1
+
+        return until, writer.paths, counts
+
+    def iter_tombstones(self, since):
+        """
+        Record penghapusan sejak watermark
+
+        Diurutkan anak -> induk (Kunjungan sebelum Tamu) supaya tetap aman
+        walaupun tombstone terpecah ke beberapa file chunk.
+        """
+        from apps.konsultasi.models import Tombstone
+
+        for label in reversed(TRACKED_MODELS):
+            rows = (
+                Tombstone.objects.using(self.using)
+                .filter(model_label=label, deleted_at__gte=since)
+                .order_by("pk")
+                .values_list("object_pk", flat=True)
+                .iterator(chunk_size=self.chunk_size)
+            )
+            for object_pk in rows:
+                yield {"model": label, "pk": object_pk, "deleted": True}
+
+    # ===== WATERMARK =====
+
+    def read_watermark(self, state_path):
+        """Baca watermark dari file state (None jika belum ada)"""
+        state_path = Path(state_path)
+        if not state_path.exists():
+            return None
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        return parse_datetime(state["watermark"])
+
+    def write_watermark(self, state_path, watermark, files=None):
+        """Simpan watermark setelah backup berhasil"""
+        state_path = Path(state_path)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "watermark": watermark,
+            "files": [str(f) for f in (files or [])],
+        }
+        tmp_path = state_path.with_suffix(".tmp")
+        tmp_path.write_text(self._dumps(state), encoding="utf-8")
+        tmp_path.replace(state_path)
+
+    # ===== RESTORE =====
+
+    def restore(self, *paths):
+        """
+        Restore dari file backup gzip NDJSON
+
+        File diproses berurutan: satu full backup lalu N incremental.
+
+        - Full: bulk insert per batch (tidak memanggil save())
+        - Incremental: bulk upsert per batch + hapus baris tombstone;
+          tabel REPLACED_MODELS dikosongkan dulu lalu diisi ulang
+        - Penghapusan tidak menulis Tombstone, KunjunganEvent maupun
+          AuditLog baru (signals.replaying)
+        - nomor_kunjungan dipertahankan apa adanya; counter nomor_sequence
+          dikosongkan supaya diisi ulang dari data hasil restore
+        - Sequence di-reset di akhir
+
+        Args:
+            *paths: str/Path - file backup, urut dari yang paling lama
+
+        Returns:
+            dict: Jumlah record per model (termasuk "deleted")
+        """
+        from apps.konsultasi import signals
+
+        counts = {}
+        restored_models = []
+
+        # Hapus lewat ORM (cascade konten) tanpa tombstone/event/audit baru
+        with transaction.atomic(using=self.using), signals.replaying():
+            for path in paths:
+                for action, model, payload in self._iter_batches(path):
+                    manager = model._default_manager.using(self.using)
+                    label = model._meta.label_lower
+
+                    if action == "delete":
+                        manager.filter(pk__in=payload).delete()
+                        counts["deleted"] = counts.get("deleted", 0) + len(payload)
+                        continue
+                    if action == "clear":
+                        manager.all().delete()
+                        continue
+
+                    if action == "upsert" or label in SEEDED_MODELS:
+                        manager.bulk_create(
+                            payload,
+                            batch_size=self.batch_size,
+                            update_conflicts=True,
+                            unique_fields=[model._meta.pk.name],
+                            update_fields=[
+                                f.name for f in model._meta.concrete_fields
+                                if not f.primary_key
+                            ],
+                        )
+                    else:
+                        manager.bulk_create(payload, batch_size=self.batch_size)
+
+                    if label not in counts:
+                        counts[label] = 0
+                        restored_models.append(model)
+                    counts[label] += len(payload)
+
+            self.reset_sequences(restored_models)
+            if "konsultasi.kunjungan" in counts:
+                apps.get_model("konsultasi.nomorsequence")._default_manager.using(self.using).all().delete()
+
+        return counts
+
+    def reset_sequences(self, models):
+        """Reset sequence auto-increment agar insert berikutnya tidak bentrok"""
+        connection = connections[self.using]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def read_header(self, path):
+        """Baca & validasi header file backup"""
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            return self._parse_header(fh.readline())
+
+    # ===== HELPERS =====
+
+    def _iter_batches(self, path):
+        """
+        Yield (action, model, payload) per batch, berurutan sesuai file
+
+        action: "insert"/"upsert" (payload = list instance),
+        "clear" (payload None, sebelum isi lengkap tabel REPLACED_MODELS) atau
+        "delete" (payload = list pk, dikirim di akhir file).
+        """
+        builders = {}
+        tombstones = {}
+        model = None
+        batch = []
+        legacy_konten = []
+
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            header = self._parse_header(fh.readline())
+            action = "upsert" if header.get("kind") == KIND_INCREMENTAL else "insert"
+
+            for line in fh:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                label = record["model"]
+
+                if record.get("deleted"):
+                    tombstones.setdefault(label, []).append(record["pk"])
+                    continue
+                if record.get("replace"):
+                    if batch:
+                        yield action, model, batch
+                        batch = []
+                    yield "clear", apps.get_model(label), None
+                    continue
+
+                konten = self._split_legacy_konten(record)
+
+                if label not in builders:
+                    builders[label] = self._instance_builder(apps.get_model(label))
+                record_model, build = builders[label]
+
+                if batch and (record_model is not model or len(batch) >= self.batch_size):
+                    yield action, model, batch
+                    batch = []
+                    if legacy_konten:
+                        yield action, legacy_konten[0].__class__, legacy_konten
+                        legacy_konten = []
+
+                model = record_model
+                batch.append(build(record))
+                if konten is not None:
+                    legacy_konten.append(konten)
+
+        if batch:
+            yield action, model, batch
+        if legacy_konten:
+            yield action, legacy_konten[0].__class__, legacy_konten
+
+        # Hapus dari anak ke induk (Kunjungan dulu, baru Tamu) karena PROTECT
+        for label in reversed(BACKUP_MODELS):
+            if label in tombstones:
+                yield "delete", apps.get_model(label), tombstones[label]
+
+    def _split_legacy_konten(self, record):
+        """
+        Backup sebelum tabel kunjungan_konten: pindahkan pertanyaan/jawaban
+        dari record kunjungan ke instance KunjunganKonten (None jika kosong)
+        """
+        if record["model"] != "konsultasi.kunjungan":
+            return None
+        fields = record["fields"]
+        values = {name: fields.pop(name, "") or "" for name in LEGACY_KONTEN_FIELDS}
+        if not any(values.values()):
+            return None
+        return apps.get_model("konsultasi.kunjungankonten")(
+            kunjungan_id=record["pk"], **values
+        )
+
+    def _instance_builder(self, model):
+        """
+        Siapkan fungsi record -> instance sekali per model
+
+        to_python() dipakai supaya string tanggal/waktu kembali jadi objek.
+        """
+        fields = {
+            f.name: f for f in model._meta.concrete_fields if not f.primary_key
+        }
+        pk_field = model._meta.pk
+
+        def build(record):
+            kwargs = {pk_field.attname: pk_field.to_python(record["pk"])}
+            for name, value in record["fields"].items():
+                field = fields[name]
+                kwargs[field.attname] = None if value is None else field.to_python(value)
+            instance = model(**kwargs)
+            if hasattr(instance, "set_lookup_keys"):
+                # Backup lama belum punya kolom lookup
+                instance.set_lookup_keys()
+            return instance
+
+        return model, build
+
+    def _parse_header(self, line):
+        try:
+            header = json.loads(line)
+        except ValueError:
+            header = {}
+        if header.get("format") != BACKUP_FORMAT:
+            raise ValueError("File bukan backup konsultasi-ndjson yang valid")
+        if header.get("version", 0) > BACKUP_VERSION:
+            raise ValueError(
+                f"Versi backup {header.get('version')} tidak didukung"
+            )
+        return header
+
+    def _dumps(self, obj):
+        return json.dumps(obj, cls=_BackupEncoder, separators=(",", ":")) + "\n"
+
+
+class _BackupEncoder(DjangoJSONEncoder):
+    """
+    DjangoJSONEncoder memotong waktu ke milidetik: simpan mikrodetik utuh
+    supaya updated_at hasil restore sama persis (watermark incremental)
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime, time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class _ChunkWriter:
+    """Tulis record ke beberapa file gzip, maksimal max_rows per file"""
+
+    def __init__(self, directory, prefix, header, max_rows, dumps):
+        self.directory = directory
+        self.prefix = prefix
+        self.header = header
+        self.max_rows = max_rows
+        self.dumps = dumps
+        self.paths = []
+        self._fh = None
+        self._rows = 0
+
+    def __enter__(self):
+        self._open()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def write(self, record):
+        if self._rows >= self.max_rows:
+            self._fh.close()
+            self._open()
+        self._fh.write(self.dumps(record))
+        self._rows += 1
+
+    def _open(self):
+        path = self.directory / f"{self.prefix}-{len(self.paths) + 1:04d}.ndjson.gz"
+        self._fh = gzip.open(path, "wt", encoding="utf-8")
+        self._fh.write(self.dumps(dict(self.header, part=len(self.paths) + 1)))
+        self.paths.append(path)
+        self._rows = 0
@@ -0,0 +1,261 @@
+"""
+Change feed Kunjungan (append-only, dibaca per cursor)
+
+Sistem lain (dashboard, data warehouse, integrasi) cukup menarik event
+baru sejak cursor terakhir, tanpa memindai tabel kunjungan:
+
+    GET /api/kunjungan/events/?after=<cursor>&limit=500
+
+Sumber event (semuanya di transaksi yang sama dengan perubahannya):
+    - Kunjungan.save()                   -> create / update, atau event
+                                            eksplisit dari KunjunganService
+                                            (complete / reset)
+    - update_queryset()                  -> jalur bulk update() (admin action,
+                                            bulk_complete_non_konsultasi)
+    - record_bulk() / record_pks()       -> bulk_create import, merge tamu
+    - signal post_delete                 -> delete
+
+Cursor = KunjunganEvent.id. Di database dengan writer paralel (PostgreSQL)
+id dialokasikan sebelum commit, sehingga event dengan id lebih kecil bisa
+muncul belakangan. Tiap event menyimpan txid transaksi penulisnya;
+read() hanya mengirim event dari transaksi di bawah horizon
+pg_snapshot_xmin (semua transaksi sebelum itu sudah selesai) dan
+mengurutkan per (txid, id), jadi event yang commit belakangan selalu
+berada di belakang cursor, bukan terlewat. SQLite hanya punya satu
+writer: urutan id = urutan commit.
+
+Konfigurasi lewat settings.KONSULTASI_CHANGEFEED:
+    TOKEN          - jika diisi, wajib header Authorization: Bearer <TOKEN>
+                     (jika kosong: hanya staff yang login)
+    DEFAULT_LIMIT  - event per halaman jika limit tidak diisi
+    MAX_LIMIT      - batas atas limit
+    RETENTION_DAYS - default purge_changefeed
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.konsultasi import db
+
+
+DEFAULTS = {
+    "TOKEN": "",
+    "DEFAULT_LIMIT": 500,
+    "MAX_LIMIT": 1000,
+    "RETENTION_DAYS": 90,
+}
+
+# Snapshot kunjungan di tiap event (nama field -> attname)
+EVENT_FIELDS = {
+    "kantor": "id_kantor_id",
+    "nomor": "nomor_kunjungan",
+    "tanggal": "tanggal_kunjungan",
+    "tamu": "id_tamu_id",
+    "tipe": "id_tipe_id",
+    "kategori": "id_kategori_id",
+    "jenis": "id_jenis_id",
+    "media": "id_media_id",
+    "sumber": "id_sumber_id",
+    "petugas": "id_petugas_id",
+    "selesai": "status_selesai",
+    "waktu_selesai": "waktu_selesai",
+    "updated_at": "updated_at",
+}
+
+# Batas parameter IN (...) per query (SQLite: 999 pada versi lama)
+IN_CHUNK = 900
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_CHANGEFEED", {}))
+    return config
+
+
+# ===== TULIS EVENT =====
+
+def snapshot(kunjungan):
+    """
+    Data event dari instance; pertanyaan/jawaban hanya jika sudah dimuat
+    (tanpa query tambahan). Nilai kosong tidak ditulis (JSON ringkas).
+    """
+    data = {}
+    for key, attname in EVENT_FIELDS.items():
+        value = getattr(kunjungan, attname)
+        if value is not None:
+            data[key] = value
+    konten = kunjungan._cached_konten()
+    if konten is not None:
+        if konten.pertanyaan:
+            data["pertanyaan"] = konten.pertanyaan
+        if konten.jawaban:
+            data["jawaban"] = konten.jawaban
+    return data
+
+
+def _event(kunjungan_pk, event, data, now):
+    from apps.konsultasi.models import KunjunganEvent
+
+    return KunjunganEvent(id_kunjungan=kunjungan_pk, event=event, data=data, created_at=now)
+
+
+def record(kunjungan, event, using=None):
+    """Satu event dari instance (dipanggil Kunjungan.save())"""
+    from apps.konsultasi.models import KunjunganEvent
+
+    return KunjunganEvent.objects.db_manager(using).create(
+        id_kunjungan=kunjungan.pk, event=event, data=snapshot(kunjungan),
+    )
+
+
+def record_bulk(instances, event, batch_size=1000):
+    """
+    Event untuk instance hasil bulk_create / bulk_update (tanpa save())
+
+    Returns:
+        int: jumlah event
+    """
+    from apps.konsultasi.models import KunjunganEvent
+
+    now = timezone.now()
+    rows = [_event(kunjungan.pk, event, snapshot(kunjungan), now) for kunjungan in instances]
+    KunjunganEvent.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def record_pks(pks, event, batch_size=1000):
+    """
+    Event untuk kunjungan yang diubah lewat queryset.update()
+
+    Snapshot dibaca ulang dari database (satu query per IN_CHUNK pk),
+    jadi panggil setelah update di transaksi yang sama.
+
+    Returns:
+        int: jumlah event
+    """
+    from apps.konsultasi.models import Kunjungan, KunjunganEvent
+
+    pks = sorted(set(pks))
+    columns = list(EVENT_FIELDS.values())
+    now = timezone.now()
+    total = 0
+    for start in range(0, len(pks), IN_CHUNK):
+        rows = []
+        for values in Kunjungan.objects.filter(pk__in=pks[start:start + IN_CHUNK]).order_by("pk").values(
+            "pk", *columns
+        ):
+            data = {
+                key: values[attname] for key, attname in EVENT_FIELDS.items()
+                if values[attname] is not None
+            }
+            rows.append(_event(values["pk"], event, data, now))
+        KunjunganEvent.objects.bulk_create(rows, batch_size=batch_size)
+        total += len(rows)
+    return total
+
+
+@transaction.atomic
+def update_queryset(queryset, event, **values):
+    """
+    Pengganti queryset.update() yang ikut mencatat event & audit trail
+
+    Baris yang terkena dikunci & dibaca nilai lamanya dulu (satu query per
+    IN_CHUNK), jadi event dan diff audit hanya ditulis untuk baris yang
+    benar-benar di-update (satu transaksi).
+
+    Usage:
+        changefeed.update_queryset(qs, "complete", status_selesai=True, ...)
+
+    Returns:
+        int: jumlah baris yang di-update
+    """
+    from apps.konsultasi import audit
+
+    model = queryset.model
+    columns = {model._meta.get_field(name).attname for name in values} | {"id_petugas_id"}
+    # of=self: filter lewat relasi (tamu, petugas) tidak ikut mengunci barisnya
+    old_rows = list(queryset.select_for_update(of=("self",)).order_by("pk").values("pk", *columns))
+    pks = [row["pk"] for row in old_rows]
+    expressions = any(hasattr(value, "resolve_expression") for value in values.values())
+    new_rows = {} if expressions else None
+    updated = 0
+    for start in range(0, len(pks), IN_CHUNK):
+        chunk = model.objects.filter(pk__in=pks[start:start + IN_CHUNK])
+        updated += chunk.update(**values)
+        if expressions:
+            new_rows.update((row["pk"], row) for row in chunk.values("pk", *columns))
+    audit.record_update(model, old_rows, values, new_rows)
+    record_pks(pks, event)
+    return updated
+
+
+# ===== BACA =====
+
+def _pending(after):
+    """
+    Event setelah cursor dalam urutan commit-aman
+
+    PostgreSQL: hanya transaksi di bawah horizon, urut (txid, id) mulai
+    dari posisi event `after` (txid-nya dibaca ulang; event yang sudah
+    di-purge -> event terakhir sebelumnya). Lainnya: urut id.
+    """
+    from apps.konsultasi.models import KunjunganEvent
+
+    events = KunjunganEvent.objects.all()
+    horizon = db.transaction_horizon(events.db)
+    if horizon is None:
+        return events.filter(pk__gt=after).order_by("pk")
+
+    cursor_txid = (
+        events.filter(pk__lte=after).order_by("-pk").values_list("txid", flat=True).first()
+    ) or 0
+    return events.filter(
+        Q(txid__gt=cursor_txid) | Q(txid=cursor_txid, pk__gt=after),
+        txid__lt=horizon,
+    ).order_by("txid", "pk")
+
+
+def read(after=0, limit=None):
+    """
+    Satu halaman event setelah cursor
+
+    Args:
+        after: cursor terakhir yang sudah diproses (0 = dari awal)
+        limit: jumlah event (dibatasi MAX_LIMIT)
+
+    Returns:
+        dict: {'events': [...], 'next': cursor berikutnya, 'has_more': bool}
+    """
+    config = get_config()
+    limit = min(max(1, limit or config["DEFAULT_LIMIT"]), config["MAX_LIMIT"])
+
+    rows = list(
+        _pending(after).values_list("pk", "id_kunjungan", "event", "created_at", "data")[:limit + 1]
+    )
+    events = [
+        {"id": pk, "kunjungan": id_kunjungan, "event": event, "at": created_at, "data": data}
+        for pk, id_kunjungan, event, created_at, data in rows[:limit]
+    ]
+    return {
+        "events": events,
+        "next": events[-1]["id"] if events else after,
+        "has_more": len(rows) > limit,
+    }
+
+
+def purge_before(days=None):
+    """
+    Hapus event lebih tua dari `days` hari (default RETENTION_DAYS)
+
+    Returns:
+        int: jumlah event yang dihapus
+    """
+    from apps.konsultasi.models import KunjunganEvent
+
+    days = get_config()["RETENTION_DAYS"] if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    return KunjunganEvent.objects.filter(created_at__lt=cutoff).delete()[0]
@@ -0,0 +1,327 @@
+"""
+Deteksi & merge Tamu ganda (blocking + skor pasangan)
+
+Tamu yang kembali sering tercatat sebagai baris baru dengan ejaan nama,
+email, atau nomor HP yang sedikit berbeda. Membandingkan semua pasangan
+tidak mungkin (1 juta tamu = 5 x 10^11 pasangan), jadi:
+
+1. Blocking - tiap tamu masuk beberapa blok:
+       p:<no HP E.164>, e:<bagian lokal email>, n:<kunci fonetik nama>
+2. Skor     - hanya pasangan di dalam blok yang sama dinilai
+               (kontak sama, kemiripan nama, instansi, konflik kontak)
+3. Cluster  - pasangan dengan skor >= min_score digabung (union-find);
+               tamu dengan kunjungan terbanyak dipertahankan
+
+Blok yang lebih besar dari MAX_BLOCK (mis. email kantor bersama atau nama
+sangat umum) dilewati dan dilaporkan, supaya biaya tetap mendekati linear.
+"""
+
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.db.models import Case, Count, Value, When
+from django.utils import timezone
+
+from apps.konsultasi import audit
+from apps.konsultasi.services import changefeed
+from apps.konsultasi.normalizers import (
+    email_local_key, normalize_email, normalize_name, normalize_phone, phonetic_name,
+)
+
+
+MAX_BLOCK = 200
+MIN_SCORE = 0.6
+HIGH_SCORE = 0.8
+
+# Batas parameter IN (...) per query (SQLite: 999 pada versi lama)
+IN_CHUNK = 900
+# UPDATE ... CASE memakai 3 parameter per duplikat
+CASE_CHUNK = 300
+
+CONTACT_FIELDS = ("email", "no_hp", "instansi_perusahaan", "alamat")
+
+
+class TamuDeduplicator:
+    """
+    Service class untuk deteksi & merge tamu ganda
+
+    Usage:
+        from apps.konsultasi.services import TamuDeduplicator
+
+        dedupe = TamuDeduplicator(min_score=0.6)
+        groups = dedupe.suggest()
+        # [{"keep": 12, "merge": [40, 97], "score": 0.85, "members": [...]}, ...]
+
+        dedupe.merge_groups(groups)      # satu transaksi
+        dedupe.merge(12, [40, 97])       # satu grup
+    """
+
+    def __init__(self, min_score=MIN_SCORE, max_block=MAX_BLOCK, chunk_size=5000):
+        self.min_score = min_score
+        self.max_block = max_block
+        self.chunk_size = chunk_size
+        self.stats = {}
+
+    # ===== DETEKSI =====
+
+    def suggest(self, queryset=None):
+        """
+        Returns:
+            list[dict]: keep, merge, score, confidence, members
+            (urut jumlah anggota lalu skor, terbesar dulu)
+        """
+        from apps.konsultasi.models import Tamu
+
+        queryset = queryset if queryset is not None else Tamu.objects.all()
+        records = {}
+        blocks = defaultdict(list)
+
+        for pk, nama, email, no_hp, instansi in queryset.values_list(
+            "id_tamu", "nama", "email", "no_hp", "instansi_perusahaan"
+        ).iterator(chunk_size=self.chunk_size):
+            record = self._record(nama, email, no_hp, instansi)
+            records[pk] = record
+            for key in self._block_keys(record):
+                blocks[key].append(pk)
+
+        parent = {}
+        edge_score = {}
+        pairs = scored = oversized = 0
+        seen = set()
+
+        for key, members in blocks.items():
+            if len(members) < 2:
+                continue
+            if len(members) > self.max_block:
+                oversized += 1
+                continue
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair in seen:
+                        continue
+                    seen.add(pair)
+                    pairs += 1
+                    score = self.score(records[a], records[b])
+                    if score >= self.min_score:
+                        scored += 1
+                        root = self._union(parent, a, b)
+                        edge_score[root] = min(edge_score.get(root, 1.0), score)
+
+        groups = defaultdict(list)
+        for pk in parent:
+            groups[self._find(parent, pk)].append(pk)
+
+        self.stats = {
+            "tamu": len(records),
+            "blocks": len(blocks),
+            "oversized_blocks": oversized,
+            "pairs_scored": pairs,
+            "pairs_matched": scored,
+            "groups": len(groups),
+        }
+        return self._build_suggestions(groups, edge_score, parent)
+
+    def score(self, a, b):
+        """
+        Skor 0..1 kemungkinan dua tamu adalah orang yang sama
+
+        Kontak sama menaikkan skor; kontak berbeda yang sama-sama terisi
+        menurunkan skor (dua orang satu kantor dengan nama mirip).
+        """
+        score = 0.0
+
+        if a["phone"] and b["phone"]:
+            score += 0.45 if a["phone"] == b["phone"] else -0.2
+        if a["email"] and b["email"]:
+            if a["email"] == b["email"]:
+                score += 0.45
+            elif a["email_local"] == b["email_local"]:
+                score += 0.25
+            else:
+                score -= 0.1
+
+        if a["nama"] and b["nama"]:
+            matcher = SequenceMatcher(None, a["nama"], b["nama"])
+            name_sim = matcher.ratio() if matcher.real_quick_ratio() >= 0.5 else 0.0
+            if a["phonetic"] and a["phonetic"] == b["phonetic"]:
+                name_sim = max(name_sim, 0.9)
+            score += 0.35 * name_sim
+
+        if a["instansi"] and a["instansi"] == b["instansi"]:
+            score += 0.1
+
+        return round(max(0.0, min(1.0, score)), 3)
+
+    def _record(self, nama, email, no_hp, instansi):
+        email = normalize_email(email)
+        return {
+            "nama": normalize_name(nama),
+            "phonetic": phonetic_name(nama),
+            "email": email,
+            "email_local": email_local_key(email),
+            "phone": normalize_phone(no_hp),
+            "instansi": normalize_name(instansi),
+        }
+
+    def _block_keys(self, record):
+        keys = []
+        if record["phone"]:
+            keys.append("p:" + record["phone"])
+        if record["email_local"]:
+            keys.append("e:" + record["email_local"])
+        if record["phonetic"]:
+            keys.append("n:" + record["phonetic"])
+        return keys
+
+    def _find(self, parent, pk):
+        root = pk
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(pk, pk) != root:
+            parent[pk], pk = root, parent[pk]
+        return root
+
+    def _union(self, parent, a, b):
+        parent.setdefault(a, a)
+        parent.setdefault(b, b)
+        root_a, root_b = self._find(parent, a), self._find(parent, b)
+        if root_a == root_b:
+            return root_a
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        parent[child] = root
+        return root
+
+    def _build_suggestions(self, groups, edge_score, parent):
+        from apps.konsultasi.models import Kunjungan, Tamu
+
+        member_ids = [pk for members in groups.values() for pk in members]
+        counts = {}
+        details = {}
+        for start in range(0, len(member_ids), IN_CHUNK):
+            chunk = member_ids[start:start + IN_CHUNK]
+            counts.update(
+                Kunjungan.objects.filter(id_tamu__in=chunk)
+                .values_list("id_tamu").annotate(total=Count("pk")).order_by()
+            )
+            for row in Tamu.objects.filter(pk__in=chunk).values(
+                "id_tamu", "nama", "email", "no_hp", "instansi_perusahaan"
+            ):
+                details[row["id_tamu"]] = row
+
+        # Skor grup = skor pasangan terendah yang menggabungkan grup itu
+        scores = defaultdict(lambda: 1.0)
+        for root, score in edge_score.items():
+            final = self._find(parent, root)
+            scores[final] = min(scores[final], score)
+
+        suggestions = []
+        for root, members in groups.items():
+            # Pertahankan tamu dengan kunjungan terbanyak, lalu yang terlama
+            members.sort(key=lambda pk: (-counts.get(pk, 0), pk))
+            score = scores[root]
+            suggestions.append({
+                "keep": members[0],
+                "merge": members[1:],
+                "score": score,
+                "confidence": "tinggi" if score >= HIGH_SCORE else "periksa",
+                "members": [
+                    {**details.get(pk, {"id_tamu": pk}), "kunjungan": counts.get(pk, 0)}
+                    for pk in members
+                ],
+            })
+        suggestions.sort(key=lambda item: (-len(item["members"]), -item["score"], item["keep"]))
+        return suggestions
+
+    # ===== MERGE =====
+
+    def merge(self, keep_id, duplicate_ids):
+        """Merge satu grup; lihat merge_groups"""
+        return self.merge_groups([{"keep": keep_id, "merge": list(duplicate_ids)}])
+
+    @audit.batch()
+    def merge_groups(self, groups):
+        """
+        Gabungkan tamu ganda dalam satu transaksi (audit trail ditulis
+        sekali bulk insert sebelum commit)
+
+        1. Field kontak kosong di tamu yang dipertahankan diisi dari duplikat
+           (duplikat terbaru dulu)
+        2. Kunjungan.id_tamu dialihkan dengan UPDATE ... CASE per chunk
+           (updated_at ikut diisi agar terbawa backup incremental,
+           event "update" dicatat di change feed & audit trail)
+        3. Tamu duplikat dihapus (tombstone tercatat lewat signal)
+
+        Returns:
+            dict: {'groups', 'tamu', 'kunjungan'}
+        """
+        from apps.konsultasi.models import Kunjungan, Tamu
+
+        target = {}
+        for group in groups:
+            keep = group["keep"]
+            for pk in group["merge"]:
+                if pk != keep:
+                    target[pk] = keep
+        if set(target) & set(target.values()):
+            raise ValueError("Tamu yang dipertahankan tidak boleh sekaligus menjadi duplikat")
+        if not target:
+            return {"groups": 0, "tamu": 0, "kunjungan": 0}
+
+        keep_ids = sorted(set(target.values()))
+        duplicate_ids = sorted(target)
+
+        # Kunci baris tamu yang terlibat (no-op di SQLite)
+        survivors = {}
+        for start in range(0, len(keep_ids), IN_CHUNK):
+            for tamu in Tamu.objects.select_for_update().filter(pk__in=keep_ids[start:start + IN_CHUNK]):
+                audit.snapshot(tamu)
+                survivors[tamu.pk] = tamu
+        missing = set(keep_ids) - survivors.keys()
+        if missing:
+            raise ValueError(f"Tamu tidak ditemukan: {sorted(missing)[:10]}")
+
+        changed = set()
+        for start in range(0, len(duplicate_ids), IN_CHUNK):
+            chunk = duplicate_ids[start:start + IN_CHUNK]
+            for duplicate in Tamu.objects.select_for_update().filter(pk__in=chunk).order_by("-pk"):
+                survivor = survivors[target[duplicate.pk]]
+                for field in CONTACT_FIELDS:
+                    if not getattr(survivor, field) and getattr(duplicate, field):
+                        setattr(survivor, field, getattr(duplicate, field))
+                        changed.add(survivor.pk)
+
+        now = timezone.now()
+        if changed:
+            for tamu in (survivors[pk] for pk in changed):
+                tamu.updated_at = now
+                tamu.set_lookup_keys()
+            Tamu.objects.bulk_update(
+                [survivors[pk] for pk in changed],
+                [*CONTACT_FIELDS, "email_normalized", "no_hp_normalized", "updated_at"],
+                batch_size=IN_CHUNK,
+            )
+            audit.record_many([survivors[pk] for pk in changed], audit.ACTION_UPDATE)
+
+        moved = 0
+        moved_rows = []
+        for start in range(0, len(duplicate_ids), CASE_CHUNK):
+            chunk = duplicate_ids[start:start + CASE_CHUNK]
+            moved_rows.extend(
+                Kunjungan.objects.filter(id_tamu__in=chunk).values_list("pk", "id_tamu", "id_petugas")
+            )
+            moved += Kunjungan.objects.filter(id_tamu__in=chunk).update(
+                id_tamu=Case(*[When(id_tamu=pk, then=Value(target[pk])) for pk in chunk]),
+                updated_at=now,
+            )
+        audit.record_changes(Kunjungan, [
+            (pk, {"id_tamu": [id_tamu, target[id_tamu]]}, id_petugas)
+            for pk, id_tamu, id_petugas in moved_rows
+        ])
+        changefeed.record_pks([pk for pk, _, _ in moved_rows], "update")
+
+        deleted = 0
+        for start in range(0, len(duplicate_ids), IN_CHUNK):
+            deleted += Tamu.objects.filter(pk__in=duplicate_ids[start:start + IN_CHUNK]).delete()[0]
+
+        return {"groups": len(keep_ids), "tamu": deleted, "kunjungan": moved}
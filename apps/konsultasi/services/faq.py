@@ -0,0 +1,424 @@
+"""
+Kandidat FAQ dari pertanyaan konsultasi yang mirip (MinHash + LSH)
+
+Alur per pertanyaan (konsultasi selesai):
+1. Shingle  - n-gram karakter (SHINGLE_SIZE) dari teks ter-normalisasi
+              (tokenize yang sama dengan suggest_answers)
+2. MinHash  - NUM_PERM nilai hash: tiap shingle -> satu baris blake2b,
+              signature = minimum per kolom (min(zip(*baris)))
+3. LSH      - signature dipotong BANDS band; pertanyaan dengan band sama
+              di JenisLayanan yang sama menjadi kandidat pasangan
+4. Cluster  - kandidat dengan estimasi Jaccard >= threshold digabung
+              (union-find)
+
+Tidak ada perbandingan semua pasangan: tiap pertanyaan hanya dibandingkan
+dengan isi bucket LSH-nya, dan bucket hanya menyimpan satu anggota per
+cluster.
+
+State (signature + union-find + watermark waktu_selesai) disimpan di
+settings.KONSULTASI_FAQ["DIRECTORY"], jadi run malam berikutnya hanya
+memproses konsultasi yang selesai sejak run sebelumnya.
+"""
+
+import gzip
+import json
+from array import array
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import lru_cache
+from hashlib import blake2b
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.konsultasi.services.answers import tokenize
+
+
+DEFAULTS = {
+    "DIRECTORY": None,
+    "THRESHOLD": 0.6,
+}
+
+STATE_FORMAT = "konsultasi-faq-minhash"
+STATE_VERSION = 1
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# blake2b 64 byte = 16 nilai uint32; NUM_PERM / 16 salt berbeda
+_SALTS = [i.to_bytes(16, "little") for i in range(NUM_PERM // 16)]
+
+# Anggota yang dibandingkan per cluster kandidat & dipakai memilih wakil
+MAX_COMPARE_PER_CLUSTER = 3
+# Pertanyaan yang nyaris identik dengan anggota cluster tidak masuk bucket
+# (band-nya hampir sama), supaya memori bucket tidak tumbuh oleh duplikat
+NEAR_IDENTICAL = 0.9
+MAX_MEMBERS_FETCH = 200
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_FAQ", {}))
+    return config
+
+
+def shingles(text):
+    """
+    Usage:
+        shingles("Reset password SPSE")  # {"reset", "eset ", ...}
+    """
+    normalized = " ".join(tokenize(text))
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {
+        normalized[i:i + SHINGLE_SIZE]
+        for i in range(len(normalized) - SHINGLE_SIZE + 1)
+    }
+
+
+@lru_cache(maxsize=200_000)
+def _shingle_hashes(shingle):
+    """NUM_PERM nilai hash satu shingle (shingle sering berulang antar pertanyaan)"""
+    data = shingle.encode("utf-8")
+    row = array("I")
+    for salt in _SALTS:
+        row.frombytes(blake2b(data, digest_size=64, salt=salt).digest())
+    return row
+
+
+def minhash(shingle_set):
+    """Signature MinHash (array NUM_PERM uint32); None jika tidak ada shingle"""
+    if not shingle_set:
+        return None
+    return array("I", map(min, zip(*map(_shingle_hashes, shingle_set))))
+
+
+def similarity(sig_a, sig_b):
+    """Estimasi Jaccard: proporsi posisi signature yang sama"""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+
+class FaqMiner:
+    """
+    Cluster pertanyaan mirip per JenisLayanan -> kandidat FAQ
+
+    Usage:
+        from apps.konsultasi.services import FaqMiner
+
+        miner = FaqMiner().load()
+        miner.run()                       # incremental: konsultasi selesai baru saja
+        miner.save()
+        miner.candidates(min_size=5, top=20)
+    """
+
+    STATE_NAME = "state.bin"
+
+    def __init__(self, directory=None, threshold=None, overlap=300):
+        config = get_config()
+        self.directory = Path(
+            directory or config["DIRECTORY"] or Path(settings.BASE_DIR) / "var" / "faq"
+        )
+        self.state_path = self.directory / self.STATE_NAME
+        self.threshold = threshold if threshold is not None else config["THRESHOLD"]
+        self.overlap = timedelta(seconds=overlap)
+        self.reset()
+
+    def reset(self):
+        # Per dokumen (index = urutan diproses)
+        self.pks = array("q")
+        self.jenis = array("q")
+        self.parent = array("I")
+        self.bucketed = array("B")
+        self.signatures = array("I")
+        self.pk_to_doc = {}
+        # hash(band) -> doc atau [doc, ...]; dibangun ulang saat load
+        self.buckets = {}
+        self.watermark = None
+
+    def __len__(self):
+        return len(self.pks)
+
+    # ===== PROSES =====
+
+    def run(self, full=False, chunk_size=2000):
+        """
+        Proses konsultasi selesai sejak watermark (atau semua jika full)
+
+        Konsultasi yang selesai dalam `overlap` detik sebelum watermark
+        dibaca ulang (transaksi yang commit terlambat), pk yang sudah
+        diproses dilewati.
+
+        Returns:
+            dict: processed, skipped, docs, clusters
+        """
+        from apps.konsultasi.models import Kunjungan
+
+        if full:
+            self.reset()
+
+        queryset = (
+            Kunjungan.objects.konsultasi()
+            .completed()
+            .exclude(konten__pertanyaan="")
+            .order_by("waktu_selesai", "id_kunjungan")
+        )
+        if self.watermark:
+            queryset = queryset.filter(waktu_selesai__gte=self.watermark - self.overlap)
+
+        processed = skipped = 0
+        watermark = self.watermark
+        for pk, id_jenis, pertanyaan, waktu_selesai in queryset.values_list(
+            "id_kunjungan", "id_jenis_id", "konten__pertanyaan", "waktu_selesai"
+        ).iterator(chunk_size=chunk_size):
+            if waktu_selesai and (watermark is None or waktu_selesai > watermark):
+                watermark = waktu_selesai
+            if self.add(pk, id_jenis, pertanyaan) is None:
+                skipped += 1
+            else:
+                processed += 1
+
+        self.watermark = watermark
+        return {
+            "processed": processed,
+            "skipped": skipped,
+            "docs": len(self),
+            "clusters": len(self.clusters(min_size=2)),
+        }
+
+    def add(self, pk, id_jenis, pertanyaan):
+        """
+        Masukkan satu pertanyaan & gabungkan ke cluster yang mirip
+
+        Returns:
+            int | None: index dokumen, None jika sudah ada / tanpa shingle
+        """
+        if pk in self.pk_to_doc:
+            return None
+        signature = minhash(shingles(pertanyaan))
+        if signature is None:
+            return None
+
+        doc = len(self.pks)
+        self.pks.append(pk)
+        self.jenis.append(id_jenis or 0)
+        self.parent.append(doc)
+        self.signatures.extend(signature)
+        self.pk_to_doc[pk] = doc
+
+        keys = self._band_keys(doc)
+        compared = Counter()
+        best = 0.0
+        for key in keys:
+            for member in self._bucket(key):
+                root = self.find(member)
+                if root == self.find(doc) or compared[root] >= MAX_COMPARE_PER_CLUSTER:
+                    continue
+                compared[root] += 1
+                score = similarity(signature, self.signature(member))
+                if score >= self.threshold:
+                    self.union(doc, member)
+                    best = max(best, score)
+
+        self.bucketed.append(best < NEAR_IDENTICAL)
+        if self.bucketed[doc]:
+            self._add_to_buckets(doc, keys)
+        return doc
+
+    def _band_keys(self, doc):
+        start = doc * NUM_PERM
+        jenis = self.jenis[doc]
+        return [
+            hash((jenis, band, self.signatures[start + band * ROWS:start + (band + 1) * ROWS].tobytes()))
+            for band in range(BANDS)
+        ]
+
+    def _bucket(self, key):
+        members = self.buckets.get(key)
+        if members is None:
+            return ()
+        return members if isinstance(members, list) else (members,)
+
+    def _add_to_buckets(self, doc, keys):
+        """Bucket cukup menyimpan satu anggota per cluster"""
+        root = self.find(doc)
+        for key in keys:
+            members = self.buckets.get(key)
+            if members is None:
+                self.buckets[key] = doc
+            elif isinstance(members, list):
+                if not any(self.find(member) == root for member in members):
+                    members.append(doc)
+            elif self.find(members) != root:
+                self.buckets[key] = [members, doc]
+
+    def signature(self, doc):
+        return self.signatures[doc * NUM_PERM:(doc + 1) * NUM_PERM]
+
+    # ===== UNION-FIND =====
+
+    def find(self, doc):
+        parent = self.parent
+        root = doc
+        while parent[root] != root:
+            root = parent[root]
+        while parent[doc] != root:
+            parent[doc], doc = root, parent[doc]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Root = dokumen terlama, supaya stabil antar run
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def clusters(self, min_size=2, id_jenis=None):
+        """
+        Returns:
+            list: [[doc, ...], ...] urut ukuran menurun
+        """
+        groups = defaultdict(list)
+        for doc in range(len(self.pks)):
+            if id_jenis is None or self.jenis[doc] == id_jenis:
+                groups[self.find(doc)].append(doc)
+        return sorted(
+            (members for members in groups.values() if len(members) >= min_size),
+            key=len, reverse=True,
+        )
+
+    # ===== KANDIDAT FAQ =====
+
+    def candidates(self, min_size=3, top=50, id_jenis=None):
+        """
+        Kandidat FAQ terurut (cluster terbesar dulu)
+
+        - pertanyaan: anggota paling mirip dengan anggota lain (medoid)
+        - jawaban: jawaban yang paling sering dipakai (terbaru jika seri)
+
+        Returns:
+            list[dict]: rank, id_jenis, jenis, jumlah, pertanyaan, jawaban,
+            sumber, variasi, id_kunjungan, terakhir
+        """
+        from apps.konsultasi.models import JenisLayanan, Kunjungan
+
+        clusters = self.clusters(min_size=min_size, id_jenis=id_jenis)[:top]
+        jenis_names = dict(JenisLayanan.objects.values_list("id_jenis", "nama_jenis"))
+
+        results = []
+        for rank, members in enumerate(clusters, start=1):
+            # Anggota terbaru dulu (doc index naik seiring waktu_selesai)
+            recent = sorted(members, reverse=True)[:MAX_MEMBERS_FETCH]
+            rows = {
+                row["id_kunjungan"]: row
+                for row in Kunjungan.objects.filter(pk__in=[self.pks[d] for d in recent]).values(
+                    "id_kunjungan", "tanggal_kunjungan",
+                    pertanyaan=F("konten__pertanyaan"),
+                    jawaban=F("konten__jawaban"),
+                    sumber=F("id_sumber__nama_sumber"),
+                )
+            }
+            present = [d for d in recent if self.pks[d] in rows]
+            if not present:
+                continue
+
+            medoid = self._medoid(present)
+            answers = Counter()
+            latest_answer = {}
+            for doc in present:
+                jawaban = (rows[self.pks[doc]]["jawaban"] or "").strip()
+                if jawaban:
+                    key = " ".join(jawaban.lower().split())
+                    answers[key] += 1
+                    latest_answer.setdefault(key, jawaban)
+            best_answer = max(answers, key=lambda key: answers[key], default=None)
+
+            variants = []
+            for doc in present:
+                text = rows[self.pks[doc]]["pertanyaan"].strip()
+                if text not in variants:
+                    variants.append(text)
+                if len(variants) == 3:
+                    break
+
+            sumber = Counter(rows[self.pks[d]]["sumber"] for d in present if rows[self.pks[d]]["sumber"])
+            jenis = self.jenis[members[0]]
+            results.append({
+                "rank": rank,
+                "id_jenis": jenis,
+                "jenis": jenis_names.get(jenis, ""),
+                "jumlah": len(members),
+                "pertanyaan": rows[self.pks[medoid]]["pertanyaan"],
+                "jawaban": latest_answer.get(best_answer, ""),
+                "sumber": sumber.most_common(1)[0][0] if sumber else "",
+                "variasi": variants,
+                "id_kunjungan": [self.pks[d] for d in present[:20]],
+                "terakhir": rows[self.pks[present[0]]]["tanggal_kunjungan"],
+            })
+        return results
+
+    def _medoid(self, members, sample=30):
+        """Anggota dengan total kemiripan tertinggi terhadap sampel anggota lain"""
+        sample_docs = members[:sample]
+        signatures = {doc: self.signature(doc) for doc in sample_docs}
+        return max(
+            sample_docs,
+            key=lambda doc: sum(similarity(signatures[doc], signatures[other]) for other in sample_docs),
+        )
+
+    # ===== PERSISTENSI =====
+
+    def load(self):
+        """Muat state run sebelumnya (jika ada); bucket LSH dibangun ulang"""
+        self.reset()
+        if not self.state_path.exists():
+            return self
+
+        with gzip.open(self.state_path, "rb") as fh:
+            header = json.loads(fh.readline())
+            if header.get("format") != STATE_FORMAT or header.get("version") != STATE_VERSION:
+                raise ValueError(f"{self.state_path} bukan state {STATE_FORMAT} v{STATE_VERSION}")
+            if header.get("num_perm") != NUM_PERM:
+                raise ValueError("NUM_PERM berubah; jalankan ulang dengan --full")
+            data = memoryview(fh.read())
+
+        n_docs = header["docs"]
+        offset = 0
+        for name, typecode, count in (
+            ("pks", "q", n_docs), ("jenis", "q", n_docs),
+            ("parent", "I", n_docs), ("bucketed", "B", n_docs),
+            ("signatures", "I", n_docs * NUM_PERM),
+        ):
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(data[offset:offset + size])
+            offset += size
+            setattr(self, name, column)
+
+        self.pk_to_doc = {pk: doc for doc, pk in enumerate(self.pks)}
+        self.watermark = parse_datetime(header["watermark"]) if header.get("watermark") else None
+        for doc in range(n_docs):
+            if self.bucketed[doc]:
+                self._add_to_buckets(doc, self._band_keys(doc))
+        return self
+
+    def save(self):
+        """Tulis state (atomic replace)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header = {
+            "format": STATE_FORMAT,
+            "version": STATE_VERSION,
+            "num_perm": NUM_PERM,
+            "docs": len(self.pks),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "saved_at": timezone.now().isoformat(),
+        }
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with gzip.open(tmp_path, "wb", compresslevel=6) as fh:
+            fh.write(json.dumps(header).encode("utf-8") + b"\n")
+            for column in (self.pks, self.jenis, self.parent, self.bucketed, self.signatures):
+                fh.write(column.tobytes())
+        tmp_path.replace(self.state_path)
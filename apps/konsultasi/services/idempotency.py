@@ -0,0 +1,165 @@
+"""
+Idempotency key untuk submit registrasi & penyelesaian
+
+Wi-Fi kantor yang putus-sambung membuat tamu menekan submit dua kali dan
+kiosk mengulang request. Tanpa kunci, tiap retry menjalankan
+Kunjungan.save() lagi (nomor terpakai + kunjungan ganda).
+
+- Klien mengirim kunci unik per submit (header Idempotency-Key)
+- Hasil pertama disimpan di tabel idempotency_key dalam transaksi yang
+  sama dengan aksinya, jadi keduanya commit/rollback bersama
+- Retry dengan kunci & isi yang sama -> hasil awal, tanpa validasi ulang
+  dan tanpa menyentuh penomoran
+- Kunci sama dengan isi berbeda -> IdempotencyConflict
+- Dua request bersamaan: yang kalah gagal di unique constraint, aksinya
+  di-rollback (nomor tidak terbuang) lalu mengembalikan hasil pemenang
+
+Konfigurasi lewat settings.KONSULTASI_IDEMPOTENCY:
+    TTL - detik sebuah kunci diingat (default 24 jam)
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+DEFAULTS = {
+    "TTL": 24 * 3600,
+}
+
+MAX_KEY_LENGTH = 64
+
+
+class IdempotencyConflict(Exception):
+    """Kunci sudah dipakai untuk submit dengan isi berbeda"""
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_IDEMPOTENCY", {}))
+    return config
+
+
+def fingerprint(payload):
+    """Hash isi request (JSON kanonik) untuk mendeteksi kunci yang dipakai ulang"""
+    body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+
+
+def _lookup(scope, key):
+    from apps.konsultasi.models import IdempotencyKey
+
+    record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if record is not None and record.expires_at <= timezone.now():
+        record.delete()
+        return None
+    return record
+
+
+def _replay(record, digest):
+    if record.fingerprint != digest:
+        raise IdempotencyConflict(
+            f"Idempotency-Key {record.key!r} sudah dipakai untuk data yang berbeda"
+        )
+    return record.response
+
+
+def run(scope, key, payload, action):
+    """
+    Jalankan action() sekali per (scope, key)
+
+    Usage:
+        response, replayed = idempotency.run(
+            "registrasi", key, data, lambda: {"id_kunjungan": ...}
+        )
+
+    Args:
+        action: callable tanpa argumen, mengembalikan dict JSON-serializable
+
+    Returns:
+        tuple: (response dict, replayed bool)
+
+    Raises:
+        ValidationError: kunci kosong / terlalu panjang
+        IdempotencyConflict: kunci sama, isi berbeda
+    """
+    from apps.konsultasi.models import IdempotencyKey
+
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({
+            "idempotency_key": f"Idempotency-Key wajib 1-{MAX_KEY_LENGTH} karakter."
+        })
+
+    digest = fingerprint(payload)
+    record = _lookup(scope, key)
+    if record is not None:
+        return _replay(record, digest), True
+
+    try:
+        with transaction.atomic():
+            response = action()
+            now = timezone.now()
+            IdempotencyKey.objects.create(
+                scope=scope, key=key, fingerprint=digest, response=response,
+                created_at=now, expires_at=now + timedelta(seconds=get_config()["TTL"]),
+            )
+    except IntegrityError:
+        # Request lain dengan kunci sama menang duluan
+        record = _lookup(scope, key)
+        if record is None:
+            raise
+        return _replay(record, digest), True
+    return response, False
+
+
+def idempotent_kunjungan(scope, payload):
+    """
+    Decorator method KunjunganService yang mengembalikan Kunjungan
+
+    Menambah argumen keyword idempotency_key; tanpa kunci method berjalan
+    seperti biasa. Kunjungan hasil replay diberi atribut
+    idempotent_replayed=True.
+
+    Usage:
+        @idempotent_kunjungan("complete_non_konsultasi",
+                              lambda kunjungan, petugas: {...})
+        def complete_non_konsultasi(self, kunjungan, petugas): ...
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, idempotency_key=None, **kwargs):
+            if idempotency_key is None:
+                return method(self, *args, **kwargs)
+
+            from apps.konsultasi.models import Kunjungan
+
+            response, replayed = run(
+                scope, idempotency_key, payload(*args, **kwargs),
+                lambda: {"id_kunjungan": method(self, *args, **kwargs).pk},
+            )
+            kunjungan = Kunjungan.objects.get(pk=response["id_kunjungan"])
+            kunjungan.idempotent_replayed = replayed
+            return kunjungan
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=900):
+    """Hapus kunci kedaluwarsa per batch; returns jumlah baris"""
+    from apps.konsultasi.models import IdempotencyKey
+
+    deleted = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
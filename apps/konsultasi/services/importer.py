@@ -0,0 +1,549 @@
+"""
+Import Service untuk buku tamu lama (CSV/XLSX)
+
+Handles:
+- Streaming file CSV/XLSX per chunk
+- Resolusi nama master data via dictionary yang di-cache sekali
+- Upsert Tamu berdasarkan email/no HP ternormalisasi (index in-memory)
+- Validasi per kolom, bulk insert baris yang lolos
+- Nomor kunjungan dialokasikan per blok bulan
+- Baris gagal ditulis ke reject file
+"""
+
+import csv
+from collections import defaultdict
+from datetime import date, datetime, time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from apps.konsultasi import audit
+from apps.konsultasi.normalizers import normalize_email, normalize_phone, normalize_name
+from apps.konsultasi.services import changefeed
+
+
+# Header kolom yang dikenali -> nama internal
+COLUMN_ALIASES = {
+    "tanggal": "tanggal",
+    "tanggal_kunjungan": "tanggal",
+    "nama": "nama",
+    "nama_tamu": "nama",
+    "email": "email",
+    "no_hp": "no_hp",
+    "hp": "no_hp",
+    "telepon": "no_hp",
+    "instansi": "instansi",
+    "instansi_perusahaan": "instansi",
+    "alamat": "alamat",
+    "tipe": "tipe",
+    "tipe_kunjungan": "tipe",
+    "kategori": "kategori",
+    "kategori_layanan": "kategori",
+    "jenis": "jenis",
+    "jenis_layanan": "jenis",
+    "pertanyaan": "pertanyaan",
+    "jawaban": "jawaban",
+    "media": "media",
+    "media_konsultasi": "media",
+    "sumber": "sumber",
+    "sumber_jawaban": "sumber",
+    "petugas": "petugas",
+    "status": "status",
+}
+
+REQUIRED_COLUMNS = ("tanggal", "nama", "tipe", "kategori", "jenis")
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y")
+
+STATUS_SELESAI = {"selesai", "ya", "y", "true", "1", "done"}
+STATUS_MENUNGGU = {"menunggu", "tidak", "n", "false", "0", "pending"}
+
+
+class BukuTamuImporter:
+    """
+    Service class untuk import massal buku tamu lama
+
+    Tidak memanggil Kunjungan.save() per baris; aturan clean()
+    diterapkan ulang per kolom supaya hasilnya tetap konsisten.
+
+    Usage:
+        from apps.konsultasi.services import BukuTamuImporter
+
+        importer = BukuTamuImporter(chunk_size=5000)
+        result = importer.run("bukutamu_2023.csv", reject_path="reject.csv")
+
+        # Buku tamu kantor cabang: nomor dari sequence kantor tersebut
+        BukuTamuImporter(kantor=2).run("bukutamu_cabang.csv")
+    """
+
+    def __init__(self, chunk_size=5000, batch_size=1000, dry_run=False, kantor=None):
+        from apps.konsultasi.models import DEFAULT_KANTOR
+
+        self.kantor = kantor or DEFAULT_KANTOR
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self._master_loaded = False
+
+    # ===== ENTRY POINT =====
+
+    def run(self, path, reject_path=None, sheet=None, delimiter=","):
+        """
+        Import file CSV/XLSX
+
+        Args:
+            path: str/Path - file sumber (.csv / .xlsx)
+            reject_path: str/Path - file CSV untuk baris yang gagal
+            sheet: str - nama sheet (XLSX saja, default sheet aktif)
+            delimiter: str - pemisah kolom (CSV saja)
+
+        Returns:
+            dict: {'total', 'imported', 'rejected', 'tamu_baru'}
+        """
+        self.load_master_data()
+        result = {"total": 0, "imported": 0, "rejected": 0, "tamu_baru": 0}
+
+        headers, rows = self._open_rows(path, sheet=sheet, delimiter=delimiter)
+        columns = self._map_columns(headers)
+
+        reject_fh = None
+        reject_writer = None
+        if reject_path:
+            reject_fh = open(reject_path, "w", newline="", encoding="utf-8")
+            reject_writer = csv.writer(reject_fh)
+            reject_writer.writerow(["baris", *headers, "alasan"])
+
+        try:
+            line_no = 1  # baris 1 = header
+            while True:
+                raw_chunk = list(islice(rows, self.chunk_size))
+                if not raw_chunk:
+                    break
+
+                chunk = self._project(raw_chunk, columns)
+                line_numbers = range(line_no + 1, line_no + 1 + len(raw_chunk))
+                line_no += len(raw_chunk)
+
+                errors = self.validate_chunk(chunk)
+                survivors = [i for i, err in enumerate(errors) if not err]
+
+                if survivors and not self.dry_run:
+                    result["tamu_baru"] += self.write_chunk(chunk, survivors)
+
+                result["total"] += len(raw_chunk)
+                result["imported"] += len(survivors)
+                result["rejected"] += len(raw_chunk) - len(survivors)
+
+                if reject_writer:
+                    for i, err in enumerate(errors):
+                        if err:
+                            reject_writer.writerow(
+                                [line_numbers[i], *raw_chunk[i], "; ".join(err)]
+                            )
+        finally:
+            if reject_fh:
+                reject_fh.close()
+
+        return result
+
+    # ===== MASTER DATA CACHE =====
+
+    def load_master_data(self):
+        """
+        Bangun dictionary nama -> id untuk master data, petugas & tamu
+
+        Dipanggil sekali per import, bukan per baris.
+        """
+        if self._master_loaded:
+            return
+
+        from apps.konsultasi.models import (
+            TipeKunjungan, KategoriLayanan, JenisLayanan,
+            MediaKonsultasi, SumberJawaban, Petugas, Tamu,
+        )
+
+        self.tipe_map = self._name_index(TipeKunjungan.objects.values_list("id_tipe", "nama_tipe"))
+        # Sama dengan Kunjungan.is_offline
+        self.tipe_offline = {
+            pk for pk, nama in TipeKunjungan.objects.values_list("id_tipe", "nama_tipe")
+            if nama.lower() == "offline"
+        }
+
+        kategori_rows = list(KategoriLayanan.objects.values_list("id_kategori", "nama_kategori"))
+        self.kategori_map = self._name_index(kategori_rows)
+        self.kategori_konsultasi = {
+            pk for pk, nama in kategori_rows if "konsultasi" in nama.lower()
+        }
+
+        # Jenis layanan unik per kategori (SPSE ada di beberapa kategori)
+        self.jenis_map = {}
+        for pk, kategori_id, nama in JenisLayanan.objects.values_list(
+            "id_jenis", "id_kategori_id", "nama_jenis"
+        ):
+            for key in self._name_keys(nama):
+                self.jenis_map.setdefault((kategori_id, key), pk)
+            self.jenis_map[(kategori_id, str(pk))] = pk
+
+        self.media_map = self._name_index(MediaKonsultasi.objects.values_list("id_media", "nama_media"))
+        self.media_tatap_muka = self.media_map.get("tatap muka")
+        self.sumber_map = self._name_index(SumberJawaban.objects.values_list("id_sumber", "nama_sumber"))
+
+        self.petugas_map = {}
+        for pk, username, nama in Petugas.objects.values_list("id_petugas", "username", "nama_petugas"):
+            self.petugas_map[normalize_name(username)] = pk
+            self.petugas_map.setdefault(normalize_name(nama), pk)
+
+        # Index tamu lama: satu scan kolom ternormalisasi (sama dengan
+        # Tamu.set_lookup_keys), lalu lookup O(1) per baris
+        self.tamu_by_email = {}
+        self.tamu_by_phone = {}
+        for pk, email, phone in Tamu.objects.values_list(
+            "id_tamu", "email_normalized", "no_hp_normalized"
+        ).iterator(chunk_size=5000):
+            if email:
+                self.tamu_by_email.setdefault(email, pk)
+            if phone:
+                self.tamu_by_phone.setdefault(phone, pk)
+
+        self._master_loaded = True
+
+    def _name_index(self, rows):
+        index = {}
+        for pk, nama in rows:
+            for key in self._name_keys(nama):
+                index.setdefault(key, pk)
+            index[str(pk)] = pk
+        return index
+
+    def _name_keys(self, nama):
+        """
+        Variasi kunci nama master data
+
+        "Offline (Luring)" -> "offline (luring)", "offline", "luring"
+        """
+        full = normalize_name(nama)
+        keys = [full]
+        if "(" in full:
+            head, _, tail = full.partition("(")
+            keys.append(head.strip())
+            keys.append(tail.rstrip(")").strip())
+        return [k for k in keys if k]
+
+    # ===== VALIDASI PER KOLOM =====
+
+    def validate_chunk(self, chunk):
+        """
+        Validasi chunk kolom per kolom, hasil di-resolve ke kolom id
+
+        Args:
+            chunk: dict kolom -> list nilai string (diubah in-place)
+
+        Returns:
+            list: daftar error per baris ([] = valid)
+        """
+        size = len(chunk["nama"])
+        errors = [[] for _ in range(size)]
+
+        def resolve(column, mapping, label, required=True):
+            resolved = []
+            for i, value in enumerate(chunk[column]):
+                key = normalize_name(value)
+                if not key:
+                    if required:
+                        errors[i].append(f"{label} kosong")
+                    resolved.append(None)
+                    continue
+                pk = mapping.get(key)
+                if pk is None:
+                    errors[i].append(f"{label} '{value}' tidak dikenal")
+                resolved.append(pk)
+            return resolved
+
+        # Kolom tanggal
+        tanggal = []
+        for i, value in enumerate(chunk["tanggal"]):
+            parsed = self._parse_date(value)
+            if parsed is None:
+                errors[i].append(f"tanggal '{value}' tidak valid")
+            tanggal.append(parsed)
+        chunk["tanggal"] = tanggal
+
+        # Kolom nama
+        for i, value in enumerate(chunk["nama"]):
+            if not value:
+                errors[i].append("nama kosong")
+            elif len(value) > 100:
+                errors[i].append("nama lebih dari 100 karakter")
+
+        # Kolom email
+        for i, value in enumerate(chunk["email"]):
+            if value:
+                try:
+                    validate_email(value)
+                except ValidationError:
+                    errors[i].append(f"email '{value}' tidak valid")
+                if len(value) > 100:
+                    errors[i].append("email lebih dari 100 karakter")
+
+        # Kolom no_hp
+        for i, value in enumerate(chunk["no_hp"]):
+            if len(value) > 15:
+                errors[i].append("no_hp lebih dari 15 karakter")
+
+        # Kolom instansi
+        for i, value in enumerate(chunk["instansi"]):
+            if len(value) > 150:
+                errors[i].append("instansi lebih dari 150 karakter")
+
+        # Master data
+        chunk["id_tipe"] = resolve("tipe", self.tipe_map, "tipe")
+        chunk["id_kategori"] = resolve("kategori", self.kategori_map, "kategori")
+        chunk["id_media"] = resolve("media", self.media_map, "media", required=False)
+        chunk["id_sumber"] = resolve("sumber", self.sumber_map, "sumber", required=False)
+        chunk["id_petugas"] = resolve("petugas", self.petugas_map, "petugas", required=False)
+
+        # Jenis harus sesuai kategori (aturan clean() #1)
+        id_jenis = []
+        for i, value in enumerate(chunk["jenis"]):
+            kategori_id = chunk["id_kategori"][i]
+            key = normalize_name(value)
+            pk = self.jenis_map.get((kategori_id, key)) if key else None
+            if not key:
+                errors[i].append("jenis kosong")
+            elif kategori_id is not None and pk is None:
+                errors[i].append(f"jenis '{value}' tidak sesuai kategori")
+            id_jenis.append(pk)
+        chunk["id_jenis"] = id_jenis
+
+        # Kolom status (kosong = data historis dianggap selesai)
+        status = []
+        for i, value in enumerate(chunk["status"]):
+            key = normalize_name(value)
+            if not key or key in STATUS_SELESAI:
+                status.append(True)
+            elif key in STATUS_MENUNGGU:
+                status.append(False)
+            else:
+                errors[i].append(f"status '{value}' tidak dikenal")
+                status.append(False)
+        chunk["status_selesai"] = status
+
+        # Aturan konsultasi (clean() #2 & #3) + auto media tatap muka
+        for i in range(size):
+            if chunk["id_kategori"][i] not in self.kategori_konsultasi:
+                continue
+            if not chunk["pertanyaan"][i]:
+                errors[i].append("pertanyaan wajib untuk konsultasi")
+            if not status[i]:
+                continue
+            if not chunk["id_media"][i] and chunk["id_tipe"][i] in self.tipe_offline:
+                chunk["id_media"][i] = self.media_tatap_muka
+            if not chunk["jawaban"][i]:
+                errors[i].append("jawaban wajib untuk konsultasi selesai")
+            if not chunk["id_media"][i]:
+                errors[i].append("media wajib untuk konsultasi selesai")
+            if not chunk["id_sumber"][i]:
+                errors[i].append("sumber wajib untuk konsultasi selesai")
+
+        return errors
+
+    # ===== WRITE =====
+
+    @transaction.atomic
+    def write_chunk(self, chunk, survivors):
+        """
+        Bulk insert Tamu baru + Kunjungan untuk baris yang lolos validasi
+
+        Returns:
+            int: jumlah Tamu baru
+        """
+        from apps.konsultasi.models import Tamu, Kunjungan, KunjunganKonten
+
+        # 1. Upsert tamu via index in-memory
+        tamu_ids = {}
+        new_tamu = []
+        new_tamu_rows = defaultdict(list)
+        pending_keys = {}
+
+        for i in survivors:
+            email = normalize_email(chunk["email"][i])
+            phone = normalize_phone(chunk["no_hp"][i])
+            pk = (
+                (email and self.tamu_by_email.get(email))
+                or (phone and self.tamu_by_phone.get(phone))
+            )
+            if pk:
+                tamu_ids[i] = pk
+                continue
+
+            # Email & no HP sama-sama kunci: baris kedua yang hanya punya
+            # no HP tetap ikut tamu baru dari baris pertama
+            keys = [key for key in (("email", email), ("phone", phone)) if key[1]]
+            index = next((pending_keys[key] for key in keys if key in pending_keys), None)
+            if index is not None:
+                new_tamu_rows[index].append(i)
+                for key in keys:
+                    pending_keys.setdefault(key, index)
+                continue
+
+            index = len(new_tamu)
+            new_tamu.append(Tamu(
+                nama=chunk["nama"][i],
+                email=chunk["email"][i].strip(),
+                no_hp=chunk["no_hp"][i].strip(),
+                instansi_perusahaan=chunk["instansi"][i],
+                alamat=chunk["alamat"][i],
+            ))
+            new_tamu_rows[index].append(i)
+            for key in keys:
+                pending_keys[key] = index
+
+        for tamu in new_tamu:
+            tamu.set_lookup_keys()
+        Tamu.objects.bulk_create(new_tamu, batch_size=self.batch_size)
+        audit.record_many(new_tamu, audit.ACTION_CREATE)
+        for index, tamu in enumerate(new_tamu):
+            for i in new_tamu_rows[index]:
+                tamu_ids[i] = tamu.pk
+            if tamu.email_normalized:
+                self.tamu_by_email.setdefault(tamu.email_normalized, tamu.pk)
+            if tamu.no_hp_normalized:
+                self.tamu_by_phone.setdefault(tamu.no_hp_normalized, tamu.pk)
+
+        # 2. Nomor kunjungan: satu blok per bulan
+        by_month = defaultdict(list)
+        for i in survivors:
+            tanggal = chunk["tanggal"][i]
+            by_month[(tanggal.year, tanggal.month)].append(i)
+
+        nomor = {}
+        for rows in by_month.values():
+            block = Kunjungan.reserve_nomor(chunk["tanggal"][rows[0]], count=len(rows), kantor=self.kantor)
+            nomor.update(zip(rows, block))
+
+        # 3. Bulk insert kunjungan (tanpa save() per baris)
+        now = timezone.now()
+        tz = timezone.get_current_timezone()
+        # Jam selesai asli tidak tercatat: akhir hari kunjungan (lokal),
+        # bukan waktu import, supaya laporan per waktu_selesai tetap di harinya
+        waktu_selesai = {
+            tanggal: min(now, timezone.make_aware(datetime.combine(tanggal, time.max), tz))
+            for tanggal in {chunk["tanggal"][i] for i in survivors if chunk["status_selesai"][i]}
+        }
+        kunjungan = [
+            Kunjungan(
+                id_kantor_id=self.kantor,
+                nomor_kunjungan=nomor[i],
+                tanggal_kunjungan=chunk["tanggal"][i],
+                id_tamu_id=tamu_ids[i],
+                id_tipe_id=chunk["id_tipe"][i],
+                id_kategori_id=chunk["id_kategori"][i],
+                id_jenis_id=chunk["id_jenis"][i],
+                pertanyaan=chunk["pertanyaan"][i],
+                jawaban=chunk["jawaban"][i],
+                id_media_id=chunk["id_media"][i],
+                id_sumber_id=chunk["id_sumber"][i],
+                id_petugas_id=chunk["id_petugas"][i],
+                status_selesai=chunk["status_selesai"][i],
+                waktu_selesai=waktu_selesai.get(chunk["tanggal"][i]) if chunk["status_selesai"][i] else None,
+                updated_at=now,
+            )
+            for i in survivors
+        ]
+        Kunjungan.objects.bulk_create(kunjungan, batch_size=self.batch_size)
+        konten = KunjunganKonten.bulk_create_for(kunjungan, batch_size=self.batch_size)
+        audit.record_many([*kunjungan, *konten], audit.ACTION_CREATE)
+        changefeed.record_bulk(kunjungan, "create", batch_size=self.batch_size)
+
+        return len(new_tamu)
+
+    # ===== FILE READERS =====
+
+    def _open_rows(self, path, sheet=None, delimiter=","):
+        """Return (headers, iterator baris) tanpa memuat seluruh file"""
+        path = str(path)
+        if path.lower().endswith((".xlsx", ".xlsm")):
+            return self._open_xlsx(path, sheet)
+        return self._open_csv(path, delimiter)
+
+    def _open_csv(self, path, delimiter):
+        fh = open(path, newline="", encoding="utf-8-sig")
+        reader = csv.reader(fh, delimiter=delimiter)
+        headers = next(reader, [])
+
+        def rows():
+            with fh:
+                yield from reader
+
+        return headers, rows()
+
+    def _open_xlsx(self, path, sheet):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError(
+                "Import XLSX membutuhkan openpyxl (pip install openpyxl)"
+            )
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        worksheet = workbook[sheet] if sheet else workbook.active
+        cells = worksheet.iter_rows(values_only=True)
+        headers = [str(h or "") for h in next(cells, ())]
+
+        def rows():
+            try:
+                for row in cells:
+                    yield ["" if v is None else v for v in row]
+            finally:
+                workbook.close()
+
+        return headers, rows()
+
+    def _map_columns(self, headers):
+        """Header file -> posisi kolom internal"""
+        columns = {}
+        for position, header in enumerate(headers):
+            key = COLUMN_ALIASES.get(normalize_name(str(header)).replace(" ", "_"))
+            if key and key not in columns:
+                columns[key] = position
+
+        missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+        if missing:
+            raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+        return columns
+
+    def _project(self, raw_chunk, columns):
+        """Ubah list baris menjadi dict kolom -> list nilai (columnar)"""
+        chunk = {}
+        for name in set(COLUMN_ALIASES.values()):
+            position = columns.get(name)
+            if position is None:
+                chunk[name] = [""] * len(raw_chunk)
+                continue
+            keep_dates = name == "tanggal"
+            chunk[name] = [
+                self._cell(row[position], keep_dates) if position < len(row) else ""
+                for row in raw_chunk
+            ]
+        return chunk
+
+    def _cell(self, value, keep_dates=False):
+        # Sel XLSX bertipe tanggal dipertahankan, selain itu jadi string
+        if keep_dates and isinstance(value, (date, datetime)):
+            return value
+        return str(value).strip()
+
+    def _parse_date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        return None
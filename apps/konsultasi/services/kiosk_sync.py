@@ -0,0 +1,130 @@
+"""
+Protokol sync kiosk offline (registrasi tatap muka di meja satelit)
+
+Kiosk tetap menerima registrasi saat koneksi ke server putus: tiap
+registrasi disimpan di antrian lokal dengan UUID buatan kiosk, lalu
+di-upload per batch (gzip JSON) saat koneksi kembali:
+
+    POST /api/kiosk/sync/          (header X-Kiosk-Token, Content-Encoding: gzip)
+    {"master_version": 12, "registrations": [{"client_uuid": "...", "tanggal": "2025-12-01", ...}]}
+
+    200 {"results": [{"client_uuid", "status", "id_kunjungan", "nomor_kunjungan", "tanggal", "errors"}],
+         "master": {"version": 13, "data": {...} | null}}
+
+- Batch diterapkan lewat KunjunganService.register_batch: satu
+  transaksi, bulk insert, idempoten per client_uuid (upload ulang setelah
+  timeout -> status "duplicate" dengan nomor yang sama)
+- master.data hanya dikirim jika versi master data kiosk sudah usang
+  (dokumen utuh - master data kecil dan tidak punya riwayat per baris)
+- Satu round trip menyinkronkan sampai MAX_BATCH registrasi
+- Registrasi masuk ke kantor kiosk (KANTOR) dan memakai nomor urut
+  kantor tersebut
+
+Klien simulasi (antrian SQLite lokal): apps/konsultasi/kiosk.py
+
+Konfigurasi lewat settings.KONSULTASI_KIOSK_SYNC:
+    MAX_BATCH         - registrasi per request
+    MAX_BYTES         - batas body setelah dekompresi
+    MAX_BACKDATE_DAYS - registrasi offline tertua yang diterima
+    KANTOR            - {nama kiosk: id_kantor}; kiosk tak terdaftar -> kantor 1
+"""
+
+import json
+import zlib
+
+from django.conf import settings
+
+from apps.konsultasi.services import master_data
+
+
+DEFAULTS = {
+    "MAX_BATCH": 500,
+    "MAX_BYTES": 5 * 1024 * 1024,
+    "MAX_BACKDATE_DAYS": 30,
+    "KANTOR": {},
+}
+
+
+class SyncError(ValueError):
+    """Payload sync tidak valid -> 400 / 413"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_KIOSK_SYNC", {}))
+    return config
+
+
+def kantor_for_kiosk(kiosk):
+    """Nama kiosk (KONSULTASI_RATELIMIT["KIOSKS"]) -> id_kantor"""
+    from apps.konsultasi.models import DEFAULT_KANTOR
+
+    return get_config()["KANTOR"].get(kiosk, DEFAULT_KANTOR)
+
+
+def decode_body(body, content_encoding="", max_bytes=None):
+    """
+    Body request (gzip atau JSON biasa) -> dict
+
+    Dekompresi dibatasi max_bytes supaya body kecil tidak bisa mengembang
+    jadi ratusan MB (gzip bomb).
+    """
+    max_bytes = max_bytes or get_config()["MAX_BYTES"]
+    if content_encoding.strip().lower() == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, max_bytes + 1)
+        except zlib.error:
+            raise SyncError("Body gzip rusak.")
+    if len(body) > max_bytes:
+        raise SyncError("Batch terlalu besar.", status=413)
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise SyncError("Body harus JSON.")
+    if not isinstance(payload, dict) or not isinstance(payload.get("registrations", []), list):
+        raise SyncError("Body harus objek JSON dengan daftar registrations.")
+    return payload
+
+
+def master_delta(client_version):
+    """
+    Returns:
+        dict: {"version": versi server, "data": dokumen master | None jika kiosk sudah terbaru}
+    """
+    body, _, version = master_data.get_document()
+    try:
+        up_to_date = int(client_version) == version
+    except (TypeError, ValueError):
+        up_to_date = False
+    return {"version": version, "data": None if up_to_date else json.loads(body)}
+
+
+def sync(payload, kantor=None):
+    """
+    Terapkan satu batch upload kiosk
+
+    Args:
+        payload: dict hasil decode_body
+        kantor: id Kantor kiosk (lihat kantor_for_kiosk)
+
+    Returns:
+        dict: {"results": [...], "master": {...}}
+    """
+    from apps.konsultasi.services import KunjunganService
+
+    config = get_config()
+    registrations = payload.get("registrations", [])
+    if len(registrations) > config["MAX_BATCH"]:
+        raise SyncError(f"Maksimal {config['MAX_BATCH']} registrasi per batch.", status=413)
+    if not all(isinstance(item, dict) for item in registrations):
+        raise SyncError("Setiap registrasi harus objek JSON.")
+
+    results = KunjunganService().register_batch(
+        registrations, max_backdate_days=config["MAX_BACKDATE_DAYS"], kantor=kantor,
+    ) if registrations else []
+    return {"results": results, "master": master_delta(payload.get("master_version"))}
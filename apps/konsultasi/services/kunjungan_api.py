@@ -0,0 +1,279 @@
+"""
+API JSON read-only untuk list & detail kunjungan (dashboard / integrasi)
+
+    GET /api/kunjungan/?status=menunggu&dari=2025-12-01&fields=id,nomor,nama_tamu
+    GET /api/kunjungan/<id>/?fields=id,nomor,pertanyaan,jawaban
+
+- Serialisasi langsung dari values() hanya untuk field yang diminta
+  (tanpa instance model; join tamu/master hanya jika field-nya diminta)
+- Filter = method KunjunganQuerySet (status, rentang tanggal, kantor,
+  kategori, jenis, tipe, petugas, search)
+- Keyset cursor di urutan list admin (-tanggal_kunjungan, -id_kunjungan):
+  halaman ke-N sama murahnya dengan halaman pertama
+- ETag / Last-Modified dari perubahan terakhir (change feed, updated_at
+  terbaru kunjungan, tamu, petugas & kantor yang field-nya ikut disajikan,
+  versi master data): polling yang tidak berubah -> 304 tanpa menjalankan
+  query list
+
+Konfigurasi lewat settings.KONSULTASI_API:
+    TOKEN         - jika diisi, wajib header Authorization: Bearer <TOKEN>
+                    (jika kosong: hanya staff yang login)
+    DEFAULT_LIMIT - baris per halaman jika limit tidak diisi
+    MAX_LIMIT     - batas atas limit
+"""
+
+import base64
+import binascii
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max, Q
+
+from apps.konsultasi import periods
+from apps.konsultasi.services import master_data
+
+
+DEFAULTS = {
+    "TOKEN": "",
+    "DEFAULT_LIMIT": 50,
+    "MAX_LIMIT": 200,
+}
+
+# Nama field API -> path values()
+FIELDS = {
+    "id": "id_kunjungan",
+    "kantor": "id_kantor_id",
+    "nama_kantor": "id_kantor__nama_kantor",
+    "nomor": "nomor_kunjungan",
+    "tanggal": "tanggal_kunjungan",
+    "tamu": "id_tamu_id",
+    "nama_tamu": "id_tamu__nama",
+    "instansi": "id_tamu__instansi_perusahaan",
+    "tipe": "id_tipe_id",
+    "nama_tipe": "id_tipe__nama_tipe",
+    "kategori": "id_kategori_id",
+    "nama_kategori": "id_kategori__nama_kategori",
+    "jenis": "id_jenis_id",
+    "nama_jenis": "id_jenis__nama_jenis",
+    "media": "id_media_id",
+    "sumber": "id_sumber_id",
+    "petugas": "id_petugas_id",
+    "nama_petugas": "id_petugas__nama_petugas",
+    "selesai": "status_selesai",
+    "waktu_selesai": "waktu_selesai",
+    "updated_at": "updated_at",
+}
+
+# Teks panjang (tabel kunjungan_konten): hanya di endpoint detail
+DETAIL_FIELDS = {
+    **FIELDS,
+    "pertanyaan": "konten__pertanyaan",
+    "jawaban": "konten__jawaban",
+}
+
+DEFAULT_LIST_FIELDS = (
+    "id", "nomor", "tanggal", "nama_tamu", "nama_kategori", "nama_jenis", "selesai",
+)
+DEFAULT_DETAIL_FIELDS = tuple(DETAIL_FIELDS)
+
+STATUS_FILTERS = {"menunggu": "pending", "selesai": "completed"}
+ID_FILTERS = {
+    "kantor": "by_kantor",
+    "kategori": "by_kategori",
+    "jenis": "by_jenis",
+    "tipe": "by_tipe",
+    "petugas": "by_petugas",
+}
+
+
+class InvalidQuery(ValueError):
+    """Parameter query tidak valid -> 400"""
+
+    def __init__(self, param, message):
+        super().__init__(message)
+        self.param = param
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_API", {}))
+    return config
+
+
+# ===== PARAMETER =====
+
+def parse_fields(value, allowed, default):
+    """'id,nomor' -> ['id', 'nomor'] (urutan dipertahankan, tanpa duplikat)"""
+    if not value:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise InvalidQuery("fields", f"Field tidak dikenal: {', '.join(unknown)}")
+    return fields
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidQuery(name, "Format tanggal YYYY-MM-DD.")
+
+
+def _parse_int(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise InvalidQuery(name, "Harus bilangan bulat.")
+
+
+def filter_queryset(queryset, params):
+    """
+    Terapkan filter query string lewat method KunjunganQuerySet
+
+    Params: status (menunggu|selesai), dari, sampai (YYYY-MM-DD, inklusif),
+    kantor, kategori, jenis, tipe, petugas (id), q (nomor / nama / instansi / email)
+    """
+    status = params.get("status")
+    if status:
+        if status not in STATUS_FILTERS:
+            raise InvalidQuery("status", "Pilih menunggu atau selesai.")
+        queryset = getattr(queryset, STATUS_FILTERS[status])()
+
+    start, end = _parse_date(params, "dari"), _parse_date(params, "sampai")
+    if start and end:
+        queryset = queryset.by_date_range(start, end)
+    elif start:
+        queryset = queryset.filter(tanggal_kunjungan__gte=start)
+    elif end:
+        queryset = queryset.filter(tanggal_kunjungan__lt=periods.day(end).end)
+
+    for param, method in ID_FILTERS.items():
+        value = _parse_int(params, param)
+        if value is not None:
+            queryset = getattr(queryset, method)(value)
+
+    return queryset.search((params.get("q") or "").strip())
+
+
+# ===== CURSOR =====
+
+def encode_cursor(tanggal, pk):
+    raw = f"{tanggal.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        tanggal, pk = raw.split("|")
+        return date.fromisoformat(tanggal), int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise InvalidQuery("cursor", "Cursor tidak valid.")
+
+
+# ===== VERSI (conditional GET) =====
+
+# Tabel relasi yang field-nya ikut disajikan (nama_tamu, instansi,
+# nama_petugas, nama_kantor): perubahannya harus mengganti ETag juga
+RELATED_FIELDS = ("id_tamu", "id_petugas", "id_kantor")
+
+
+def _stamp(value):
+    return value.timestamp() if value else 0
+
+
+def change_marker(using=DEFAULT_DB_ALIAS):
+    """
+    Penanda perubahan terakhir seluruh data kunjungan + tamu / petugas /
+    kantor (query berindex, tanpa membaca baris kunjungan)
+
+    Returns:
+        tuple: (token versi, datetime perubahan terakhir | None)
+    """
+    from apps.konsultasi.models import Kantor, Kunjungan, KunjunganEvent, Petugas, Tamu
+
+    event = KunjunganEvent.objects.using(using).order_by("-pk").values_list("pk", "created_at").first()
+    updates = [
+        model.objects.using(using).aggregate(last=Max("updated_at"))["last"]
+        for model in (Kunjungan, Tamu, Petugas, Kantor)
+    ]
+    version = master_data.get_version(using)
+
+    event_id, event_at = event or (0, None)
+    last_modified = max(filter(None, (event_at, *updates)), default=None)
+    return ".".join([str(event_id), *(str(_stamp(value)) for value in updates), str(version)]), last_modified
+
+
+def list_etag(marker, params):
+    """ETag list = versi data + query string (urutan parameter tidak berpengaruh)"""
+    query = "&".join(f"{key}={value}" for key, value in sorted(params.items()))
+    return "kl-" + hashlib.sha256(f"{marker}?{query}".encode()).hexdigest()[:24]
+
+
+# ===== QUERY =====
+
+def list_page(params, using=DEFAULT_DB_ALIAS):
+    """
+    Satu halaman list (dict dari values(), hanya field yang diminta)
+
+    Returns:
+        dict: {'results': [...], 'next': cursor | None}
+    """
+    from apps.konsultasi.models import Kunjungan
+
+    config = get_config()
+    fields = parse_fields(params.get("fields"), FIELDS, DEFAULT_LIST_FIELDS)
+    limit = _parse_int(params, "limit") or config["DEFAULT_LIMIT"]
+    limit = min(max(1, limit), config["MAX_LIMIT"])
+
+    queryset = filter_queryset(Kunjungan.objects.using(using).all(), params)
+    if params.get("cursor"):
+        tanggal, pk = decode_cursor(params["cursor"])
+        queryset = queryset.filter(
+            Q(tanggal_kunjungan__lt=tanggal) | Q(tanggal_kunjungan=tanggal, id_kunjungan__lt=pk)
+        )
+
+    # Kolom urutan selalu diambil untuk cursor, dibuang jika tidak diminta
+    paths = dict.fromkeys([FIELDS[name] for name in fields] + ["tanggal_kunjungan", "id_kunjungan"])
+    rows = list(
+        queryset.order_by("-tanggal_kunjungan", "-id_kunjungan").values(*paths)[:limit + 1]
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["tanggal_kunjungan"], rows[-1]["id_kunjungan"])
+
+    return {
+        "results": [{name: row[FIELDS[name]] for name in fields} for row in rows],
+        "next": next_cursor,
+    }
+
+
+def detail(pk, params, using=DEFAULT_DB_ALIAS):
+    """
+    Satu kunjungan (boleh termasuk pertanyaan/jawaban, satu query)
+
+    Returns:
+        tuple: (dict | None, token versi baris | None, datetime perubahan
+        terakhir | None) - kunjungan + tamu / petugas / kantor-nya
+    """
+    from apps.konsultasi.models import Kunjungan
+
+    fields = parse_fields(params.get("fields"), DETAIL_FIELDS, DEFAULT_DETAIL_FIELDS)
+    stamps = ["updated_at", *(f"{related}__updated_at" for related in RELATED_FIELDS)]
+    paths = dict.fromkeys([DETAIL_FIELDS[name] for name in fields] + stamps)
+    row = Kunjungan.objects.using(using).filter(pk=pk).values(*paths).first()
+    if row is None:
+        return None, None, None
+    updates = [row[path] for path in stamps]
+    marker = ".".join([str(pk), *(str(_stamp(value)) for value in updates)])
+    return {name: row[DETAIL_FIELDS[name]] for name in fields}, marker, max(filter(None, updates))
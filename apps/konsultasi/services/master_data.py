@@ -0,0 +1,125 @@
+"""
+Dokumen JSON master data (tipe, kategori -> jenis, media, sumber)
+
+Form publik dan admin butuh hierarki kategori -> jenis layanan untuk
+dropdown bertingkat. Daripada satu request per dropdown, seluruh master
+data dirender sekali per versi:
+
+- Versi = MasterDataVersion.version, dinaikkan signal save/delete master
+- Render  : JSON bytes + ETag kuat, di-memo per proses dan di cache Django
+- Request : satu query PK untuk versi; If-None-Match yang cocok -> 304
+
+Perubahan lewat queryset.update()/SQL mentah tidak memicu signal; panggil
+bump_version() setelahnya.
+"""
+
+import hashlib
+import json
+import threading
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+
+
+CACHE_KEY = "konsultasi:master_data:{using}:{version}"
+CACHE_TIMEOUT = 24 * 3600
+
+_memo = {}
+_lock = threading.Lock()
+
+
+def get_version(using=DEFAULT_DB_ALIAS):
+    """Versi master data saat ini (0 jika belum pernah berubah)"""
+    from apps.konsultasi.models import MasterDataVersion
+
+    version = MasterDataVersion.objects.using(using).filter(pk=1).values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_version(using=DEFAULT_DB_ALIAS):
+    """Naikkan versi (dalam transaksi pemanggil); returns versi baru"""
+    from apps.konsultasi.models import MasterDataVersion
+
+    manager = MasterDataVersion.objects.using(using)
+    now = timezone.now()
+    if not manager.filter(pk=1).update(version=F("version") + 1, updated_at=now):
+        manager.get_or_create(pk=1, defaults={"version": 1, "updated_at": now})
+    return get_version(using)
+
+
+def build_document(using=DEFAULT_DB_ALIAS):
+    """
+    Returns:
+        dict: {"tipe": [...], "kategori": [{"id", "nama", "jenis": [...]}], "media", "sumber"}
+    """
+    from apps.konsultasi.models import (
+        JenisLayanan, KategoriLayanan, MediaKonsultasi, SumberJawaban, TipeKunjungan,
+    )
+
+    jenis_by_kategori = {}
+    for id_jenis, id_kategori, nama in (
+        JenisLayanan.objects.using(using).order_by("id_kategori", "id_jenis")
+        .values_list("id_jenis", "id_kategori", "nama_jenis")
+    ):
+        jenis_by_kategori.setdefault(id_kategori, []).append({"id": id_jenis, "nama": nama})
+
+    def rows(model, pk, nama):
+        return [
+            {"id": value, "nama": label}
+            for value, label in model.objects.using(using).order_by(pk).values_list(pk, nama)
+        ]
+
+    return {
+        "tipe": rows(TipeKunjungan, "id_tipe", "nama_tipe"),
+        "kategori": [
+            {**item, "jenis": jenis_by_kategori.get(item["id"], [])}
+            for item in rows(KategoriLayanan, "id_kategori", "nama_kategori")
+        ],
+        "media": rows(MediaKonsultasi, "id_media", "nama_media"),
+        "sumber": rows(SumberJawaban, "id_sumber", "nama_sumber"),
+    }
+
+
+def get_document(version=None, using=DEFAULT_DB_ALIAS):
+    """
+    Dokumen ter-render untuk versi saat ini
+
+    Usage:
+        body, etag, version = get_document()
+
+    Returns:
+        tuple: (bytes JSON, ETag tanpa tanda kutip, versi)
+    """
+    if version is None:
+        version = get_version(using)
+    key = (using, version)
+    cached = _memo.get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        cached = _memo.get(key)
+        if cached is None:
+            cache_key = CACHE_KEY.format(using=using, version=version)
+            cached = cache.get(cache_key)
+            if cached is None:
+                # Versi dibaca sebelum data: dokumen versi v paling buruk
+                # berisi data yang lebih baru, tidak pernah yang lebih lama
+                document = {"version": version, **build_document(using)}
+                body = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode()
+                etag = f"md{version}-{hashlib.sha256(body).hexdigest()[:16]}"
+                cached = (body, etag, version)
+                cache.set(cache_key, cached, CACHE_TIMEOUT)
+            # Hanya simpan versi terbaru per database
+            for old in [k for k in _memo if k[0] == using]:
+                del _memo[old]
+            _memo[key] = cached
+    return cached
+
+
+def clear_memo():
+    """Kosongkan memo proses (test)"""
+    with _lock:
+        _memo.clear()
@@ -0,0 +1,196 @@
+"""
+Transactional outbox untuk notifikasi (email / WhatsApp)
+
+Mengirim email di dalam transaksi complete_konsultasi menambah latency
+beberapa detik dan ikut gagal jika SMTP mati. Jadi:
+
+1. enqueue() menulis baris outbox di transaksi yang sama dengan
+   perubahan status (commit bersama, rollback bersama)
+2. drain() (command drain_outbox) mengambil batch yang jatuh tempo,
+   menyewa (lease) baris tersebut, lalu mengirim lewat backend per
+   channel (notifications.py) di luar transaksi
+3. Gagal -> attempts + 1, dijadwalkan ulang dengan backoff eksponensial;
+   setelah MAX_ATTEMPTS status "failed"
+
+Worker yang mati di tengah batch tidak menghilangkan pesan: lease habis
+dan pesan diambil lagi (at-least-once).
+
+Konfigurasi lewat settings.KONSULTASI_OUTBOX:
+    BATCH_SIZE   - pesan per batch
+    MAX_ATTEMPTS - percobaan sebelum status failed
+    BACKOFF_BASE - detik tunda setelah gagal pertama (dobel tiap gagal)
+    BACKOFF_MAX  - batas atas tunda
+    LEASE        - detik pesan yang sedang dikirim tidak diambil worker lain
+"""
+
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.konsultasi import metrics, notifications
+
+
+DEFAULTS = {
+    "BATCH_SIZE": 100,
+    "MAX_ATTEMPTS": 8,
+    "BACKOFF_BASE": 30,
+    "BACKOFF_MAX": 3600,
+    "LEASE": 300,
+}
+
+TOPIC_KONSULTASI_SELESAI = "konsultasi.selesai"
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, "KONSULTASI_OUTBOX", {}))
+    return config
+
+
+# ===== ENQUEUE =====
+
+def enqueue(topic, channel, recipient, payload):
+    """
+    Tulis pesan ke outbox; panggil di dalam transaction.atomic aksi terkait
+
+    Returns:
+        Outbox instance
+    """
+    from apps.konsultasi.models import Outbox
+
+    return Outbox.objects.create(
+        topic=topic, channel=channel, recipient=recipient, payload=payload,
+    )
+
+
+def enqueue_konsultasi_selesai(kunjungan):
+    """
+    Notifikasi jawaban ke tamu: email jika ada, selain itu WhatsApp
+
+    Returns:
+        Outbox | None: None jika tamu tidak punya kontak
+    """
+    tamu = kunjungan.id_tamu
+    if tamu.email:
+        channel, recipient = "email", tamu.email
+    elif tamu.no_hp_normalized:
+        channel, recipient = "whatsapp", tamu.no_hp_normalized
+    else:
+        return None
+
+    return enqueue(TOPIC_KONSULTASI_SELESAI, channel, recipient, {
+        "id_kunjungan": kunjungan.pk,
+        "nomor_kunjungan": kunjungan.nomor_kunjungan,
+        "nama": tamu.nama,
+        "pertanyaan": kunjungan.pertanyaan,
+        "jawaban": kunjungan.jawaban,
+    })
+
+
+# ===== DRAIN =====
+
+def backoff(attempts, config=None):
+    """Detik tunda setelah gagal ke-`attempts` (eksponensial + jitter 10%)"""
+    config = config or get_config()
+    delay = min(config["BACKOFF_BASE"] * 2 ** max(attempts - 1, 0), config["BACKOFF_MAX"])
+    return delay * random.uniform(0.9, 1.1)
+
+
+def claim(batch_size, lease):
+    """
+    Ambil & sewa satu batch pesan yang jatuh tempo
+
+    PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED, jadi beberapa worker
+    bisa drain bersamaan tanpa saling menunggu.
+    """
+    from apps.konsultasi.models import Outbox
+
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = Outbox.objects.filter(
+            status=Outbox.STATUS_PENDING, available_at__lte=now,
+        ).order_by("available_at", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        messages = list(queryset[:batch_size])
+        if messages:
+            Outbox.objects.filter(pk__in=[m.pk for m in messages]).update(
+                available_at=now + timedelta(seconds=lease),
+                attempts=F("attempts") + 1,
+            )
+    for message in messages:
+        message.attempts += 1
+    return messages
+
+
+def drain(batch_size=None, max_batches=None):
+    """
+    Kirim pesan yang jatuh tempo sampai antrian kosong
+
+    Returns:
+        dict: {'sent', 'retried', 'failed', 'batches'}
+    """
+    from apps.konsultasi.models import Outbox
+
+    config = get_config()
+    batch_size = batch_size or config["BATCH_SIZE"]
+    stats = {"sent": 0, "retried": 0, "failed": 0, "batches": 0}
+
+    while max_batches is None or stats["batches"] < max_batches:
+        messages = claim(batch_size, config["LEASE"])
+        if not messages:
+            break
+        stats["batches"] += 1
+
+        sent = []
+        for message in messages:
+            try:
+                notifications.get_backend(message.channel).send(message)
+            except Exception as exc:
+                now = timezone.now()
+                error = f"{type(exc).__name__}: {exc}"[:2000]
+                if message.attempts >= config["MAX_ATTEMPTS"]:
+                    Outbox.objects.filter(pk=message.pk).update(
+                        status=Outbox.STATUS_FAILED, last_error=error,
+                    )
+                    stats["failed"] += 1
+                    metrics.NOTIFIKASI.inc(channel=message.channel, hasil="gagal")
+                else:
+                    Outbox.objects.filter(pk=message.pk).update(
+                        available_at=now + timedelta(seconds=backoff(message.attempts, config)),
+                        last_error=error,
+                    )
+                    stats["retried"] += 1
+                    metrics.NOTIFIKASI.inc(channel=message.channel, hasil="retry")
+            else:
+                sent.append(message)
+
+        if sent:
+            Outbox.objects.filter(pk__in=[m.pk for m in sent]).update(
+                status=Outbox.STATUS_SENT, sent_at=timezone.now(), last_error="",
+            )
+            stats["sent"] += len(sent)
+            for message in sent:
+                metrics.NOTIFIKASI.inc(channel=message.channel, hasil="terkirim")
+
+    return stats
+
+
+def purge_sent(days=30, batch_size=900):
+    """Hapus pesan terkirim yang lebih tua dari `days` hari; returns jumlah baris"""
+    from apps.konsultasi.models import Outbox
+
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = 0
+    while True:
+        pks = list(
+            Outbox.objects.filter(status=Outbox.STATUS_SENT, sent_at__lt=cutoff)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += Outbox.objects.filter(pk__in=pks).delete()[0]
@@ -7,9 +7,19 @@ Handles:
 - Export to CSV/PDF
 """
 
+import csv
 from datetime import date
 from django.db.models import Count
-from django.utils import timezone
+
+from apps.konsultasi import db, periods
+
+
+EXPORT_COLUMNS = (
+    'Kantor', 'Nomor', 'Tanggal', 'Tamu', 'Instansi', 'Tipe',
+    'Kategori', 'Jenis', 'Status', 'Petugas', 'Waktu Selesai',
+)
+
+EXPORT_CHUNK_SIZE = 2000
 
 
 class KunjunganReports:
@@ -21,8 +31,26 @@ class KunjunganReports:
         
         reports = KunjunganReports()
         data = reports.daily_report(date.today())
+
+        # Laporan satu kantor
+        data = KunjunganReports(kantor=2).monthly_report(2025, 12)
     """
+
+    def __init__(self, kantor=None):
+        """
+        Args:
+            kantor: id / instance Kantor (default: semua kantor)
+        """
+        self.kantor = getattr(kantor, "pk", kantor)
+
+    def _queryset(self):
+        from apps.konsultasi.models import Kunjungan
+
+        if self.kantor is None:
+            return Kunjungan.objects.all()
+        return Kunjungan.objects.by_kantor(self.kantor)
     
+    @db.workload("report")
     def daily_report(self, report_date=None):
         """
         Generate laporan harian
@@ -33,16 +61,15 @@ class KunjunganReports:
         Returns:
             dict: Laporan harian lengkap
         """
-        from apps.konsultasi.models import Kunjungan
-        
         if report_date is None:
-            report_date = timezone.now().date()
+            report_date = periods.local_today()
         
-        qs = Kunjungan.objects.filter(
+        qs = self._queryset().filter(
             tanggal_kunjungan=report_date
         ).with_relations()
         
         return {
+            'kantor': self.kantor,
             'date': report_date,
             'total': qs.count(),
             'pending': qs.pending().count(),
@@ -60,6 +87,7 @@ class KunjunganReports:
             ),
         }
     
+    @db.workload("report")
     def monthly_report(self, year=None, month=None):
         """
         Generate laporan bulanan
@@ -71,15 +99,13 @@ class KunjunganReports:
         Returns:
             dict: Laporan bulanan lengkap
         """
-        from apps.konsultasi.models import Kunjungan
-        
-        now = timezone.now()
-        year = year or now.year
-        month = month or now.month
+        period = periods.month(year, month)
+        year, month = period.start.year, period.start.month
         
-        qs = Kunjungan.objects.by_month(year, month).with_relations()
+        qs = self._queryset().in_period(period).with_relations()
         
         return {
+            'kantor': self.kantor,
             'year': year,
             'month': month,
             'total': qs.count(),
@@ -108,9 +134,19 @@ class KunjunganReports:
         Returns:
             list: List of dicts untuk CSV writer
         """
-        data = []
-        for obj in queryset.with_relations():
-            data.append({
+        return list(self.export_rows(queryset))
+
+    def export_rows(self, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Baris export satu per satu (dict kolom CSV), dibaca per chunk
+
+        Di PostgreSQL iterator() memakai server-side cursor: memori tetap
+        sebesar satu chunk berapa pun jumlah kunjungan.
+        """
+        rows = queryset.with_relations().iterator(chunk_size=chunk_size)
+        for obj in rows:
+            yield {
+                'Kantor': obj.id_kantor.nama_kantor,
                 'Nomor': obj.nomor_kunjungan,
                 'Tanggal': obj.tanggal_kunjungan,
                 'Tamu': obj.id_tamu.nama,
@@ -121,6 +157,27 @@ class KunjunganReports:
                 'Status': 'Selesai' if obj.status_selesai else 'Menunggu',
                 'Petugas': obj.id_petugas.nama_petugas if obj.id_petugas else '-',
                 'Waktu Selesai': obj.waktu_selesai.strftime('%Y-%m-%d %H:%M:%S') if obj.waktu_selesai else '-',
-            })
-        
-        return data
\ No newline at end of file
+            }
+
+    def stream_csv(self, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        CSV export sebagai generator baris teks (StreamingHttpResponse)
+
+        Usage:
+            response = StreamingHttpResponse(
+                KunjunganReports().stream_csv(queryset), content_type="text/csv"
+            )
+        """
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        yield writer.writerow(EXPORT_COLUMNS)
+        with db.workload("export", using=queryset.db):
+            for row in self.export_rows(queryset, chunk_size):
+                yield writer.writerow([row[column] for column in EXPORT_COLUMNS])
+
+
+class _LineBuffer:
+    """File palsu untuk csv.writer: writerow() mengembalikan barisnya"""
+
+    def write(self, value):
+        return value
@@ -13,7 +13,22 @@ class KunjunganStatistics:
         
         stats = KunjunganStatistics()
         data = stats.get_dashboard_stats()
+
+        # Satu kantor (index komposit diawali id_kantor)
+        stats = KunjunganStatistics(kantor=2)
     """
+
+    def __init__(self, kantor=None):
+        """
+        Args:
+            kantor: id / instance Kantor (default: semua kantor)
+        """
+        self.kantor = getattr(kantor, "pk", kantor)
+
+    def _queryset(self):
+        if self.kantor is None:
+            return Kunjungan.objects.all()
+        return Kunjungan.objects.by_kantor(self.kantor)
     
     def get_dashboard_stats(self):
         """
@@ -26,7 +41,7 @@ class KunjunganStatistics:
             stats = KunjunganStatistics()
             data = stats.get_dashboard_stats()
         """
-        qs = Kunjungan.objects.all()
+        qs = self._queryset()
         
         return {
             'total': qs.count(),
@@ -47,7 +62,7 @@ class KunjunganStatistics:
         Returns:
             dict: Statistik konsultasi detail
         """
-        konsultasi_qs = Kunjungan.objects.konsultasi().completed()
+        konsultasi_qs = self._queryset().konsultasi().completed()
         
         return {
             'total_konsultasi': konsultasi_qs.count(),
@@ -73,7 +88,7 @@ class KunjunganStatistics:
             list: List of dict dengan workload per petugas
         """
         return list(
-            Kunjungan.objects.values(
+            self._queryset().values(
                 'id_petugas__nama_petugas'
             ).annotate(
                 total_layanan=Count('id_kunjungan'),
@@ -0,0 +1,129 @@
+"""
+Signal handlers untuk app konsultasi
+
+Dihubungkan di KonsultasiConfig.ready().
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.konsultasi import audit
+from apps.konsultasi.managers import returning_cache
+from apps.konsultasi.models import (
+    JenisLayanan, Kantor, KategoriLayanan, Kunjungan, KunjunganKonten, MediaKonsultasi, Petugas,
+    SumberJawaban, Tamu, TipeKunjungan, Tombstone,
+)
+from apps.konsultasi.services import assignment, changefeed, master_data
+
+
+# ===== CHANGE TRACKING =====
+
+_replay = threading.local()
+
+
+@contextmanager
+def replaying():
+    """
+    Tulis ulang data dari sumber lain (restore backup): tombstone, change
+    feed dan audit tidak dicatat, supaya restore tidak membuat riwayat baru
+
+    Usage:
+        with signals.replaying():
+            Kunjungan.objects.filter(pk__in=deleted).delete()
+    """
+    outer = getattr(_replay, "active", False)
+    _replay.active = True
+    try:
+        yield
+    finally:
+        _replay.active = outer
+
+
+def is_replaying():
+    return getattr(_replay, "active", False)
+
+
+@receiver(post_delete, sender=Tamu)
+@receiver(post_delete, sender=Kunjungan)
+def record_tombstone(sender, instance, using, **kwargs):
+    """Catat penghapusan agar ikut ter-backup secara incremental"""
+    if is_replaying():
+        return
+    Tombstone.objects.using(using).create(
+        model_label=sender._meta.label_lower,
+        object_pk=instance.pk,
+    )
+
+
+@receiver(post_delete, sender=Kunjungan)
+def record_delete_event(sender, instance, using, **kwargs):
+    """Penghapusan kunjungan ikut masuk change feed"""
+    if is_replaying():
+        return
+    changefeed.record(instance, "delete", using=using)
+
+
+# ===== LOOKUP TAMU LAMA =====
+
+@receiver(post_save, sender=Tamu)
+@receiver(post_delete, sender=Tamu)
+def invalidate_returning_cache(sender, instance, **kwargs):
+    """Kontak tamu berubah/dihapus: buang hasil lookup_returning yang basi"""
+    returning_cache.discard_tamu(instance.pk)
+
+
+# ===== PENUGASAN OTOMATIS =====
+
+@receiver(post_save, sender=Petugas)
+@receiver(post_delete, sender=Petugas)
+@receiver(m2m_changed, sender=Petugas.spesialisasi.through)
+def reset_assignment_board(sender, **kwargs):
+    """Petugas / spesialisasi berubah: papan beban dibangun ulang (proses ini)"""
+    assignment.reset()
+
+
+# ===== MASTER DATA =====
+
+MASTER_MODELS = (TipeKunjungan, KategoriLayanan, JenisLayanan, MediaKonsultasi, SumberJawaban)
+
+
+def bump_master_version(sender, using, **kwargs):
+    """Master data berubah: dokumen JSON (dan ETag-nya) dirender ulang"""
+    master_data.bump_version(using)
+
+
+for _model in MASTER_MODELS:
+    post_save.connect(bump_master_version, sender=_model, dispatch_uid=f"master_version_save_{_model.__name__}")
+    post_delete.connect(bump_master_version, sender=_model, dispatch_uid=f"master_version_delete_{_model.__name__}")
+
+
+# ===== AUDIT TRAIL =====
+
+AUDITED_MODELS = (Kunjungan, KunjunganKonten, Tamu, Petugas, Kantor, *MASTER_MODELS)
+
+
+def audit_snapshot(sender, instance, raw, using, update_fields, **kwargs):
+    """Nilai lama untuk diff, hanya saat update (instance yang dimuat tidak di-snapshot)"""
+    if not raw and not is_replaying():
+        audit.load_initial(instance, using, update_fields)
+
+
+def audit_save(sender, instance, created, raw, using, **kwargs):
+    if not raw and not is_replaying():
+        audit.record(instance, audit.ACTION_CREATE if created else audit.ACTION_UPDATE, using)
+
+
+def audit_delete(sender, instance, using, **kwargs):
+    # Konten terhapus bersama kunjungannya (cascade), cukup dicatat sekali
+    if sender is not KunjunganKonten and not is_replaying():
+        audit.record(instance, audit.ACTION_DELETE, using)
+
+
+for _model in AUDITED_MODELS:
+    pre_save.connect(audit_snapshot, sender=_model, dispatch_uid=f"audit_snapshot_{_model.__name__}")
+    post_save.connect(audit_save, sender=_model, dispatch_uid=f"audit_save_{_model.__name__}")
+    post_delete.connect(audit_delete, sender=_model, dispatch_uid=f"audit_delete_{_model.__name__}")
+
@@ -0,0 +1,312 @@
+"""
+Generator data sintetis untuk benchmark & uji beban
+
+Data dibuat dengan bulk_create (tanpa Kunjungan.save() per baris):
+- Campuran kategori miring (konsultasi dominan)
+- Tamu yang kembali berkunjung (distribusi Pareto)
+- Beberapa petugas, sebagian nonaktif
+- Tanggal tersebar multi-tahun
+"""
+
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+
+# Master data default (sama dengan backup_data.json)
+DEFAULT_MASTER = {
+    "tipe": [(1, "Offline"), (2, "Online")],
+    "kategori": [(1, "Pendaftaran/Verifikasi"), (2, "Konsultasi"), (3, "Informasi")],
+    "jenis": [
+        (1, 1, "SPSE"), (2, 1, "E-Katalog"),
+        (3, 2, "SPSE"), (4, 2, "E-Katalog"), (5, 2, "SiRUP"), (6, 2, "Pengadaan"),
+        (7, 3, "Lainnya"),
+    ],
+    "media": [(1, "Tatap Muka"), (2, "WhatsApp"), (3, "E-Mail"), (4, "Telepon"), (5, "Zoom")],
+    "sumber": [(1, "Perpres"), (2, "Manual SPSE"), (3, "FAQ"), (4, "Praktik Lapangan"), (5, "Lainnya")],
+}
+
+# Bobot kategori: konsultasi mendominasi trafik
+KATEGORI_WEIGHTS = {"konsultasi": 0.6, "pendaftaran": 0.3, "informasi": 0.1}
+
+PERTANYAAN = [
+    "Bagaimana cara reset password akun SPSE?",
+    "Kenapa dokumen penawaran tidak bisa diunggah di SPSE?",
+    "Bagaimana cara mendaftar sebagai penyedia di E-Katalog?",
+    "Apa syarat verifikasi berkas pendaftaran penyedia?",
+    "Bagaimana cara mengumumkan RUP di SiRUP?",
+    "Kenapa paket di SiRUP tidak muncul di SPSE?",
+    "Bagaimana prosedur tender cepat sesuai Perpres?",
+    "Apakah e-purchasing wajib untuk paket di bawah 200 juta?",
+    "Bagaimana cara menambah produk di katalog elektronik?",
+    "Kenapa akun penyedia saya terblokir?",
+]
+
+JAWABAN = [
+    "Silakan gunakan menu lupa password lalu cek email terdaftar.",
+    "Pastikan ukuran file sesuai batas dan format dokumen benar.",
+    "Lengkapi data penyedia lalu ajukan verifikasi ke LPSE.",
+    "Bawa dokumen asli untuk verifikasi di loket LPSE.",
+    "Umumkan paket melalui menu RUP setelah disetujui PA/KPA.",
+    "Pastikan paket sudah diumumkan dan tersinkron di SiRUP.",
+    "Mengacu pada ketentuan Perpres tentang pengadaan barang/jasa.",
+    "Lihat ketentuan batas nilai e-purchasing pada regulasi terbaru.",
+]
+
+NAMA_DEPAN = ["Budi", "Siti", "Agus", "Dewi", "Rudi", "Sri", "Andi", "Rina", "Eko", "Wati", "Joko", "Ani"]
+NAMA_BELAKANG = ["Santoso", "Wijaya", "Saputra", "Lestari", "Hidayat", "Pratama", "Kusuma", "Nugroho"]
+INSTANSI = ["PT Maju Jaya", "CV Sumber Rejeki", "Dinas PU", "Dinas Pendidikan", "RSUD", "PT Karya Abadi", "BPBD"]
+
+
+class SyntheticDataGenerator:
+    """
+    Generate data sintetis secara cepat
+
+    Usage:
+        generator = SyntheticDataGenerator(seed=42)
+        generator.generate(visits=100_000, tamu=30_000, petugas=10, years=3)
+
+        # Multi-kantor: kunjungan & petugas tersebar di kantor 1..5
+        generator.generate(visits=100_000, kantor=5)
+    """
+
+    def __init__(self, seed=None, batch_size=5000):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+
+    def generate(self, visits, tamu=None, petugas=10, years=3, pending_ratio=0.05, kantor=1, stdout=None):
+        """
+        Args:
+            kantor: jumlah kantor (1..kantor, dibuat jika belum ada)
+
+        Returns:
+            dict: jumlah data yang dibuat
+        """
+        tamu = tamu or max(1, visits // 3)
+
+        self.ensure_master_data()
+        kantor_ids = self.ensure_kantor(kantor)
+        petugas_by_kantor = self.create_petugas(petugas, kantor_ids)
+        tamu_ids = self.create_tamu(tamu)
+
+        created = 0
+        for start in range(0, visits, self.batch_size):
+            size = min(self.batch_size, visits - start)
+            created += self.create_kunjungan(size, tamu_ids, petugas_by_kantor, years, pending_ratio)
+            if stdout:
+                stdout.write(f"  kunjungan {created}/{visits}")
+
+        return {
+            "tamu": len(tamu_ids),
+            "petugas": sum(len(ids) for ids in petugas_by_kantor.values()),
+            "kunjungan": created,
+        }
+
+    # ===== MASTER DATA =====
+
+    def ensure_master_data(self):
+        """Buat master data default jika tabel masih kosong"""
+        from apps.konsultasi.models import (
+            TipeKunjungan, KategoriLayanan, JenisLayanan,
+            MediaKonsultasi, SumberJawaban,
+        )
+
+        if not TipeKunjungan.objects.exists():
+            TipeKunjungan.objects.bulk_create(
+                [TipeKunjungan(id_tipe=pk, nama_tipe=nama) for pk, nama in DEFAULT_MASTER["tipe"]]
+            )
+        if not KategoriLayanan.objects.exists():
+            KategoriLayanan.objects.bulk_create(
+                [KategoriLayanan(id_kategori=pk, nama_kategori=nama) for pk, nama in DEFAULT_MASTER["kategori"]]
+            )
+        if not JenisLayanan.objects.exists():
+            JenisLayanan.objects.bulk_create([
+                JenisLayanan(id_jenis=pk, id_kategori_id=kategori, nama_jenis=nama)
+                for pk, kategori, nama in DEFAULT_MASTER["jenis"]
+            ])
+        if not MediaKonsultasi.objects.exists():
+            MediaKonsultasi.objects.bulk_create(
+                [MediaKonsultasi(id_media=pk, nama_media=nama) for pk, nama in DEFAULT_MASTER["media"]]
+            )
+        if not SumberJawaban.objects.exists():
+            SumberJawaban.objects.bulk_create(
+                [SumberJawaban(id_sumber=pk, nama_sumber=nama) for pk, nama in DEFAULT_MASTER["sumber"]]
+            )
+
+        self._load_master()
+
+    def _load_master(self):
+        from apps.konsultasi.models import (
+            TipeKunjungan, KategoriLayanan, JenisLayanan,
+            MediaKonsultasi, SumberJawaban,
+        )
+
+        self.tipe_ids = list(TipeKunjungan.objects.values_list("id_tipe", flat=True))
+        self.tipe_offline = set(
+            TipeKunjungan.objects.filter(nama_tipe__iexact="offline").values_list("id_tipe", flat=True)
+        )
+
+        # Bobot per kategori berdasarkan kata kunci nama
+        self.kategori_ids = []
+        self.kategori_weights = []
+        self.kategori_konsultasi = set()
+        for pk, nama in KategoriLayanan.objects.values_list("id_kategori", "nama_kategori"):
+            nama = nama.lower()
+            weight = next((w for key, w in KATEGORI_WEIGHTS.items() if key in nama), 0.05)
+            self.kategori_ids.append(pk)
+            self.kategori_weights.append(weight)
+            if "konsultasi" in nama:
+                self.kategori_konsultasi.add(pk)
+
+        self.jenis_by_kategori = defaultdict(list)
+        for pk, kategori_id in JenisLayanan.objects.values_list("id_jenis", "id_kategori_id"):
+            self.jenis_by_kategori[kategori_id].append(pk)
+
+        self.media_ids = list(MediaKonsultasi.objects.values_list("id_media", flat=True))
+        self.media_tatap_muka = (
+            MediaKonsultasi.objects.filter(nama_media__iexact="tatap muka")
+            .values_list("id_media", flat=True).first()
+        )
+        self.sumber_ids = list(SumberJawaban.objects.values_list("id_sumber", flat=True))
+
+    def ensure_kantor(self, count):
+        """Pastikan kantor 1..count ada; returns list id_kantor"""
+        from apps.konsultasi.models import Kantor
+
+        existing = set(Kantor.objects.values_list("id_kantor", flat=True))
+        Kantor.objects.bulk_create([
+            Kantor(id_kantor=pk, kode=f"K{pk:02d}", nama_kantor=f"Kantor {pk}")
+            for pk in range(1, count + 1)
+            if pk not in existing
+        ])
+        return list(range(1, count + 1))
+
+    # ===== AKTOR =====
+
+    def create_petugas(self, count, kantor_ids=(1,)):
+        """Petugas dibagi rata ke kantor; returns {id_kantor: [id_petugas]}"""
+        from apps.konsultasi.models import Petugas
+
+        # Lanjut dari petugasN terbesar (count() bentrok setelah ada yang dihapus)
+        offset = max(
+            (
+                int(username[len("petugas"):])
+                for username in Petugas.objects.filter(username__startswith="petugas").values_list("username", flat=True)
+                if username[len("petugas"):].isdigit()
+            ),
+            default=0,
+        )
+        rnd = self.random
+        Petugas.objects.bulk_create([
+            Petugas(
+                id_kantor_id=kantor_ids[i % len(kantor_ids)],
+                nama_petugas=f"{rnd.choice(NAMA_DEPAN)} {rnd.choice(NAMA_BELAKANG)}",
+                username=f"petugas{offset + i + 1}",
+                role="petugas",
+                # ~10% petugas nonaktif
+                is_active=rnd.random() > 0.1,
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+
+        petugas_by_kantor = {pk: [] for pk in kantor_ids}
+        for id_petugas, id_kantor in Petugas.objects.values_list("id_petugas", "id_kantor"):
+            if id_kantor in petugas_by_kantor:
+                petugas_by_kantor[id_kantor].append(id_petugas)
+        return petugas_by_kantor
+
+    def create_tamu(self, count):
+        from apps.konsultasi.models import Tamu
+
+        rnd = self.random
+        offset = Tamu.objects.count()
+        ids = []
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, count)):
+                n = offset + i + 1
+                batch.append(Tamu(
+                    nama=f"{rnd.choice(NAMA_DEPAN)} {rnd.choice(NAMA_BELAKANG)}",
+                    email=f"tamu{n}@contoh.id" if rnd.random() < 0.7 else "",
+                    no_hp=f"08{rnd.randint(11, 99)}{n:08d}"[:15] if rnd.random() < 0.8 else "",
+                    instansi_perusahaan=rnd.choice(INSTANSI),
+                ))
+                batch[-1].set_lookup_keys()
+            Tamu.objects.bulk_create(batch)
+            ids.extend(t.pk for t in batch)
+        return ids
+
+    # ===== KUNJUNGAN =====
+
+    @transaction.atomic
+    def create_kunjungan(self, count, tamu_ids, petugas_by_kantor, years, pending_ratio):
+        from apps.konsultasi.models import Kunjungan, KunjunganKonten
+
+        rnd = self.random
+        today = timezone.localdate()
+        span_days = max(1, years * 365)
+        now = timezone.now()
+        kantor_ids = list(petugas_by_kantor)
+
+        rows = []
+        for _ in range(count):
+            # Tanggal condong ke data terbaru
+            offset = int(span_days * (rnd.random() ** 2))
+            tanggal = today - timedelta(days=offset)
+
+            kategori_id = rnd.choices(self.kategori_ids, self.kategori_weights)[0]
+            tipe_id = rnd.choice(self.tipe_ids)
+            konsultasi = kategori_id in self.kategori_konsultasi
+
+            # Tamu kembali: Pareto -> sebagian kecil tamu sering datang
+            tamu_index = min(int(rnd.paretovariate(1.2)) - 1, len(tamu_ids) - 1)
+            tamu_id = tamu_ids[-1 - tamu_index] if rnd.random() < 0.5 else rnd.choice(tamu_ids)
+
+            kantor_id = rnd.choice(kantor_ids) if len(kantor_ids) > 1 else kantor_ids[0]
+            petugas_ids = petugas_by_kantor[kantor_id]
+
+            selesai = offset > 0 or rnd.random() > pending_ratio
+            row = {
+                "id_kantor_id": kantor_id,
+                "tanggal_kunjungan": tanggal,
+                "id_tamu_id": tamu_id,
+                "id_tipe_id": tipe_id,
+                "id_kategori_id": kategori_id,
+                "id_jenis_id": rnd.choice(self.jenis_by_kategori[kategori_id]),
+                "pertanyaan": rnd.choice(PERTANYAAN) if konsultasi else "",
+                "status_selesai": selesai,
+                "updated_at": now,
+            }
+            if selesai:
+                row["id_petugas_id"] = rnd.choice(petugas_ids) if petugas_ids else None
+                row["waktu_selesai"] = now - timedelta(days=offset)
+                if konsultasi:
+                    row["jawaban"] = rnd.choice(JAWABAN)
+                    row["id_media_id"] = (
+                        self.media_tatap_muka
+                        if tipe_id in self.tipe_offline and self.media_tatap_muka
+                        else rnd.choice(self.media_ids)
+                    )
+                    row["id_sumber_id"] = rnd.choice(self.sumber_ids)
+            rows.append(row)
+
+        # Nomor kunjungan per blok (kantor, bulan), urut tanggal
+        rows.sort(key=lambda r: r["tanggal_kunjungan"])
+        by_month = defaultdict(list)
+        for row in rows:
+            tanggal = row["tanggal_kunjungan"]
+            by_month[(row["id_kantor_id"], tanggal.year, tanggal.month)].append(row)
+        for (kantor_id, _, _), month_rows in by_month.items():
+            block = Kunjungan.reserve_nomor(
+                month_rows[0]["tanggal_kunjungan"], count=len(month_rows), kantor=kantor_id,
+            )
+            for row, nomor in zip(month_rows, block):
+                row["nomor_kunjungan"] = nomor
+
+        kunjungan = [Kunjungan(**row) for row in rows]
+        Kunjungan.objects.bulk_create(kunjungan, batch_size=1000)
+        KunjunganKonten.bulk_create_for(kunjungan, batch_size=1000)
+        return len(rows)
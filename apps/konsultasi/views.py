@@ -1,3 +1,312 @@
-from django.shortcuts import render
+import hmac
+import json
 
-# Create your views here.
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET, require_POST
+
+from apps.konsultasi import metrics as konsultasi_metrics
+from apps.konsultasi import profiling
+from apps.konsultasi import ratelimit
+from apps.konsultasi.ratelimit import admission_control
+from apps.konsultasi.services import KunjunganService
+from apps.konsultasi.services import changefeed, kunjungan_api
+from apps.konsultasi.services.idempotency import IdempotencyConflict
+from apps.konsultasi.services import kiosk_sync as kiosk_sync_service
+from apps.konsultasi.services import master_data as master_data_service
+
+
+# ===== ADMIN: PROFILING =====
+
+@staff_member_required
+def profiling_report(request):
+    """
+    Ringkasan endpoint terlambat / terbanyak query
+
+    Data dari QueryProfilingMiddleware (disimpan di cache).
+    """
+    if request.method == "POST" and request.POST.get("reset"):
+        profiling.reset()
+        return redirect("konsultasi_profiling")
+
+    order_by = request.GET.get("o", "wall_ms_avg")
+    if order_by not in ("wall_ms_avg", "wall_ms_max", "queries_avg", "db_ms_avg", "slow", "requests"):
+        order_by = "wall_ms_avg"
+
+    context = {
+        **admin.site.each_context(request),
+        "title": "Profiling Request",
+        "config": profiling.get_config(),
+        "endpoints": profiling.worst_endpoints(order_by=order_by),
+        "slow_requests": profiling.recent_slow_requests()[:20],
+        "order_by": order_by,
+    }
+    return render(request, "admin/konsultasi/profiling.html", context)
+
+
+# ===== METRICS (scrape) =====
+
+@require_GET
+def metrics(request):
+    """
+    Endpoint scrape format Prometheus
+
+    Jika KONSULTASI_METRICS["TOKEN"] diisi, wajib header
+    Authorization: Bearer <TOKEN>.
+    """
+    token = konsultasi_metrics.get_config()["TOKEN"]
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return HttpResponseForbidden("Token metrics tidak valid")
+
+    return HttpResponse(
+        konsultasi_metrics.registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+# ===== MASTER DATA (dropdown bertingkat) =====
+
+# URL dengan ?v=<versi> tidak pernah berubah isinya
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# URL tanpa versi: boleh disimpan lama, tapi selalu revalidasi (304 murah)
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+@require_GET
+def master_data(request):
+    """
+    Seluruh master data (tipe, kategori -> jenis, media, sumber) sebagai JSON
+
+    Dirender sekali per versi master data. Klien memakai ETag
+    (If-None-Match -> 304 tanpa body) atau URL ?v=<version> dari dokumen
+    sebelumnya yang boleh di-cache permanen.
+    """
+    body, etag, version = master_data_service.get_document()
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = quote_etag(etag)
+    if request.GET.get("v") == str(version):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return get_conditional_response(request, etag=response["ETag"], response=response)
+
+
+# ===== REGISTRASI PUBLIK (form / kiosk, tanpa login) =====
+
+@csrf_exempt
+@require_POST
+@admission_control("registrasi")
+def registrasi(request):
+    """
+    Registrasi kunjungan dari body JSON
+
+    Dibatasi token bucket per IP / kiosk dan batas konkurensi global
+    (ratelimit.py); ditolak -> 429 + Retry-After tanpa menyentuh database.
+    Header Idempotency-Key opsional: retry dengan kunci sama mengembalikan
+    kunjungan yang sama (header Idempotent-Replayed: true). id_kantor
+    opsional (default kantor 1); kiosk terdaftar -> kantor kiosk.
+
+    Returns:
+        201 {"id_kunjungan", "nomor_kunjungan", "id_tamu"}, 400/422 {"errors"}
+    """
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"errors": {"__all__": ["Body harus JSON."]}}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"errors": {"__all__": ["Body harus objek JSON."]}}, status=400)
+
+    # Kiosk terdaftar selalu mendaftarkan ke kantornya sendiri
+    token = request.headers.get(ratelimit.KIOSK_HEADER, "")
+    kiosk = ratelimit.get_config()["KIOSKS"].get(token) if token else None
+    if kiosk:
+        data["id_kantor"] = kiosk_sync_service.kantor_for_kiosk(kiosk)
+
+    try:
+        kunjungan = KunjunganService().register_kunjungan(
+            data, idempotency_key=request.headers.get("Idempotency-Key"),
+        )
+    except ValidationError as exc:
+        errors = exc.message_dict if hasattr(exc, "error_dict") else {"__all__": exc.messages}
+        return JsonResponse({"errors": errors}, status=400)
+    except IdempotencyConflict as exc:
+        return JsonResponse({"errors": {"idempotency_key": [str(exc)]}}, status=422)
+
+    response = JsonResponse({
+        "id_kunjungan": kunjungan.pk,
+        "nomor_kunjungan": kunjungan.nomor_kunjungan,
+        "id_tamu": kunjungan.id_tamu_id,
+    }, status=201)
+    if getattr(kunjungan, "idempotent_replayed", False):
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
+# ===== SYNC KIOSK OFFLINE =====
+
+@csrf_exempt
+@require_POST
+@gzip_page
+@admission_control("kiosk_sync")
+def kiosk_sync(request):
+    """
+    Upload antrian registrasi kiosk (batch, body boleh gzip)
+
+    Wajib header X-Kiosk-Token yang terdaftar di
+    KONSULTASI_RATELIMIT["KIOSKS"]. Body: {"master_version", "registrations"}
+    (lihat services/kiosk_sync.py). Upload ulang batch yang sama aman:
+    item yang sudah tersimpan dikembalikan sebagai "duplicate". Registrasi
+    masuk ke kantor kiosk (KONSULTASI_KIOSK_SYNC["KANTOR"]).
+
+    Returns:
+        200 {"results": [...], "master": {"version", "data"}}, 400/403/413 {"errors"}
+    """
+    token = request.headers.get(ratelimit.KIOSK_HEADER, "")
+    kiosk = ratelimit.get_config()["KIOSKS"].get(token) if token else None
+    if not kiosk:
+        return HttpResponseForbidden("Kiosk tidak dikenal")
+
+    try:
+        payload = kiosk_sync_service.decode_body(request.body, request.headers.get("Content-Encoding", ""))
+        result = kiosk_sync_service.sync(payload, kantor=kiosk_sync_service.kantor_for_kiosk(kiosk))
+    except kiosk_sync_service.SyncError as exc:
+        return JsonResponse({"errors": {"__all__": [str(exc)]}}, status=exc.status)
+    return JsonResponse(result, json_dumps_params=COMPACT_JSON)
+
+
+# ===== API INTEGRASI (token / staff) =====
+
+COMPACT_JSON = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+def _require_token_or_staff(request, token):
+    """
+    None jika boleh akses: header Authorization: Bearer <token> jika token
+    diisi, selain itu user staff yang login. Returns: 403 response jika tidak.
+    """
+    if token:
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            return HttpResponseForbidden("Token tidak valid")
+    elif not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden("Hanya untuk staff")
+    return None
+
+
+# ===== CHANGE FEED KUNJUNGAN =====
+
+@require_GET
+def kunjungan_events(request):
+    """
+    Event kunjungan (create/update/complete/reset/delete) setelah cursor
+
+    Query: after=<cursor terakhir>, limit=<1..MAX_LIMIT>. Lanjutkan dengan
+    after=next selama has_more; has_more=false berarti sudah di ujung feed.
+    Jika KONSULTASI_CHANGEFEED["TOKEN"] diisi, wajib header
+    Authorization: Bearer <TOKEN>; jika kosong hanya untuk staff.
+
+    Returns:
+        200 {"events": [{"id", "kunjungan", "event", "at", "data"}], "next", "has_more"}
+    """
+    denied = _require_token_or_staff(request, changefeed.get_config()["TOKEN"])
+    if denied:
+        return denied
+
+    try:
+        after = int(request.GET.get("after") or 0)
+        limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+    except ValueError:
+        return JsonResponse({"errors": {"__all__": ["after/limit harus bilangan bulat."]}}, status=400)
+
+    return JsonResponse(
+        changefeed.read(after=after, limit=limit),
+        json_dumps_params=COMPACT_JSON,
+    )
+
+
+# ===== API KUNJUNGAN (read-only) =====
+
+API_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+
+def _invalid_query(exc):
+    return JsonResponse({"errors": {exc.param: [str(exc)]}}, status=400)
+
+
+@require_GET
+def kunjungan_list(request):
+    """
+    List kunjungan JSON, filter & fields lewat query string
+
+    Query: status, dari, sampai, kategori, jenis, tipe, petugas, q, fields,
+    limit, cursor (dari "next" halaman sebelumnya). ETag/Last-Modified dari
+    perubahan terakhir dicek sebelum query list: tidak berubah -> 304.
+
+    Returns:
+        200 {"results": [...], "next": cursor | null}, 400 {"errors"}
+    """
+    denied = _require_token_or_staff(request, kunjungan_api.get_config()["TOKEN"])
+    if denied:
+        return denied
+
+    marker, last_modified = kunjungan_api.change_marker()
+    last_modified = last_modified and int(last_modified.timestamp())
+    headers = {
+        "ETag": quote_etag(kunjungan_api.list_etag(marker, request.GET)),
+        "Cache-Control": API_CACHE_CONTROL,
+    }
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    # Cek If-None-Match / If-Modified-Since sebelum query list
+    headers_only = HttpResponse(headers=headers)
+    conditional = get_conditional_response(
+        request, etag=headers["ETag"], last_modified=last_modified, response=headers_only,
+    )
+    if conditional is not headers_only:
+        return conditional
+
+    try:
+        page = kunjungan_api.list_page(request.GET)
+    except kunjungan_api.InvalidQuery as exc:
+        return _invalid_query(exc)
+    return JsonResponse(page, json_dumps_params=COMPACT_JSON, headers=headers)
+
+
+@require_GET
+def kunjungan_detail(request, pk):
+    """
+    Satu kunjungan JSON (default semua field termasuk pertanyaan/jawaban)
+
+    Returns:
+        200 {...}, 304, 400 {"errors"}, 404
+    """
+    denied = _require_token_or_staff(request, kunjungan_api.get_config()["TOKEN"])
+    if denied:
+        return denied
+
+    try:
+        row, marker, updated_at = kunjungan_api.detail(pk, request.GET)
+    except kunjungan_api.InvalidQuery as exc:
+        return _invalid_query(exc)
+    if row is None:
+        return JsonResponse({"detail": "Kunjungan tidak ditemukan."}, status=404)
+
+    version = master_data_service.get_version()
+    last_modified = int(updated_at.timestamp())
+    etag = quote_etag(kunjungan_api.list_etag(f"{marker}.{version}", request.GET))
+    response = JsonResponse(row, json_dumps_params=COMPACT_JSON, headers={
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": API_CACHE_CONTROL,
+    })
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from config.database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -25,6 +29,9 @@ SECRET_KEY = 'django-insecure-@#1c6g340s#m(#u4))s_(^8+90ns9zy(scioxb_&j6u7r!wcjq
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# python manage.py test: matikan instrumentasi per request (profiling)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '.pythonanywhere.com']
 
 
@@ -42,10 +49,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.konsultasi.middleware.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.konsultasi.middleware.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,11 +81,20 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Default SQLite; produksi PostgreSQL lewat DATABASE_URL (lihat config/database.py)
+
+DATABASES = database_config(BASE_DIR, os.environ)
 
-DATABASES = {
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMem hanya per-proses; untuk multi-worker ganti ke FileBasedCache/Redis
+# supaya statistik profiling terkumpul dari semua worker.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'konsultasi',
     }
 }
 
@@ -124,3 +142,150 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Logging
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'apps.konsultasi.profiling': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+
+# Profiling request (lihat apps/konsultasi/profiling.py)
+# Ringkasan: /admin/profiling/
+
+KONSULTASI_PROFILING = {
+    'ENABLED': not TESTING,
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.05,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+    'MAX_QUERIES': 50,
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+# Metrics (lihat apps/konsultasi/metrics.py), scrape di /metrics/
+# CACHES di atas LocMem (per proses), jadi snapshot worker disimpan di folder
+# bersama; BACKEND 'cache' hanya jika CACHES sudah Redis/Memcached
+KONSULTASI_METRICS = {
+    'BACKEND': 'cache' if TESTING else 'file',
+    'DIRECTORY': BASE_DIR / 'var' / 'metrics',
+    'FLUSH_INTERVAL': 5,
+    'PROCESS_TTL': 3600,  # snapshot worker yang tidak flush selama ini dibuang
+    'GAUGE_TTL': 15,
+    'TOKEN': '',
+}
+
+# Pertanyaan serupa (lihat apps/konsultasi/services/answers.py)
+# Snapshot dibangun ulang berkala: python manage.py answer_index --rebuild
+KONSULTASI_ANSWERS = {
+    'ENABLED': True,
+    'DIRECTORY': BASE_DIR / 'var' / 'answer_index',
+}
+
+# Kandidat FAQ dari pertanyaan mirip (lihat apps/konsultasi/services/faq.py)
+# Jadwalkan malam hari: python manage.py faq_candidates --output faq.csv
+KONSULTASI_FAQ = {
+    'DIRECTORY': BASE_DIR / 'var' / 'faq',
+    'THRESHOLD': 0.6,
+}
+
+# Admission control registrasi publik (lihat apps/konsultasi/ratelimit.py)
+# Multi-worker: CACHES['default'] harus cache bersama (Redis/Memcached)
+KONSULTASI_RATELIMIT = {
+    'ENABLED': True,
+    'CLIENT_PER_MINUTE': 10,
+    'CLIENT_BURST': 5,
+    'KIOSK_PER_MINUTE': 120,
+    'KIOSK_BURST': 30,
+    'KIOSKS': {},            # {'<token rahasia>': 'kiosk-lobby'}
+    'MAX_CONCURRENT': 8,
+    'CLIENT_IP_HEADER': '',  # 'HTTP_X_FORWARDED_FOR' jika di belakang proxy
+    'TRUSTED_PROXIES': 1,    # proxy tepercaya yang menambah entri X-Forwarded-For
+}
+
+# Idempotency-Key registrasi & penyelesaian (lihat apps/konsultasi/services/idempotency.py)
+# Bersihkan harian: python manage.py purge_idempotency
+KONSULTASI_IDEMPOTENCY = {
+    'TTL': 24 * 3600,
+}
+
+# Notifikasi lewat outbox (lihat apps/konsultasi/services/outbox.py)
+# Worker: python manage.py drain_outbox --loop
+KONSULTASI_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 8,
+    'BACKOFF_BASE': 30,
+    'BACKOFF_MAX': 3600,
+}
+
+KONSULTASI_NOTIFICATIONS = {
+    'BACKENDS': {
+        'email': 'apps.konsultasi.notifications.EmailBackend',
+        'whatsapp': 'apps.konsultasi.notifications.ConsoleBackend',
+    },
+}
+
+# Lokal: email ditulis ke folder, bukan dikirim
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = BASE_DIR / 'var' / 'email'
+DEFAULT_FROM_EMAIL = 'LPSE Buku Tamu <noreply@localhost>'
+
+# Change feed kunjungan (lihat apps/konsultasi/services/changefeed.py)
+# Bersihkan berkala: python manage.py purge_changefeed
+KONSULTASI_CHANGEFEED = {
+    'TOKEN': '',             # kosong: /api/kunjungan/events/ hanya untuk staff
+    'DEFAULT_LIMIT': 500,
+    'MAX_LIMIT': 1000,
+    'RETENTION_DAYS': 90,
+}
+
+# Audit trail diff per field (lihat apps/konsultasi/audit.py)
+KONSULTASI_AUDIT = {
+    'ENABLED': True,
+    'EXCLUDE_FIELDS': ('updated_at', 'email_normalized', 'no_hp_normalized'),
+}
+
+# API JSON read-only kunjungan (lihat apps/konsultasi/services/kunjungan_api.py)
+KONSULTASI_API = {
+    'TOKEN': '',             # kosong: /api/kunjungan/ hanya untuk staff
+    'DEFAULT_LIMIT': 50,
+    'MAX_LIMIT': 200,
+}
+
+# Sync kiosk offline (lihat apps/konsultasi/services/kiosk_sync.py)
+# Token kiosk = KONSULTASI_RATELIMIT['KIOSKS']; simulasi: python manage.py simulate_kiosk
+KONSULTASI_KIOSK_SYNC = {
+    'MAX_BATCH': 500,
+    'MAX_BYTES': 5 * 1024 * 1024,
+    'MAX_BACKDATE_DAYS': 30,
+    'KANTOR': {},            # {'kiosk-cabang-barat': 2}; kiosk lain -> kantor 1
+}
+
+# Penugasan petugas otomatis saat registrasi (lihat apps/konsultasi/services/assignment.py)
+# Simulasi waktu tunggu: python manage.py simulate_assignment --staff 2,3,4,6
+KONSULTASI_ASSIGNMENT = {
+    'ENABLED': False,        # True: petugas paling ringan ditetapkan saat registrasi
+    'REFRESH_SECONDS': 60,
+}
+
+# Batas waktu query per jenis pekerjaan di PostgreSQL (lihat apps/konsultasi/db.py)
+# Request web memakai DB_STATEMENT_TIMEOUT_MS dari environment; 0 = tanpa batas
+KONSULTASI_DB = {
+    'STATEMENT_TIMEOUT_MS': {
+        'report': 60_000,
+        'export': 120_000,
+        'maintenance': 0,
+    },
+}
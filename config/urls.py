@@ -17,6 +17,16 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from apps.konsultasi import views
+
 urlpatterns = [
+    path('admin/profiling/', views.profiling_report, name='konsultasi_profiling'),
     path('admin/', admin.site.urls),
+    path('metrics/', views.metrics, name='konsultasi_metrics'),
+    path('api/master-data/', views.master_data, name='konsultasi_master_data'),
+    path('api/registrasi/', views.registrasi, name='konsultasi_registrasi'),
+    path('api/kiosk/sync/', views.kiosk_sync, name='konsultasi_kiosk_sync'),
+    path('api/kunjungan/', views.kunjungan_list, name='konsultasi_kunjungan_list'),
+    path('api/kunjungan/<int:pk>/', views.kunjungan_detail, name='konsultasi_kunjungan_detail'),
+    path('api/kunjungan/events/', views.kunjungan_events, name='konsultasi_kunjungan_events'),
 ]